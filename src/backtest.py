@@ -0,0 +1,306 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dl_metrics import prediction_matrices
+from incremental_inference import load_prediction_history
+from tracing import track_script
+
+# 백테스트 설정 (보유 기간(행 수), 거래 비용, 기준값 그리드, walk-forward 구간 수)
+BACKTEST_HORIZON = int(os.getenv('BACKTEST_HORIZON', '7'))  # 예측 기간과 같은 7일 보유
+BACKTEST_COST_BPS = float(os.getenv('BACKTEST_COST_BPS', '10'))  # 매수/매도 한번당 비용 (0.1%)
+# 기준값: 예측 상승률(%) = Rise Probability (%), 'start:stop:step' 또는 쉼표 목록, 'off' 는 해당 방향 거래 안 함
+BACKTEST_LONG_THRESHOLDS = os.getenv('BACKTEST_LONG_THRESHOLDS', '0:10:0.25')
+BACKTEST_SHORT_THRESHOLDS = os.getenv('BACKTEST_SHORT_THRESHOLDS', 'off,-10:0:0.25')
+BACKTEST_FOLDS = int(os.getenv('BACKTEST_FOLDS', '5'))
+BACKTEST_TARGETS = os.getenv('BACKTEST_TARGETS', '')  # 쉼표로 구분한 한글 종목명, 비어 있으면 예측 기록의 전체 종목
+BACKTEST_TOP = int(os.getenv('BACKTEST_TOP', '20'))  # backtest_report.json 에 저장할 상위 조합 수
+BACKTEST_CHUNK_MB = int(os.getenv('BACKTEST_CHUNK_MB', '256'))  # 낙폭 계산 시 한번에 만드는 배열 크기
+
+METRIC_COLUMNS = ['Total Return (%)', 'Annual Return (%)', 'Sharpe', 'Max Drawdown (%)', 'Hit Rate (%)',
+                  'Trades', 'Turnover (annual)', 'Exposure (%)']
+
+
+def parse_thresholds(spec, off_value):
+    """'0:10:0.5' (stop 포함) 또는 '1,2.5' 형식의 기준값 목록, 'off' 는 off_value (해당 방향 거래 안 함)"""
+    values = []
+    for part in (p.strip() for p in spec.split(',')):
+        if not part:
+            continue
+        if part == 'off':
+            values.append(off_value)
+        elif ':' in part:
+            start, stop, step = (float(v) for v in part.split(':'))
+            values.extend(np.round(np.arange(start, stop + step / 2, step), 10))
+        else:
+            values.append(float(part))
+    return np.unique(np.array(values, dtype=np.float64))
+
+
+def signal_matrices(data, target_columns, horizon=BACKTEST_HORIZON):
+    """
+    예측 기록 -> (종목 목록, 날짜, 예측 상승률(%) (날짜, 종목), 일간 수익률, horizon 행 뒤까지의 수익률) 배열
+    예측 상승률은 dl_report 의 Rise Probability (%) 와 같은 값 (날짜 t 의 예측값 / t 의 실제값)
+    예측이 시작되기 전 행과 실제값이 끝난 뒤 행은 제외
+    """
+    stocks, predicted, future, actual = prediction_matrices(data, target_columns, horizon)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        signal = (predicted - actual) / actual * 100
+        forward = future / actual - 1
+        daily = np.full_like(actual, np.nan)
+        daily[1:] = actual[1:] / actual[:-1] - 1
+    signal[~np.isfinite(signal)] = np.nan
+    rows = np.flatnonzero(~np.isnan(signal).all(axis=1))
+    last = np.flatnonzero(~np.isnan(actual).all(axis=1))
+    if not len(rows) or not len(last):
+        raise ValueError("No rows with both predictions and actual prices")
+    rows = slice(rows[0], last[-1] + 1)
+    dates = pd.DatetimeIndex(data['날짜']).to_numpy()[rows]
+    return stocks, dates, signal[rows], np.nan_to_num(daily[rows], posinf=0.0, neginf=0.0), forward[rows]
+
+
+def periods_per_year(dates):
+    """1년당 행 수 (거래일 기준 total 이면 약 252, 이전 달력일 기록이면 약 365)"""
+    years = (dates[-1] - dates[0]) / np.timedelta64(1, 'D') / 365.25
+    return (len(dates) - 1) / years if years > 0 else 252.0
+
+
+def _threshold_sums(key, thresholds, values):
+    """
+    날짜별로 key > thresholds[g] 인 종목의 values 합계를 모든 기준값에 대해 한번에 계산 -> (기준값, 날짜) 배열 목록
+    각 값이 넘는 기준값 개수로 구간을 나눠 bincount 로 합친 뒤 누적합 (기준값 수와 무관하게 종목 x 날짜 한번 순회)
+    """
+    n_rows = key.shape[0]
+    order = np.argsort(thresholds)
+    n_bins = len(thresholds) + 1
+    bins = np.searchsorted(thresholds[order], np.where(np.isnan(key), -np.inf, key), side='left')
+    flat = (np.arange(n_rows)[:, None] * n_bins + bins).ravel()
+    sums = []
+    for value in values:
+        binned = np.bincount(flat, weights=value.ravel(), minlength=n_rows * n_bins).reshape(n_rows, n_bins)
+        above = np.cumsum(binned[:, ::-1], axis=1)[:, ::-1][:, 1:]  # above[:, g]: 기준값 g 를 넘는 값의 합계
+        result = np.empty((len(thresholds), n_rows))
+        result[order] = above.T
+        sums.append(result)
+    return sums
+
+
+def leg_returns(signal, daily, forward, thresholds, side, horizon=BACKTEST_HORIZON, cost_bps=BACKTEST_COST_BPS):
+    """
+    한 방향(side=1 매수: 예측 상승률 > 기준값, side=-1 매도: 예측 상승률 < 기준값)의 기준값별 일간 수익률
+    날짜 t 종가에 진입한 포지션은 horizon 행 뒤 종가에 청산 (겹치는 보유 구간은 별도 묶음으로 운용)
+    묶음 하나의 자금은 1 / horizon, 그날 예측값이 있는 종목에 같은 비중 -> 비용은 진입/청산한 비중 x cost_bps
+    반환: 기준값별 (일간 순수익률, 일간 거래 비중, 보유 비중) (기준값, 날짜) 배열과 거래 수, 적중 수, 결과가 나온 거래 수
+    """
+    n_rows = signal.shape[0]
+    active = ~np.isnan(signal)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(active, 1.0 / (horizon * active.sum(axis=1, keepdims=True)), 0.0)
+    # k 행 뒤의 일간 수익률 x 종목 비중 (진입일 기준으로 정렬)
+    lagged = []
+    for k in range(1, horizon + 1):
+        shifted = np.zeros_like(daily)
+        shifted[:n_rows - k] = daily[k:]
+        lagged.append(side * shifted * weight)
+    known = ~np.isnan(forward) & active
+    hit = known & (side * np.nan_to_num(forward) > 0)
+    sums = _threshold_sums(side * signal, side * thresholds,
+                           lagged + [weight, active.astype(np.float64), hit.astype(np.float64), known.astype(np.float64)])
+    opened = sums[horizon]
+
+    gross = np.zeros_like(opened)
+    held = np.zeros_like(opened)
+    for k in range(1, horizon + 1):
+        gross[:, k:] += sums[k - 1][:, :n_rows - k]
+        held[:, k:] += opened[:, :n_rows - k]
+    turnover = opened.copy()  # 진입
+    turnover[:, horizon:] += opened[:, :n_rows - horizon]  # 청산
+    return {
+        'returns': gross - turnover * cost_bps / 10000,
+        'turnover': turnover,
+        'exposure': held,
+        'trades': sums[horizon + 1].sum(axis=1),
+        'hits': sums[horizon + 2].sum(axis=1),
+        'known': sums[horizon + 3].sum(axis=1),
+    }
+
+
+def _drawdown_and_total(returns):
+    # 마지막 축(날짜) 기준 복리 누적 수익률과 최대 낙폭
+    equity = np.cumprod(1 + returns, axis=-1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=-1), 1.0)
+    return equity[..., -1] - 1, (1 - equity / peak).max(axis=-1)
+
+
+def grid_metrics(long_leg, short_leg, per_year, chunk_mb=BACKTEST_CHUNK_MB):
+    """
+    모든 (매수 기준값, 매도 기준값) 조합의 지표 -> {지표명: (매수 기준값 수, 매도 기준값 수) 배열}
+    두 방향의 일간 수익률은 더해지므로 평균/표준편차는 합계와 행렬 곱으로, 누적 수익률/낙폭만 조합별 배열로 계산
+    """
+    L, S = long_leg['returns'], short_leg['returns']
+    n_rows = L.shape[1]
+    mean = (L.sum(axis=1)[:, None] + S.sum(axis=1)[None, :]) / n_rows
+    square = (np.square(L).sum(axis=1)[:, None] + np.square(S).sum(axis=1)[None, :] + 2 * L @ S.T) / n_rows
+    std = np.sqrt(np.maximum(square - mean ** 2, 0.0) * n_rows / max(n_rows - 1, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(per_year), np.nan)
+        hit_rate = (long_leg['hits'][:, None] + short_leg['hits'][None, :]) / (
+            long_leg['known'][:, None] + short_leg['known'][None, :]) * 100
+
+    total = np.empty_like(mean)
+    drawdown = np.empty_like(mean)
+    step = max(1, int(chunk_mb * 2 ** 20 // (8 * 3 * S.size)))  # cumprod / 최고점 / 낙폭 배열
+    for i in range(0, L.shape[0], step):
+        total[i:i + step], drawdown[i:i + step] = _drawdown_and_total(L[i:i + step, None, :] + S[None, :, :])
+    return {
+        'Total Return (%)': total * 100,
+        'Annual Return (%)': (np.power(np.maximum(1 + total, 0.0), per_year / n_rows) - 1) * 100,
+        'Sharpe': sharpe,
+        'Max Drawdown (%)': drawdown * 100,
+        'Hit Rate (%)': hit_rate,
+        'Trades': long_leg['trades'][:, None] + short_leg['trades'][None, :],
+        'Turnover (annual)': (long_leg['turnover'].mean(axis=1)[:, None]
+                              + short_leg['turnover'].mean(axis=1)[None, :]) * per_year,
+        'Exposure (%)': (long_leg['exposure'].mean(axis=1)[:, None]
+                         + short_leg['exposure'].mean(axis=1)[None, :]) * 100,
+    }
+
+
+def valid_combinations(long_thresholds, short_thresholds):
+    """매수 기준값 >= 매도 기준값인 조합만 사용 (같은 종목을 동시에 매수/매도하는 조합 제외)"""
+    return long_thresholds[:, None] >= short_thresholds[None, :]
+
+
+def _prefix_sharpe(L, S, end):
+    # 0 ~ end 행 구간의 조합별 샤프 비율 (연율화 전, 선택용)
+    L, S = L[:, :end], S[:, :end]
+    mean = (L.sum(axis=1)[:, None] + S.sum(axis=1)[None, :]) / end
+    square = (np.square(L).sum(axis=1)[:, None] + np.square(S).sum(axis=1)[None, :] + 2 * L @ S.T) / end
+    std = np.sqrt(np.maximum(square - mean ** 2, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, mean / std, np.nan)
+
+
+def walk_forward(long_leg, short_leg, long_thresholds, short_thresholds, dates, per_year, folds=BACKTEST_FOLDS):
+    """
+    날짜를 folds 개 구간으로 나누고, 구간 k 는 그 이전 전체 구간에서 샤프 비율이 가장 높았던 조합으로 거래
+    반환: 구간별 선택 조합/지표 목록, 이어 붙인 out-of-sample 지표
+    """
+    L, S = long_leg['returns'], short_leg['returns']
+    valid = valid_combinations(long_thresholds, short_thresholds)
+    bounds = np.linspace(0, L.shape[1], folds + 1).astype(int)
+    results, stitched = [], []
+    for start, end in zip(bounds[1:-1], bounds[2:]):
+        sharpe = np.where(valid, _prefix_sharpe(L, S, start), np.nan)
+        if np.isnan(sharpe).all():
+            continue
+        i, j = np.unravel_index(np.nanargmax(sharpe), sharpe.shape)
+        returns = L[i, start:end] + S[j, start:end]
+        stitched.append(returns)
+        results.append({'From': str(pd.Timestamp(dates[start]).date()), 'To': str(pd.Timestamp(dates[end - 1]).date()),
+                        'Long Threshold': _threshold_value(long_thresholds[i]),
+                        'Short Threshold': _threshold_value(short_thresholds[j]),
+                        **series_metrics(returns, per_year)})
+    oos = series_metrics(np.concatenate(stitched), per_year) if stitched else {}
+    return results, oos
+
+
+def series_metrics(returns, per_year):
+    """일간 수익률 하나의 누적/연 수익률, 샤프 비율, 최대 낙폭"""
+    total, drawdown = _drawdown_and_total(returns)
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    return {
+        'Total Return (%)': total * 100,
+        'Annual Return (%)': (max(1 + total, 0.0) ** (per_year / len(returns)) - 1) * 100,
+        'Sharpe': returns.mean() / std * np.sqrt(per_year) if std > 0 else None,
+        'Max Drawdown (%)': drawdown * 100,
+    }
+
+
+def _json_value(value, digits=6):
+    # NaN/inf -> null, numpy 값 -> 파이썬 값
+    if value is None:
+        return None
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def _threshold_value(value):
+    # 'off'(해당 방향 거래 안 함) 기준값은 문자열로 저장
+    return 'off' if np.isinf(value) else _json_value(value)
+
+
+def run_backtest(data, target_columns=None, long_thresholds=None, short_thresholds=None,
+                 horizon=BACKTEST_HORIZON, cost_bps=BACKTEST_COST_BPS, folds=BACKTEST_FOLDS, top=BACKTEST_TOP):
+    """
+    예측 기록(predicted_stock.csv 형식) 전체 종목에 대해 기준값 그리드 백테스트 + walk-forward 검증
+    반환: backtest_report.json 에 저장할 dict (샤프 비율 상위 top 개 조합, 구간별 walk-forward 결과)
+    """
+    if target_columns is None:
+        target_columns = [c[:-len('_Predicted')] for c in data.columns if c.endswith('_Predicted')]
+    long_thresholds = parse_thresholds(BACKTEST_LONG_THRESHOLDS, np.inf) if long_thresholds is None \
+        else np.unique(np.asarray(long_thresholds, dtype=np.float64))
+    short_thresholds = parse_thresholds(BACKTEST_SHORT_THRESHOLDS, -np.inf) if short_thresholds is None \
+        else np.unique(np.asarray(short_thresholds, dtype=np.float64))
+
+    stocks, dates, signal, daily, forward = signal_matrices(data, target_columns, horizon)
+    per_year = periods_per_year(dates)
+    long_leg = leg_returns(signal, daily, forward, long_thresholds, 1, horizon, cost_bps)
+    short_leg = leg_returns(signal, daily, forward, short_thresholds, -1, horizon, cost_bps)
+    metrics = grid_metrics(long_leg, short_leg, per_year)
+    valid = valid_combinations(long_thresholds, short_thresholds)
+
+    # 샤프 비율 내림차순 (값이 없는 조합은 마지막)
+    sharpe = np.where(valid, metrics['Sharpe'], np.nan)
+    order = np.argsort(np.where(np.isnan(sharpe), np.inf, -sharpe), axis=None)[:top]
+    order = [k for k in order if valid.flat[k]]
+    best = [{'Long Threshold': _threshold_value(long_thresholds[i]),
+             'Short Threshold': _threshold_value(short_thresholds[j]),
+             **{name: _json_value(metrics[name][i, j]) for name in METRIC_COLUMNS}}
+            for i, j in (np.unravel_index(k, valid.shape) for k in order)]
+    folds_result, oos = walk_forward(long_leg, short_leg, long_thresholds, short_thresholds, dates, per_year, folds)
+    return {
+        'period': {'from': str(pd.Timestamp(dates[0]).date()), 'to': str(pd.Timestamp(dates[-1]).date()),
+                   'rows': len(dates), 'periods_per_year': round(per_year, 1)},
+        'settings': {'targets': len(stocks), 'horizon': horizon, 'cost_bps': cost_bps,
+                     'long_thresholds': len(long_thresholds), 'short_thresholds': len(short_thresholds),
+                     'combinations': int(valid.sum()), 'folds': folds},
+        'best': best,
+        'walk_forward': {
+            'folds': [{k: v if isinstance(v, str) else _json_value(v) for k, v in r.items()} for r in folds_result],
+            'out_of_sample': {k: _json_value(v) for k, v in oos.items()},
+        },
+    }
+
+
+def write_report(report, output_path):
+    """백테스트 결과를 JSON 으로 저장"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    return output_path
+
+
+if __name__ == '__main__':
+    folder_path = os.path.join(os.getcwd(), "report")
+    trace = track_script('backtest')  # 시간/메모리 기록 (report/trace.jsonl)
+    data = load_prediction_history(folder_path)
+    if data is None:
+        trace.fail(f"No prediction history found in {folder_path}")
+        raise SystemExit(f"No prediction history found in {folder_path}")
+    targets = [t.strip() for t in BACKTEST_TARGETS.split(',') if t.strip()] or None
+    started = time.time()
+    report = run_backtest(data, targets)
+    settings = report['settings']
+    print(f"Backtested {settings['combinations']} threshold combinations over {settings['targets']} targets "
+          f"and {report['period']['rows']} rows in {time.time() - started:.2f}s")
+    trace.output(rows=settings['combinations'], columns=settings['targets'])
+    output_path = write_report(report, os.path.join(folder_path, "backtest_report.json"))
+    print(f"Backtest results saved to {output_path}\n")
+    print("=============== Best Thresholds (by Sharpe) ===============")
+    print(pd.DataFrame(report['best']).to_string(index=False))
+    print("\n=============== Walk-Forward (out-of-sample) ===============")
+    print(pd.DataFrame(report['walk_forward']['folds']).to_string(index=False))
+    print(report['walk_forward']['out_of_sample'])
@@ -0,0 +1,473 @@
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from feature_columns import economic_features
+from universe import nasdaq_top_100
+
+FOLDER_PATH = os.path.join(os.getcwd(), "report")
+FIXTURE_DIR = os.path.join(FOLDER_PATH, "cache", "benchmark")  # FRED 응답 / 야후 종가 fixture
+RESULTS_FILE = os.path.join(FOLDER_PATH, "benchmarks.jsonl")  # 실행마다 한 줄씩 추가 (실행 간 비교용)
+
+# 벤치마크 설정 (종목 수, 실행할 항목, 반복 횟수, 학습 항목에서 실제로 학습할 종목 수, fixture 기간)
+BENCH_SIZES = [int(n) for n in os.getenv('BENCH_SIZES', '1,10,95').split(',') if n.strip()]
+BENCH_CASES = [c.strip() for c in os.getenv('BENCH_CASES', 'fred,windows,train,evaluate,backtest,features,prompt').split(',')
+               if c.strip()]
+BENCH_REPEAT = int(os.getenv('BENCH_REPEAT', '3'))
+BENCH_TRAIN_TICKERS = int(os.getenv('BENCH_TRAIN_TICKERS', '1'))
+BENCH_START = os.getenv('BENCH_START', '2006-01-01')  # fred.py 수집 시작일과 동일
+BENCH_END = os.getenv('BENCH_END', '2025-03-24')  # 실행 간 비교를 위해 고정
+
+# yfinance 로 받는 지수 (fred.py yfinance_indicators)
+YF_INDICES = {'^NDX': '나스닥 100', '^NYFANG': 'NYSE FANG+ 지수', '^VIX': 'VIX 지수'}
+# FRED 지표 제공 주기 (fred.py 와 동일, 나머지는 일간)
+FRED_FREQUENCIES = {
+    '기준금리': 'm', '미시간대 소비자 심리지수': 'm', '실업률': 'm', '경기침체': 'm', '산업생산': 'm',
+    '소매판매': 'm', '에너지 가격 지수': 'm', '임금 성장률': 'm', '소비자 물가지수': 'm', '미국 달러 환율': 'm',
+    '금융스트레스지수': 'w', '5년 변동금리 모기지': 'w', '통화 공급량 M2': 'w',
+    '가계 부채 비율': 'q', 'GDP 성장률': 'q',
+}
+OBSERVATION_FREQ = {'d': 'B', 'w': 'W-FRI', 'm': 'MS', 'q': 'QS'}  # 관측일 (pandas 빈도)
+SINGLE_RUN_CASES = {'train'}  # 한 epoch 가 수십 초 이상 걸리므로 반복하지 않음
+
+
+def fred_series():
+    """fixture 로 만들 FRED 지표 [(코드, 이름, 주기)] (경제 지표 중 yfinance 지수 제외)"""
+    names = [name for name in economic_features if name not in YF_INDICES.values()]
+    return [(f"BENCH{i:02d}", name, FRED_FREQUENCIES.get(name, 'd')) for i, name in enumerate(names)]
+
+
+def _random_walk(rng, n_rows, level, volatility):
+    return level * np.exp(np.cumsum(rng.normal(0, volatility, n_rows)))
+
+
+def _fixture_source(folder_path, start, end, synthetic):
+    """
+    fixture 원본 데이터 (날짜 x 컬럼 DataFrame, 'recorded' / 'synthetic')
+    report/total 에 수집된 데이터가 있으면 그 값을 사용하고, 없는 컬럼은 난수로 채움
+    """
+    from total_store import load_schema, read_total
+
+    dates = pd.bdate_range(start, end)
+    columns = [name for _, name, _ in fred_series()] + list(YF_INDICES.values()) + [n for _, n in nasdaq_top_100]
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({name: _random_walk(rng, len(dates), rng.uniform(5, 500), 0.01) for name in columns},
+                        index=dates)
+    for i, (_, name) in enumerate(nasdaq_top_100):
+        if i % 10 == 9:  # 일부 종목은 중간에 상장된 것처럼 앞부분을 비움
+            data.iloc[:len(dates) // (2 + i % 3), data.columns.get_loc(name)] = np.nan
+    if synthetic or load_schema(folder_path) is None:
+        return data, 'synthetic'
+    recorded = read_total(folder_path, mmap=False)
+    recorded = recorded.reindex(dates.union(recorded.index)).ffill().reindex(dates)
+    shared = [c for c in columns if c in recorded.columns and recorded[c].notna().any()]
+    data[shared] = recorded[shared].astype(np.float64)
+    return data, 'recorded'
+
+
+def build_fixtures(fixture_dir=FIXTURE_DIR, folder_path=FOLDER_PATH, start=BENCH_START, end=BENCH_END,
+                   synthetic=False, rebuild=False):
+    """
+    FRED API 응답(fred/{코드}.json)과 야후 종가(yahoo_close.csv) fixture 생성 (같은 설정이면 재사용)
+    반환: fixture 정보 dict (source, start, end, rows)
+    """
+    meta_path = os.path.join(fixture_dir, "meta.json")
+    if not rebuild and os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if (meta['start'], meta['end']) == (start, end) and (not synthetic or meta['source'] == 'synthetic'):
+            return meta
+
+    data, source = _fixture_source(folder_path, start, end, synthetic)
+    fred_dir = os.path.join(fixture_dir, "fred")
+    if not os.path.exists(fred_dir):
+        os.makedirs(fred_dir)
+    rng = np.random.default_rng(1)
+    for code, name, frequency in fred_series():
+        dates = pd.date_range(start, end, freq=OBSERVATION_FREQ[frequency])
+        values = data[name].reindex(data.index.union(dates)).ffill().bfill().reindex(dates)
+        observations = [{'realtime_start': end, 'realtime_end': end, 'date': f"{date:%Y-%m-%d}",
+                         'value': '.' if frequency == 'd' and rng.random() < 0.01 else f"{value:.4f}"}
+                        for date, value in values.items()]  # 일간 지표는 FRED 처럼 휴일 결측값 '.' 포함
+        payload = {'realtime_start': end, 'realtime_end': end, 'count': len(observations),
+                   'observations': observations}
+        with open(os.path.join(fred_dir, f"{code}.json"), 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+    tickers = {**YF_INDICES, **dict(nasdaq_top_100)}
+    close = data[list(tickers.values())].set_axis(list(tickers), axis=1)
+    close.index.name = 'Date'
+    close.to_csv(os.path.join(fixture_dir, "yahoo_close.csv"))
+
+    meta = {'source': source, 'start': start, 'end': end, 'rows': len(data),
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+    return meta
+
+
+class _FredFixtureHandler(BaseHTTPRequestHandler):
+    """FRED series/observations 요청에 fixture 파일을 그대로 응답"""
+
+    def do_GET(self):
+        series_id = parse_qs(urlparse(self.path).query).get('series_id', [''])[0]
+        path = os.path.join(self.server.fixture_dir, "fred", f"{series_id}.json")
+        if not os.path.exists(path):
+            self.send_error(400, f"Bad Request. The series does not exist: {series_id}")
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def fixture_services(fixture_dir=FIXTURE_DIR):
+    """
+    네트워크 없이 실행: 로컬 HTTP 서버가 FRED 응답을, yf.download 대신 fixture 종가를 반환
+    (fred_fetcher.fetch_all / yf_batch.download_close 코드는 그대로 실행됨)
+    """
+    import fred_fetcher
+    import yf_batch
+
+    close = pd.read_csv(os.path.join(fixture_dir, "yahoo_close.csv"), parse_dates=['Date'], index_col='Date')
+
+    def download(tickers, start=None, end=None, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frame = close.loc[start:end, [t for t in tickers if t in close.columns]]
+        frame.columns = pd.MultiIndex.from_product([['Close'], frame.columns])
+        return frame
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FredFixtureHandler)
+    server.fixture_dir = fixture_dir
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fred_url, yf_download = fred_fetcher.FRED_URL, yf_batch.yf.download
+    fred_fetcher.FRED_URL = f"http://127.0.0.1:{server.server_port}/fred/series/observations"
+    yf_batch.yf.download = download
+    try:
+        yield
+    finally:
+        fred_fetcher.FRED_URL, yf_batch.yf.download = fred_url, yf_download
+        server.shutdown()
+        server.server_close()
+
+
+class BenchContext:
+    """종목 수별 입력 데이터 (여러 항목이 같은 데이터를 쓰므로 한번만 만듦)"""
+
+    def __init__(self, fixture_meta):
+        self.meta = fixture_meta
+        self._totals = {}
+        self._train_results = {}
+
+    def tickers(self, n):
+        """나스닥 100 상위 n 개 종목 {티커: 이름}"""
+        return dict(nasdaq_top_100[:n])
+
+    def total(self, n):
+        """fred.py 경로로 만든 total 데이터 (경제 지표 + n 개 종목)"""
+        if n not in self._totals:
+            self._totals[n] = collect_total(self.meta, self.tickers(n))[0]
+        return self._totals[n]
+
+    def training_data(self, n):
+        from train_universe import clean_training_data
+        data = clean_training_data(self.total(n))
+        econ_columns = [c for c in economic_features if c in data.columns]
+        stock_columns = [c for c in self.tickers(n).values() if c in data.columns]
+        return data, stock_columns, econ_columns
+
+    def predictions(self, n):
+        """predicted_stock.csv 형식(날짜, {종목}_Predicted, {종목}_Actual)의 예측 기록"""
+        data, stock_columns, _ = self.training_data(n)
+        rng = np.random.default_rng(2)
+        frame = {'날짜': data.index}
+        for col in stock_columns:
+            actual = data[col].to_numpy()
+            frame[f'{col}_Predicted'] = actual * rng.normal(1.0, 0.03, len(actual))
+            frame[f'{col}_Actual'] = actual
+        return pd.DataFrame(frame), stock_columns
+
+
+def collect_total(fixture_meta, tickers):
+    """
+    fred.py 와 같은 순서로 total 데이터 생성: FRED 동시 요청 -> 캐시 병합 -> 야후 종가 -> 거래일 기준 as-of 결합
+    반환: (total DataFrame, 단계별 소요 시간 dict)
+    """
+    from fred_cache import FredCache
+    from fred_fetcher import fetch_all
+    from fred_merge import build_total
+    from yf_batch import download_close
+
+    start, end = fixture_meta['start'], fixture_meta['end']
+    phases = {}
+    started = time.perf_counter()
+    series_requests = [(code, name, {'series_id': code, 'observation_start': start, 'observation_end': end,
+                                     'frequency': frequency})
+                       for code, name, frequency in fred_series()]
+    results = fetch_all(series_requests, 'benchmark', rate_limit=1e9)  # 요청 제한 대기는 측정에서 제외
+    phases['fetch'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = FredCache(cache_dir)
+        frames = [cache.update(code, params['frequency'], start, pd.DataFrame(result.observations),
+                               result.vintage).rename(columns={'value': name})
+                  for (code, name, params), result in zip(series_requests, results)]
+    phases['cache'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    close, _ = download_close({**YF_INDICES, **tickers}, start, end)
+    phases['yahoo'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index_frame = close[[name for name in YF_INDICES.values() if name in close.columns]]
+    stock_frame = close[[name for name in tickers.values() if name in close.columns]]
+    total = build_total(frames, [index_frame, stock_frame])
+    phases['merge'] = time.perf_counter() - started
+    return total, phases
+
+
+# 항목별 측정 함수: (context, 종목 수) -> {'seconds', 'items', 'unit', ...}
+# seconds 는 측정 대상 코드만의 시간 (입력 준비/모델 생성 제외)
+
+def bench_fred(ctx, n):
+    started = time.perf_counter()
+    total, phases = collect_total(ctx.meta, ctx.tickers(n))
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': len(total), 'unit': 'rows', 'columns': total.shape[1],
+            'phases': {k: round(v, 6) for k, v in phases.items()}}
+
+
+def bench_windows(ctx, n):
+    """종목별 학습 윈도우 tf.data 파이프라인 한 epoch 분량 순회"""
+    from tf_pipeline import window_dataset
+    from transformer_model import BATCH_SIZE, FORECAST_HORIZON, LOOKBACK
+
+    data, stock_columns, econ_columns = ctx.training_data(n)
+    econ_values = data[econ_columns].to_numpy(dtype=np.float32)
+    windows = 0
+    started = time.perf_counter()
+    for col in stock_columns:
+        values = np.hstack([data[[col]].to_numpy(dtype=np.float32), econ_values])
+        for (stock, _), _ in window_dataset(values, LOOKBACK, FORECAST_HORIZON, 1, batch_size=BATCH_SIZE):
+            windows += len(stock)
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': windows, 'unit': 'windows'}
+
+
+def bench_train(ctx, n):
+    """
+    build_transformer_with_two_inputs 모델 한 epoch 학습 (CPU, TRAIN_MODE 의 배치 크기/XLA 설정)
+    종목별 모델은 서로 독립이므로 BENCH_TRAIN_TICKERS 개만 학습하고 n 개 종목 시간은 비례로 추정
+    """
+    k = min(n, BENCH_TRAIN_TICKERS)
+    if k not in ctx._train_results:
+        ctx._train_results[k] = _train_epochs(ctx, n, k)
+    result = dict(ctx._train_results[k])
+    result['projected_seconds'] = round(result['seconds'] / k * n, 3)
+    return result
+
+
+def _train_epochs(ctx, n, k):
+    from sklearn.preprocessing import MinMaxScaler
+    from cpu_training import training_mode
+    from tf_pipeline import window_dataset
+    from transformer_model import FORECAST_HORIZON, LOOKBACK, compile_model
+
+    training = training_mode()
+
+    data, stock_columns, econ_columns = ctx.training_data(n)
+    econ_scaled = MinMaxScaler().fit_transform(data[econ_columns].to_numpy(dtype=np.float64))
+    seconds = 0.0
+    samples = steps = 0
+    for col in stock_columns[:k]:
+        stock_scaled = MinMaxScaler().fit_transform(data[[col]].to_numpy(dtype=np.float64))
+        values = np.hstack([stock_scaled, econ_scaled]).astype(np.float32)
+        dataset = window_dataset(values, LOOKBACK, FORECAST_HORIZON, 1, batch_size=training.batch_size,
+                                 drop_remainder=training.drop_remainder)
+        model = compile_model(LOOKBACK, 1, len(econ_columns), jit_compile=training.jit_compile)
+        started = time.perf_counter()
+        model.fit(dataset, epochs=1, verbose=0)
+        seconds += time.perf_counter() - started
+        steps += int(dataset.cardinality())
+        windows = len(values) - LOOKBACK - FORECAST_HORIZON
+        samples += windows - windows % training.batch_size if training.drop_remainder else windows
+    return {'seconds': seconds, 'items': samples, 'unit': 'samples', 'trained_tickers': k,
+            'steps_per_second': round(steps / seconds, 3), 'training_mode': training.name,
+            'batch_size': training.batch_size}
+
+
+def bench_evaluate(ctx, n):
+    """예측 기록 -> 행렬 변환 + evaluate_predictions (전체 기간 + 최근 N일 지표)"""
+    from dl_metrics import ROLLING_WINDOWS, evaluate_predictions, prediction_matrices
+    from transformer_model import FORECAST_HORIZON
+
+    data, stock_columns = ctx.predictions(n)
+    started = time.perf_counter()
+    _, predicted, shifted, _ = prediction_matrices(data, stock_columns, FORECAST_HORIZON)
+    evaluate_predictions(predicted, shifted, ROLLING_WINDOWS)
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': len(stock_columns), 'unit': 'tickers'}
+
+
+def bench_backtest(ctx, n):
+    """예측 기록 -> 기준값 그리드 백테스트 + walk-forward (기본 BACKTEST_* 그리드)"""
+    from backtest import run_backtest
+
+    data, stock_columns = ctx.predictions(n)
+    started = time.perf_counter()
+    report = run_backtest(data, stock_columns)
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': len(stock_columns), 'unit': 'tickers',
+            'combinations': report['settings']['combinations']}
+
+
+def bench_features(ctx, n):
+    """total 데이터(거래일 캘린더) -> 전체 기간 파생 특성 (종목 특성 + 경제 지표 스프레드)"""
+    from feature_store import compute_features
+    from indicators import trading_bars
+
+    data = trading_bars(ctx.total(n))
+    stock_columns = [c for c in ctx.tickers(n).values() if c in data.columns]
+    econ_columns = [c for c in economic_features if c in data.columns]
+    started = time.perf_counter()
+    features = compute_features(data[stock_columns], data[econ_columns])
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': len(stock_columns), 'unit': 'tickers', 'columns': features.shape[1]}
+
+
+def _recorded_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def bench_prompt(ctx, n):
+    """종목별 DeepSeek 프롬프트 생성 (뉴스/기업 정보/가격은 report/ 에 저장된 GOOGL 데이터 사용)"""
+    from dl_metrics import build_report
+    from prompt_builder import build_prompt
+    from transformer_model import FORECAST_HORIZON
+
+    data, stock_columns = ctx.predictions(n)
+    records = build_report(data, stock_columns, FORECAST_HORIZON)
+    news = _recorded_json(os.path.join(FOLDER_PATH, "GOOGL_news.json"), [])
+    info = _recorded_json(os.path.join(FOLDER_PATH, "GOOGL_info.json"), {})
+    price = _recorded_json(os.path.join(FOLDER_PATH, "GOOGL_Moving_Average.json"), {})
+    tokens = 0
+    started = time.perf_counter()
+    for record in records:
+        _, sizes = build_prompt(record, news, info, price)
+        tokens += sizes['system'] + sizes['user']
+    seconds = time.perf_counter() - started
+    return {'seconds': seconds, 'items': len(records), 'unit': 'prompts',
+            'mean_tokens': round(tokens / max(len(records), 1), 1)}
+
+
+CASES = {
+    'fred': bench_fred,
+    'windows': bench_windows,
+    'train': bench_train,
+    'evaluate': bench_evaluate,
+    'backtest': bench_backtest,
+    'features': bench_features,
+    'prompt': bench_prompt,
+}
+
+
+def run_case(ctx, case, n, repeat=BENCH_REPEAT):
+    """항목 하나를 repeat 번 측정, 반환: 결과 dict (시간은 초, throughput 은 중앙값 기준 초당 처리량)"""
+    repeat = 1 if case in SINGLE_RUN_CASES else repeat
+    runs = [CASES[case](ctx, n) for _ in range(repeat)]
+    seconds = [run['seconds'] for run in runs]
+    median = statistics.median(seconds)
+    result = {'case': case, 'tickers': n, 'repeat': repeat, 'min': round(min(seconds), 6),
+              'median': round(median, 6), 'mean': round(statistics.mean(seconds), 6)}
+    result.update({k: v for k, v in runs[-1].items() if k != 'seconds'})
+    result['throughput'] = round(result['items'] / median, 3) if median > 0 else None
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_runs(results_file=RESULTS_FILE):
+    if not os.path.exists(results_file):
+        return []
+    with open(results_file, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_run(run, results_file=RESULTS_FILE):
+    with open(results_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+
+
+def format_results(results, previous=None):
+    """결과 표 (이전 실행이 있으면 같은 항목/종목 수의 중앙값 비율 함께 표시)"""
+    before = {(r['case'], r['tickers']): r['median'] for r in (previous or {}).get('results', [])}
+    lines = [f"{'case':<10}{'tickers':>8}{'median(s)':>12}{'min(s)':>12}{'throughput':>22}{'vs prev':>10}"]
+    for r in results:
+        ratio = before.get((r['case'], r['tickers']))
+        ratio = f"{r['median'] / ratio:.2f}x" if ratio else '-'
+        throughput = f"{r['throughput']:,.1f} {r['unit']}/s" if r['throughput'] is not None else '-'
+        lines.append(f"{r['case']:<10}{r['tickers']:>8}{r['median']:>12.4f}{r['min']:>12.4f}{throughput:>22}{ratio:>10}")
+    return '\n'.join(lines)
+
+
+def run_benchmarks(cases=BENCH_CASES, sizes=BENCH_SIZES, repeat=BENCH_REPEAT, synthetic=False, rebuild=False):
+    """fixture 준비 후 항목 x 종목 수 조합 측정, 결과를 RESULTS_FILE 에 한 줄로 추가, 반환: 실행 기록 dict"""
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        raise ValueError(f"Unknown cases: {', '.join(unknown)} (available: {', '.join(CASES)})")
+    meta = build_fixtures(synthetic=synthetic, rebuild=rebuild)
+    print(f"Fixtures: {meta['source']} data, {meta['start']} ~ {meta['end']} ({meta['rows']} business days)")
+
+    ctx = BenchContext(meta)
+    results = []
+    with fixture_services():
+        for n in sizes:
+            for case in cases:
+                result = run_case(ctx, case, n, repeat)
+                print(f"{case} x {n} tickers: median {result['median']:.4f}s")
+                results.append(result)
+
+    previous = load_runs()
+    run = {'run_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'commit': _git_commit(),
+           'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+           'fixtures': meta, 'results': results}
+    append_run(run)
+    print(format_results(results, previous[-1] if previous else None))
+    return run
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    run_benchmarks(synthetic='--synthetic' in sys.argv, rebuild='--rebuild-fixtures' in sys.argv)
+    print(f"Results appended to {RESULTS_FILE}")
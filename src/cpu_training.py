@@ -0,0 +1,151 @@
+import math
+import os
+import time
+from dataclasses import dataclass
+
+# 학습 프로세스의 TensorFlow 스레드 풀 (연산 하나를 나눠 계산하는 스레드 수는 train_universe 의 TRAIN_THREADS_PER_WORKER)
+TRAIN_INTER_OP_THREADS = int(os.getenv('TRAIN_INTER_OP_THREADS', '1'))  # 독립 연산을 동시에 실행하는 스레드 수
+# 학습 모드: 'default' (학습 셀과 동일: 배치 32, 고정 epoch) / 'cpu' (CPU 전용 서버용 설정)
+TRAIN_MODE = os.getenv('TRAIN_MODE', 'default')
+# cpu 모드 설정 (환경 변수가 있으면 default 모드에서도 적용)
+TRAIN_BATCH_SIZE = os.getenv('TRAIN_BATCH_SIZE', '')  # cpu 모드 기본 128
+TRAIN_LR_SCALING = os.getenv('TRAIN_LR_SCALING', '')  # 배치 크기에 맞춘 학습률 조정: 'sqrt'(cpu 모드 기본) / 'linear' / 'none'
+TRAIN_JIT_COMPILE = os.getenv('TRAIN_JIT_COMPILE', '')  # XLA 컴파일 ('1' / '0', 코어가 적으면 오히려 느림)
+TRAIN_VALIDATION_FRACTION = os.getenv('TRAIN_VALIDATION_FRACTION', '')  # early stopping 용 마지막 윈도우 비율 (cpu 모드 0.1)
+TRAIN_PATIENCE = os.getenv('TRAIN_PATIENCE', '')  # 검증 loss 가 좋아지지 않아도 기다리는 epoch 수 (cpu 모드 5)
+TRAIN_TAIL_EPOCHS = os.getenv('TRAIN_TAIL_EPOCHS', '')  # early stopping 후 검증 구간(가장 최근 날짜)을 추가 학습할 epoch 수 (3)
+
+
+@dataclass
+class TrainingMode:
+    """
+    학습 방식 설정 (모델 구조는 같고 학습 속도/종료 조건만 다름)
+    batch_size / lr_scaling: 배치 크기와 기준 배치(32) 대비 학습률 조정 방식 (scaled_learning_rate)
+    validation_fraction: 0 이면 epochs 만큼 고정 학습, 0 보다 크면 마지막 윈도우를 검증용으로 두고 early stopping
+    tail_epochs: early stopping 후 검증용으로 남겨둔 가장 최근 윈도우로 추가 학습할 epoch 수
+    """
+    name: str = 'default'
+    batch_size: int = 32
+    lr_scaling: str = 'none'
+    jit_compile: bool = False
+    validation_fraction: float = 0.0
+    patience: int = 5
+    tail_epochs: int = 3
+    drop_remainder: bool = False  # 마지막 작은 배치를 버림 (배치 모양이 하나로 고정되어 다시 trace 하지 않음)
+
+
+def training_mode(name=None):
+    """TRAIN_MODE 프리셋에 TRAIN_* 환경 변수 값을 덮어쓴 학습 설정"""
+    name = name or TRAIN_MODE
+    if name == 'cpu':
+        mode = TrainingMode('cpu', batch_size=128, lr_scaling='sqrt', validation_fraction=0.1, patience=5,
+                            drop_remainder=True)
+    elif name == 'default':
+        mode = TrainingMode()
+    else:
+        raise ValueError(f"Unknown TRAIN_MODE: {name} (available: default, cpu)")
+    overrides = {'batch_size': (TRAIN_BATCH_SIZE, int), 'lr_scaling': (TRAIN_LR_SCALING, str),
+                 'jit_compile': (TRAIN_JIT_COMPILE, lambda v: v.lower() in ('1', 'true', 'yes')),
+                 'validation_fraction': (TRAIN_VALIDATION_FRACTION, float), 'patience': (TRAIN_PATIENCE, int),
+                 'tail_epochs': (TRAIN_TAIL_EPOCHS, int)}
+    for key, (value, parse) in overrides.items():
+        if value:
+            setattr(mode, key, parse(value))
+    return mode
+
+
+def configure_threads(intra_op_threads, inter_op_threads=TRAIN_INTER_OP_THREADS):
+    """
+    TensorFlow 스레드 풀 크기 지정 (TensorFlow 가 연산을 실행하기 전에 호출해야 적용됨)
+    0 이면 TensorFlow 기본값 유지
+    """
+    if intra_op_threads:
+        os.environ['OMP_NUM_THREADS'] = str(intra_op_threads)
+        os.environ['TF_NUM_INTRAOP_THREADS'] = str(intra_op_threads)
+    if inter_op_threads:
+        os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_op_threads)
+    import tensorflow as tf
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def scaled_learning_rate(learning_rate, batch_size, base_batch_size=32, scaling='sqrt'):
+    """
+    기준 배치 크기(학습 셀: 32)에서 정한 학습률을 batch_size 에 맞게 조정
+    'linear': 배치 크기에 비례, 'sqrt': 배치 크기의 제곱근에 비례 (Adam 에서 더 안정적), 'none': 그대로
+    """
+    ratio = batch_size / base_batch_size
+    if scaling == 'linear':
+        return learning_rate * ratio
+    if scaling == 'sqrt':
+        return learning_rate * math.sqrt(ratio)
+    if scaling == 'none':
+        return learning_rate
+    raise ValueError(f"Unknown learning rate scaling: {scaling} (available: linear, sqrt, none)")
+
+
+def holdout_split(n_rows, lookback, forecast_horizon, validation_fraction):
+    """
+    마지막 validation_fraction 만큼의 윈도우를 검증용으로 나누는 기준 행 (이 행 이후가 검증 윈도우)
+    학습 윈도우의 정답은 모두 검증 윈도우의 정답보다 앞 날짜 (검증 구간 정보가 학습에 섞이지 않음)
+    검증 윈도우를 만들 수 없으면 None
+    """
+    n_windows = n_rows - lookback - forecast_horizon
+    n_validation = int(n_windows * validation_fraction)
+    if validation_fraction <= 0 or n_validation < 1 or n_windows - n_validation < 1:
+        return None
+    return n_rows - forecast_horizon - n_validation
+
+
+def fit_model(model, window_values, lookback, forecast_horizon, n_targets, epochs, mode,
+              trace_name=None, verbose=0):
+    """
+    mode 설정으로 모델 학습
+    - validation_fraction 이 0 이면 전체 윈도우로 epochs 만큼 학습 (학습 셀과 동일)
+    - 0 보다 크면 마지막 윈도우를 검증용으로 두고 최대 epochs 까지 학습, 검증 loss 가 patience epoch 동안
+      좋아지지 않으면 중단 후 가장 좋았던 가중치로 복원, 그다음 검증 구간(가장 최근 날짜)으로 tail_epochs 만큼 추가 학습
+    trace_name: 있으면 epoch 별 처리량을 실행 기록(report/trace.jsonl)에 이 이름으로 기록
+    반환: 학습 정보 dict (epochs, best_epoch, val_loss, steps, steps_per_second, seconds)
+    """
+    from tensorflow.keras.callbacks import EarlyStopping
+    from tf_pipeline import window_dataset
+    from tracing import epoch_callback
+
+    n_rows = len(window_values)
+    split = holdout_split(n_rows, lookback, forecast_horizon, mode.validation_fraction)
+    train_rows = n_rows if split is None else split + forecast_horizon
+    n_train = max(0, train_rows - lookback - forecast_horizon)
+    drop_remainder = mode.drop_remainder and n_train >= mode.batch_size
+    steps_per_epoch = n_train // mode.batch_size if drop_remainder else math.ceil(n_train / mode.batch_size)
+    train_dataset = window_dataset(window_values[:train_rows], lookback, forecast_horizon, n_targets,
+                                   batch_size=mode.batch_size, drop_remainder=drop_remainder)
+    callbacks = [epoch_callback(trace_name, n_train, steps_per_epoch)] if trace_name else []
+
+    started = time.perf_counter()
+    if split is None:
+        history = model.fit(train_dataset, epochs=epochs, verbose=verbose, callbacks=callbacks)
+        info = {'epochs': len(history.history['loss']), 'best_epoch': None, 'val_loss': None}
+    else:
+        # 검증 윈도우는 한 배치로 평가 (배치 크기로 나누어떨어지지 않아 매 epoch 작은 배치가 생기지 않도록)
+        n_validation = n_rows - forecast_horizon - split
+        validation_dataset = window_dataset(window_values, lookback, forecast_horizon, n_targets,
+                                            batch_size=min(n_validation, 1024), shuffle=False, start=split)
+        stopper = EarlyStopping(monitor='val_loss', patience=mode.patience, restore_best_weights=True)
+        history = model.fit(train_dataset, validation_data=validation_dataset, epochs=epochs, verbose=verbose,
+                            callbacks=callbacks + [stopper])
+        val_loss = history.history['val_loss']
+        best_epoch = min(range(len(val_loss)), key=val_loss.__getitem__)
+        info = {'epochs': len(val_loss), 'best_epoch': best_epoch + 1, 'val_loss': float(val_loss[best_epoch])}
+    seconds = time.perf_counter() - started
+    steps = info['epochs'] * steps_per_epoch
+    info.update({'steps': steps, 'steps_per_second': round(steps / seconds, 2) if seconds else None,
+                 'seconds': round(seconds, 2)})
+
+    if split is not None and mode.tail_epochs:
+        # 검증용으로 남겨둔 가장 최근 윈도우도 학습 (model_cache 의 fine-tuning 과 같은 방식)
+        recent_dataset = window_dataset(window_values, lookback, forecast_horizon, n_targets,
+                                        batch_size=mode.batch_size, start=split)
+        model.fit(recent_dataset, epochs=mode.tail_epochs, verbose=verbose)
+    return info
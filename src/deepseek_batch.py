@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from tracing import timed_http
+
+DEEPSEEK_URL = "https://api.deepseek.com"
+DEEPSEEK_MODEL = "deepseek-reasoner"
+RETRY_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+# 응답 캐시 위치 (프롬프트 해시별 JSON 파일)
+CACHE_DIR = os.path.join(os.getcwd(), "report", "cache", "deepseek")
+
+
+@dataclass
+class ChatResult:
+    """요청 하나의 결과 (status: 'ok' / 'cached' / 'failed')"""
+    name: str
+    key: str
+    status: str
+    content: str = None
+    reasoning_content: str = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    error: str = None
+
+
+def prompt_key(model, messages):
+    """모델 + 메시지(프롬프트 입력 전체)로 만든 캐시 키"""
+    payload = json.dumps({'model': model, 'messages': messages}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """프롬프트 해시별 응답 저장소 (같은 입력으로 다시 실행하면 API 를 호출하지 않음)"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, model, content, reasoning_content):
+        record = {'key': key, 'model': model, 'content': content, 'reasoning_content': reasoning_content,
+                  'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self._path(key))
+
+
+def create_client(api_key, base_url=DEEPSEEK_URL):
+    """비동기 OpenAI 호환 클라이언트 (재시도는 complete 에서 직접 처리)"""
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+
+def _retry_delay(error, attempt, backoff):
+    # 429 응답의 Retry-After 우선, 없으면 지수 백오프 + 지터
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * (2 ** attempt) + random.uniform(0, backoff)
+
+
+def _is_retryable(error):
+    import openai
+    if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError)):
+        return True  # 타임아웃, 연결 오류
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRY_STATUS
+    return False
+
+
+def cached_result(cache, name, messages, model=DEEPSEEK_MODEL):
+    """캐시에 같은 프롬프트의 응답이 있으면 ChatResult, 없으면 None"""
+    key = prompt_key(model, messages)
+    cached = cache.get(key) if cache is not None else None
+    if cached is None:
+        return None
+    return ChatResult(name=name, key=key, status='cached', content=cached['content'],
+                      reasoning_content=cached.get('reasoning_content'))
+
+
+async def complete(client, semaphore, cache, name, messages, model=DEEPSEEK_MODEL, timeout=300,
+                   max_retries=4, backoff=2.0):
+    """요청 하나 (타임아웃/429/5xx/연결 오류는 백오프 후 재시도, 성공한 응답은 캐시에 저장)"""
+    result = ChatResult(name=name, key=prompt_key(model, messages), status='failed')
+    started = time.monotonic()
+    for attempt in range(max_retries + 1):
+        result.attempts = attempt + 1
+        try:
+            async with semaphore:  # 동시에 진행 중인 요청 수 제한 (백오프 대기 중에는 자리를 비움)
+                with timed_http('deepseek') as call:
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(model=model, messages=messages), timeout)
+                    call['bytes'] = len(response.model_dump_json())
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            if not _is_retryable(e):
+                break  # API 키 오류, 잘못된 요청 등은 재시도하지 않음
+            if attempt < max_retries:
+                await asyncio.sleep(_retry_delay(e, attempt, backoff))
+            continue
+        message = response.choices[0].message
+        result.content = message.content
+        result.reasoning_content = getattr(message, 'reasoning_content', None)
+        result.status = 'ok'
+        result.error = None
+        if cache is not None:
+            cache.put(result.key, model, result.content, result.reasoning_content)
+        break
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+async def complete_all(chat_requests, api_key, base_url=DEEPSEEK_URL, model=DEEPSEEK_MODEL, concurrency=4,
+                       timeout=300, max_retries=4, backoff=2.0, cache_dir=CACHE_DIR):
+    """
+    여러 요청을 최대 concurrency 개씩 동시에 처리 (캐시에 있는 요청은 API 를 호출하지 않음)
+    chat_requests: (이름, messages) 목록
+    반환: 요청 순서대로 정렬된 ChatResult 목록
+    """
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    results = [cached_result(cache, name, messages, model) for name, messages in chat_requests]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    semaphore = asyncio.Semaphore(concurrency)
+    client = create_client(api_key, base_url)
+    try:
+        completed = await asyncio.gather(*[
+            complete(client, semaphore, cache, *chat_requests[i], model, timeout, max_retries, backoff)
+            for i in pending
+        ])
+    finally:
+        await client.close()
+    for i, result in zip(pending, completed):
+        results[i] = result
+    return results
+
+
+def run_batch(chat_requests, api_key, **kwargs):
+    """complete_all 동기 실행 (스크립트용)"""
+    return asyncio.run(complete_all(chat_requests, api_key, **kwargs))
@@ -0,0 +1,131 @@
+import json
+import os
+
+import numpy as np
+
+# 최근 N일 지표 기간 (정확도가 떨어지고 있는지 확인용)
+ROLLING_WINDOWS = tuple(int(w) for w in os.getenv('DL_REPORT_WINDOWS', '30,90,250').split(',') if w.strip())
+
+METRIC_COLUMNS = ['MAE', 'MSE', 'RMSE', 'MAPE (%)', 'Accuracy (%)']
+RISE_COLUMNS = ['Last Actual Price', 'Predicted Future Price', 'Predicted Rise', 'Rise Probability (%)']
+
+
+def prediction_matrices(data, target_columns, forecast_horizon):
+    """
+    예측 기록에서 (종목 목록, 예측값 (날짜, 종목), forecast_horizon 일 뒤 실제값 (날짜, 종목), 실제값 (날짜, 종목)) 배열 생성
+    _Predicted / _Actual 컬럼이 없는 종목은 제외
+    """
+    stocks = []
+    for col in target_columns:
+        if f'{col}_Predicted' not in data.columns or f'{col}_Actual' not in data.columns:
+            print(f"Skipping {col}: Columns not found in data")
+            continue
+        stocks.append(col)
+    predicted = data[[f'{col}_Predicted' for col in stocks]].to_numpy(dtype=np.float64)
+    actual = data[[f'{col}_Actual' for col in stocks]].to_numpy(dtype=np.float64)
+    # 오늘의 예측값이 forecast_horizon 일 뒤 실제값과 비교되도록 실제값을 위로 이동
+    shifted = np.full_like(actual, np.nan)
+    if forecast_horizon < len(actual):
+        shifted[:len(actual) - forecast_horizon] = actual[forecast_horizon:]
+    return stocks, predicted, shifted, actual
+
+
+def error_metrics(predicted, actual, mask=None):
+    """
+    (날짜, 종목) 배열의 종목별 MAE, MSE, RMSE, MAPE, Accuracy 를 한번에 계산
+    예측값/실제값이 모두 있는 행만 사용 (mask 가 있으면 그중 mask 인 행만), 유효한 행이 없는 종목은 NaN
+    """
+    valid = ~np.isnan(predicted) & ~np.isnan(actual)
+    if mask is not None:
+        valid &= mask
+    count = valid.sum(axis=0)
+    error = np.where(valid, predicted - actual, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_error = np.where(valid, np.abs(error / np.where(valid, actual, 1.0)), 0.0)
+        mae = np.abs(error).sum(axis=0) / count
+        mse = np.square(error).sum(axis=0) / count
+        mape = pct_error.sum(axis=0) / count * 100
+    return {
+        'MAE': mae,
+        'MSE': mse,
+        'RMSE': np.sqrt(mse),
+        'MAPE (%)': mape,
+        'Accuracy (%)': 100 - mape,
+        'count': count,
+    }
+
+
+def trailing_mask(predicted, actual, window):
+    """종목별로 유효한 예측/실제값 쌍 중 마지막 window 개만 True 인 마스크"""
+    valid = ~np.isnan(predicted) & ~np.isnan(actual)
+    # 뒤에서부터 센 유효한 행 순번 (마지막 유효 행이 1)
+    rank_from_end = np.cumsum(valid[::-1], axis=0)[::-1]
+    return valid & (rank_from_end <= window)
+
+
+def evaluate_predictions(predicted, actual, windows=ROLLING_WINDOWS):
+    """
+    전체 기간 + 최근 windows 일 지표를 모든 종목에 대해 한번에 계산 (actual 은 forecast_horizon 만큼 이동한 실제값)
+    반환: {지표명: 종목별 값 배열}, 'count' 는 종목별 유효한 쌍 개수
+    최근 N일 지표 이름: 'MAE 30d', 'RMSE 30d', 'MAPE 30d (%)', 'Accuracy 30d (%)'
+    """
+    overall = error_metrics(predicted, actual)
+    metrics = {name: overall[name] for name in METRIC_COLUMNS}
+    for window in windows:
+        rolling = error_metrics(predicted, actual, trailing_mask(predicted, actual, window))
+        metrics[f'MAE {window}d'] = rolling['MAE']
+        metrics[f'RMSE {window}d'] = rolling['RMSE']
+        metrics[f'MAPE {window}d (%)'] = rolling['MAPE (%)']
+        metrics[f'Accuracy {window}d (%)'] = rolling['Accuracy (%)']
+    metrics['count'] = overall['count']
+    return metrics
+
+
+def analyze_rise_predictions(predicted, actual):
+    """마지막 행(가장 최근 날짜)의 실제값과 예측값으로 종목별 상승 여부와 상승률(%) 계산"""
+    last_actual = actual[-1] if len(actual) else np.full(actual.shape[1], np.nan)
+    last_predicted = predicted[-1] if len(predicted) else np.full(predicted.shape[1], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rise_probability = (last_predicted - last_actual) / last_actual * 100
+    known = ~np.isnan(last_actual) & ~np.isnan(last_predicted)
+    return {
+        'Last Actual Price': last_actual,
+        'Predicted Future Price': last_predicted,
+        'Predicted Rise': np.where(known, last_predicted > last_actual, None),
+        'Rise Probability (%)': np.where(known, rise_probability, np.nan),
+    }
+
+
+def _json_value(value, digits=10):
+    # NaN/inf -> null, numpy 값 -> 파이썬 값 (기존 to_json 과 같은 소수점 10자리)
+    if value is None or isinstance(value, (bool, np.bool_)):
+        return None if value is None else bool(value)
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def build_report(data, target_columns, forecast_horizon, windows=ROLLING_WINDOWS):
+    """
+    평가 지표 + 상승 예측을 종목별 레코드로 합쳐 상승률 내림차순(값이 없으면 마지막)으로 정렬
+    반환: dl_report.json 에 저장할 레코드 목록
+    """
+    stocks, predicted, shifted, actual = prediction_matrices(data, target_columns, forecast_horizon)
+    metrics = evaluate_predictions(predicted, shifted, windows)
+    rise = analyze_rise_predictions(predicted, actual)
+    for col in np.array(stocks)[metrics['count'] == 0]:
+        print(f"Skipping {col}: No valid prediction/actual pairs.")
+
+    # 기존 dl_report.json 컬럼 순서 뒤에 최근 N일 지표 추가
+    names = METRIC_COLUMNS + RISE_COLUMNS + [n for n in metrics if n not in METRIC_COLUMNS and n != 'count']
+    columns = {**metrics, **rise}
+    records = [{'Stock': col, **{name: _json_value(columns[name][k]) for name in names}}
+               for k, col in enumerate(stocks)]
+    records.sort(key=lambda r: (r['Rise Probability (%)'] is None, -(r['Rise Probability (%)'] or 0)))
+    return records
+
+
+def write_report(records, output_path):
+    """레코드 목록을 한번에 JSON 으로 저장"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=4)
+    return output_path
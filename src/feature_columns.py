@@ -0,0 +1,38 @@
+# 경제 지표 입력 컬럼 (total 데이터의 한글 컬럼명)
+economic_features = [
+    '10년 기대 인플레이션율',
+    '장단기 금리차',
+    '기준금리',
+    '미시간대 소비자 심리지수',
+    '실업률',
+    '경기침체',
+    '2년 만기 미국 국채 수익률',
+    '10년 만기 미국 국채 수익률',
+    '금융스트레스지수',
+    '산업생산',
+    '소매판매',
+    '에너지 가격 지수',
+    '임금 성장률',
+    '소비자 물가지수',
+    '5년 변동금리 모기지',
+    '통화 공급량 M2',
+    '미국 하이일드 채권 스프레드',
+    '미국 회사채 스프레드',
+    '미국 회사채 수익률',
+    '미국 회사채 BBB등급 수익률',
+    '미국 하이일드 채권 수익률',
+    '미국 하이일드 채권 CCC등급 수익률',
+    '가계 부채 비율',
+    'GDP 성장률',
+    '다우존스 산업평균지수',
+    '나스닥 종합지수',
+    '미국 달러 환율',
+    '나스닥 100',
+    'VIX 지수',
+    'NYSE FANG+ 지수'
+]
+
+
+def stock_columns(columns):
+    """total 데이터 컬럼 중 경제 지표를 제외한 종목 컬럼"""
+    return [c for c in columns if c not in economic_features]
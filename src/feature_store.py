@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from feature_columns import economic_features, stock_columns
+from indicators import TRADING_DAYS, trading_bars
+from total_store import load_schema, read_total, write_total
+from tracing import track_script
+
+# report/features/ 에 total 번들과 같은 형식(float32 npy + schema.json)으로 저장
+FEATURE_DIR = "features"
+
+# 파생 특성 정의 (계산 방식을 바꾸면 FEATURE_VERSION 을 올림, 정의나 버전이 바뀌면 다음 실행에서 전체 다시 계산)
+FEATURE_VERSION = 1
+# 종목별 특성: 컬럼명은 '{종목}_{특성}' (total 의 거래일 행 기준, window 는 거래일 수)
+TICKER_FEATURES = {
+    'log_return': {'kind': 'log_return', 'window': 1},
+    'log_return_5': {'kind': 'log_return', 'window': 5},
+    'volatility_20': {'kind': 'volatility', 'window': 20},  # 로그 수익률 표준편차 (연율화)
+    'volatility_60': {'kind': 'volatility', 'window': 60},
+    'zscore_20': {'kind': 'zscore', 'window': 20},  # (종가 - 이동평균) / 이동 표준편차
+    'zscore_60': {'kind': 'zscore', 'window': 60},
+    'momentum_20': {'kind': 'momentum', 'window': 20},  # window 봉 전 대비 수익률
+    'momentum_60': {'kind': 'momentum', 'window': 60},
+    'momentum_120': {'kind': 'momentum', 'window': 120},
+}
+# 경제 지표 특성: 컬럼명은 특성 이름 그대로
+MACRO_FEATURES = {
+    '미국 국채 10년-2년 금리차': {'kind': 'spread', 'columns': ['10년 만기 미국 국채 수익률', '2년 만기 미국 국채 수익률']},
+    '하이일드-BBB 회사채 수익률차': {'kind': 'spread', 'columns': ['미국 하이일드 채권 수익률', '미국 회사채 BBB등급 수익률']},
+    'CCC-하이일드 수익률차': {'kind': 'spread', 'columns': ['미국 하이일드 채권 CCC등급 수익률', '미국 하이일드 채권 수익률']},
+    '10년 국채-기대 인플레이션 (실질 금리)': {'kind': 'spread', 'columns': ['10년 만기 미국 국채 수익률', '10년 기대 인플레이션율']},
+}
+
+
+def feature_definitions():
+    """저장된 특성과 함께 기록하는 정의 (버전 비교용)"""
+    return {'version': FEATURE_VERSION, 'ticker': TICKER_FEATURES, 'macro': MACRO_FEATURES,
+            'trading_days': TRADING_DAYS}
+
+
+def definitions_hash(definitions=None):
+    definitions = definitions or feature_definitions()
+    return hashlib.sha1(json.dumps(definitions, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+
+def lookback_rows(definitions=None):
+    """새 날짜의 특성을 계산하는 데 필요한 이전 봉 수 (가장 긴 window + 수익률 계산용 1봉)"""
+    definitions = definitions or feature_definitions()
+    return max(spec['window'] for spec in definitions['ticker'].values()) + 1
+
+
+def feature_column(ticker, name):
+    return f"{ticker}_{name}"
+
+
+def compute_features(closes, macro=None, definitions=None):
+    """
+    (날짜, 종목) 종가 전체로 파생 특성을 한번에 벡터 연산 (종목별 반복 없음)
+    macro: 경제 지표 DataFrame (같은 날짜 인덱스), 정의에 필요한 컬럼이 없는 특성은 제외
+    반환: 날짜 인덱스 DataFrame ('{종목}_{특성}' 컬럼 + 경제 지표 특성 컬럼)
+    """
+    definitions = definitions or feature_definitions()
+    prices = pd.DataFrame(closes.to_numpy(dtype=np.float64), index=closes.index)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(prices.where(prices > 0))
+    log_returns = log_prices.diff()
+
+    names = list(definitions['ticker'])
+    outputs = []
+    for name in names:
+        spec = definitions['ticker'][name]
+        kind, window = spec['kind'], spec['window']
+        if kind == 'log_return':
+            values = log_prices - log_prices.shift(window)
+        elif kind == 'volatility':
+            values = log_returns.rolling(window).std() * np.sqrt(definitions['trading_days'])
+        elif kind == 'zscore':
+            rolling = prices.rolling(window)
+            values = (prices - rolling.mean()) / rolling.std()
+        elif kind == 'momentum':
+            values = prices / prices.shift(window) - 1
+        else:
+            raise ValueError(f"Unknown ticker feature kind: {kind}")
+        outputs.append(values.to_numpy())
+    # (날짜, 특성, 종목) -> (날짜, 종목, 특성) 순서로 펼쳐 종목별 특성이 이웃한 컬럼이 되도록 함
+    stacked = np.stack(outputs, axis=1).transpose(0, 2, 1).reshape(len(prices), -1)
+    columns = [feature_column(ticker, name) for ticker in closes.columns for name in names]
+    features = pd.DataFrame(stacked, index=closes.index, columns=columns)
+
+    macro_columns = {}
+    for name, spec in definitions['macro'].items():
+        if spec['kind'] != 'spread':
+            raise ValueError(f"Unknown macro feature kind: {spec['kind']}")
+        left, right = spec['columns']
+        if macro is not None and left in macro.columns and right in macro.columns:
+            macro_columns[name] = macro[left].to_numpy(dtype=np.float64) - macro[right].to_numpy(dtype=np.float64)
+    if macro_columns:
+        features = pd.concat([features, pd.DataFrame(macro_columns, index=closes.index)], axis=1)
+    return features.replace([np.inf, -np.inf], np.nan)
+
+
+def source_digest(data):
+    """특성 계산에 쓴 원본 값 지문 (과거 값이 수정되었는지 확인용)"""
+    digest = hashlib.sha1(json.dumps([str(c) for c in data.columns], ensure_ascii=False).encode('utf-8'))
+    digest.update(data.index.to_numpy().astype('datetime64[D]').tobytes())
+    digest.update(np.ascontiguousarray(data.to_numpy(dtype=np.float32)).tobytes())
+    return digest.hexdigest()
+
+
+def _source_data(folder_path):
+    """종목 종가 + 특성 정의에 쓰이는 경제 지표 (total 의 거래일 행, 값이 하나도 없는 종목 제외)"""
+    schema = load_schema(folder_path)
+    all_columns = schema['columns'] if schema else list(read_total(folder_path).columns)
+    needed = {c for spec in MACRO_FEATURES.values() for c in spec['columns']}
+    macro_columns = [c for c in economic_features if c in needed and c in all_columns]
+    data = trading_bars(read_total(folder_path, columns=stock_columns(all_columns) + macro_columns))
+    tickers = [c for c in data.columns if c not in macro_columns and data[c].notna().any()]
+    return data[tickers + macro_columns], tickers, macro_columns
+
+
+def update_features(folder_path, full_refresh=False):
+    """
+    total 데이터로 파생 특성을 계산하여 report/features/ 에 저장
+    저장된 특성의 정의/종목/원본 값이 그대로면 마지막 날짜 이후 새 봉만 계산해서 추가
+    (새 봉 앞의 lookback_rows 봉만 함께 읽어 계산하므로 전체 다시 계산한 값과 같음)
+    반환: 저장된 스키마
+    """
+    data, tickers, macro_columns = _source_data(folder_path)
+    definitions = feature_definitions()
+    schema = None if full_refresh else load_schema(folder_path, FEATURE_DIR)
+
+    reason = None
+    if schema is None:
+        reason = "no stored features" if not full_refresh else "full refresh"
+    elif schema.get('definitions_hash') != definitions_hash(definitions):
+        reason = f"definitions changed ({schema.get('definitions_hash')} -> {definitions_hash(definitions)})"
+    elif schema.get('tickers') != tickers or schema.get('macro_source') != macro_columns:
+        reason = "ticker set changed"
+    else:
+        n_old = int(np.searchsorted(data.index.to_numpy(), np.datetime64(schema['last_date']), side='right'))
+        if n_old != schema['rows'] or source_digest(data.iloc[:n_old]) != schema['source_digest']:
+            reason = "source history changed"
+
+    if reason is None:
+        new_rows = len(data) - n_old
+        if new_rows == 0:
+            print(f"Features up to date ({schema['rows']} dates, last {schema['last_date']})")
+            return schema
+        start = max(0, n_old - lookback_rows(definitions))
+        window = data.iloc[start:]
+        new = compute_features(window[tickers], window[macro_columns], definitions).iloc[n_old - start:]
+        stored = read_total(folder_path, mmap=False, store_dir=FEATURE_DIR)
+        features = pd.concat([stored, new.astype(np.float32)])
+        print(f"Appended features for {new_rows} new dates ({len(tickers)} tickers, {features.shape[1]} columns)")
+    else:
+        features = compute_features(data[tickers], data[macro_columns], definitions)
+        print(f"Computed features over {len(data)} dates for {len(tickers)} tickers ({reason})")
+
+    metadata = {'definitions': definitions, 'definitions_hash': definitions_hash(definitions), 'tickers': tickers,
+                'macro_source': macro_columns, 'source_digest': source_digest(data)}
+    write_total(features, folder_path, export_csv=False, store_dir=FEATURE_DIR, metadata=metadata)
+    return load_schema(folder_path, FEATURE_DIR)
+
+
+def read_features(folder_path, tickers=None, features=None, columns=None, mmap=True):
+    """
+    저장된 특성에서 필요한 컬럼만 읽음 (다시 계산하지 않음, 메모리 맵으로 해당 열만 접근)
+    tickers / features: 종목명, 종목별 특성 이름 목록 (예: ['구글 A'], ['log_return', 'volatility_20'])
+    columns: 그 외 직접 지정할 컬럼 (경제 지표 특성 등), 아무것도 지정하지 않으면 전체
+    """
+    schema = load_schema(folder_path, FEATURE_DIR)
+    if schema is None:
+        raise FileNotFoundError(f"No features in {os.path.join(folder_path, FEATURE_DIR)} "
+                                f"(run src/feature_store.py first)")
+    if schema.get('definitions_hash') != definitions_hash():
+        print(f"Warning: stored features use definitions {schema.get('definitions_hash')}, "
+              f"current {definitions_hash()} (run src/feature_store.py to update)")
+    selected = list(columns or [])
+    if tickers is not None or features is not None:
+        names = features if features is not None else list(schema['definitions']['ticker'])
+        selected += [feature_column(t, n) for t in (tickers if tickers is not None else schema['tickers'])
+                     for n in names]
+    missing = [c for c in selected if c not in schema['columns']]
+    if missing:
+        raise KeyError(f"Unknown feature columns: {', '.join(missing[:5])}" + (" ..." if len(missing) > 5 else ""))
+    return read_total(folder_path, columns=selected or None, mmap=mmap, store_dir=FEATURE_DIR)
+
+
+if __name__ == '__main__':
+    folder_path = os.path.join(os.getcwd(), "report")
+    trace = track_script('features')  # 시간/메모리 기록 (report/trace.jsonl)
+    schema = update_features(folder_path, full_refresh='--full-refresh' in sys.argv)
+    trace.output(rows=schema['rows'], columns=schema['cols'])
+    print(f"Saved {schema['cols']} feature columns up to {schema['last_date']} "
+          f"to {os.path.join(folder_path, FEATURE_DIR)}")
@@ -1,12 +1,30 @@
-import requests #외부 api 호출
 import pandas as pd #데이터 구조, 가공
-import yfinance as yf #yahoo finance 데이터 수집
 from datetime import datetime #날짜 시간처리
 import os
+import sys
 from dotenv import load_dotenv
+from fred_cache import FredCache
+from fred_fetcher import fetch_all
+from fred_merge import build_total
+from yf_batch import download_close
+from total_store import write_total
+from universe import nasdaq_top_100
+from tracing import stage, track_script
 
 load_dotenv()
+track_script('fred')  # 단계별 시간/메모리/HTTP 기록 (report/trace.jsonl)
 api_key = os.getenv('FRED_API_KEY')
+# FRED 과거 데이터 수정(revision) 반영이 필요할 때 전체 재수집: --full-refresh 또는 FRED_FULL_REFRESH=1
+full_refresh = '--full-refresh' in sys.argv or os.getenv('FRED_FULL_REFRESH', '').lower() in ('1', 'true', 'yes')
+# FRED 동시 요청 설정 (동시 요청 수, 요청당 타임아웃(초), 재시도 횟수)
+fred_max_workers = int(os.getenv('FRED_MAX_WORKERS', '8'))
+fred_timeout = float(os.getenv('FRED_TIMEOUT', '30'))
+fred_max_retries = int(os.getenv('FRED_MAX_RETRIES', '4'))
+# yfinance 묶음 다운로드 설정 (묶음당 티커 수, 묶음 내 동시 요청 수)
+yf_chunk_size = int(os.getenv('YF_CHUNK_SIZE', '25'))
+yf_threads = int(os.getenv('YF_THREADS', '8'))
+# 사람이 확인하기 위한 total.csv 도 함께 저장할지 여부 (학습용 데이터는 report/total/ 번들)
+total_csv_export = os.getenv('TOTAL_CSV_EXPORT', '1').lower() in ('1', 'true', 'yes')
 
 # FRED에서 제공하는 지표 코드와 명칭
 fred_indicators = {
@@ -71,50 +89,14 @@ yfinance_indicators = {
     'VIX 지수': '^VIX'              # ^VIX (변동성 지수, 공포 지수): 시장의 변동성 기대치를 반영하며, 투자 심리를 측정하는 지표입니다.
 }
 
-# 나스닥 100 상위 종목 티커 리스트와 한글 이름
-nasdaq_top_100 = [
-    ("AAPL", "애플"), ("MSFT", "마이크로소프트"), ("AMZN", "아마존"), ("GOOGL", "구글 A"),
-    ("GOOG", "구글 C"), ("META", "메타"), ("TSLA", "테슬라"), ("NVDA", "엔비디아"), ("PYPL", "페이팔"),
-    ("ADBE", "어도비"), ("NFLX", "넷플릭스")
-
-    , ("CMCSA", "컴캐스트"), ("PEP", "펩시코"),
-    ("INTC", "인텔"), ("CSCO", "시스코"), ("AVGO", "브로드컴"), ("TXN", "텍사스 인스트루먼트"),
-    ("QCOM", "퀄컴"), ("COST", "코스트코"), ("AMGN", "암젠")
-
-    , ("CHTR", "차터 커뮤니케이션"),
-    ("SBUX", "스타벅스"), ("AMD", "AMD")
-    , ("MDLZ", "몬델리즈"), ("INTU", "인트윗"),
-    ("ISRG", "인튜이티브 서지컬"), ("BKNG", "부킹홀딩스"), ("ADP", "ADP"),
-    ("VRTX", "버텍스"), ("MU", "마이크론"), ("AMAT", "어플라이드 머티리얼즈"), ("REGN", "리제네론"),
-    ("LRCX", "램 리서치"), ("KDP", "케우리그 닥터페퍼"), 
-    ("FISV.VI", "피서브"),
-    ("CSX", "CSX"),
-    ("GILD", "길리어드 사이언스"), ("MELI", "메르카도 리브레"), ("SNPS", "시놉시스"),
-    ("EA", "일렉트로닉 아츠")
-    
-    , ("KLAC", "KLA"), ("ADSK", "오토데스크"), ("CTAS", "신타스"),
-    ("XEL", "엑셀 에너지"), ("PANW", "팔로알토 네트웍스"), ("ANSS", "앤시스"), ("TEAM", "아틀라시안"),
-    ("WDAY", "워크데이"), ("ILMN", "일루미나"), ("DOCU", "도큐사인"),
-    ("MRNA", "모더나"), ("IDXX", "아이덱스"), ("ZM", "줌 비디오"), ("DXCM", "덱스컴"),
-    ("ROST", "로스 스토어스"), ("CRWD", "크라우드스트라이크"), ("MAR", "메리어트"),
-    ("EXC", "엑셀론"), ("MNST", "몬스터 비버리지"), ("PCAR", "PACCAR"), ("LCID", "루시드 모터스"),
-    ("ALGN", "얼라인 테크놀로지"), ("BIIB", "바이오젠"),
-    ("MTCH", "매치 그룹"), ("OKTA", "옥타"), ("BKR", "베이커 휴즈"), ("ZS", "지스케일러"),
-    ("CDNS", "케이던스"), ("CPRT", "코파트"), ("FAST", "패스트널"), ("AEP", "아메리칸 일렉트릭"),
-    ("ORLY", "오라일리"), ("VRSK", "버리스크"), ("CTSH", "코그니전트"), ("PDD", "핀둬둬"),
-    ("CHKP", "체크포인트"), ("JD", "징둥"), ("NTES", "넷이즈"), ("KHC", "크래프트 하인즈"),
-    ("DLTR", "달러 트리"), ("EPAM", "EPAM 시스템즈"), ("SWKS", "스카이웍스"),
-    ("NXPI", "NXP 반도체"), ("TTD", "트레이드 데스크"),
-    ("PAYX", "페이첵스"), ("BIDU", "바이두"), ("WDC", "웨스턴 디지털"), ("TRMB", "트림블"),
-    ("FTNT", "포티넷"), ("VRSN", "베리사인"), ("ASML", "ASML 홀딩"), ("BMRN", "바이오마린"),
-    ("LULU", "룰루레몬"), ("EBAY", "이베이"), ("CEG", "컨스텔레이션 에너지"), ("RIVN", "리비안")
-]
+# 나스닥 100 상위 종목 티커 리스트와 한글 이름: universe.nasdaq_top_100
 
 #수집할 날짜
 start_date = '2006-01-01'
 end_date = datetime.today().strftime('%Y-%m-%d')
 
-fred_data_frames = []
+fred_cache = FredCache()
+fred_requests = []
 for code, name in fred_indicators.items():
     
     # 지표별 제공 주기에 따른 요청 주기 설정
@@ -129,56 +111,46 @@ for code, name in fred_indicators.items():
     else:
         frequency = 'd'
 
-
-    url = f'https://api.stlouisfed.org/fred/series/observations'
-
+    # 캐시된 마지막 관측일 이후만 요청 (캐시가 없거나 전체 재수집이면 start_date 부터)
     params = {
         'series_id': code,
-        'api_key': api_key,
-        'file_type': 'json',
-        'observation_start': start_date,
+        'observation_start': fred_cache.fetch_start(code, frequency, start_date, full_refresh),
         'observation_end': end_date,
         'frequency': frequency  
     }
-    response = requests.get(url, params=params)
+    fred_requests.append((code, name, params))
 
+# 지표 동시 요청 (연결 재사용, 요청 속도 제한, 429/5xx 재시도)
+with stage('fred.fetch') as trace:
+    fred_results = fetch_all(fred_requests, api_key, max_workers=fred_max_workers,
+                             timeout=fred_timeout, max_retries=fred_max_retries)
+    trace.output(rows=sum(len(r.observations) for r in fred_results), columns=len(fred_results))
 
-    if response.status_code == 200:
-        data = response.json().get('observations', [])
-        if data:
-            df = pd.DataFrame(data)[['date', 'value']]
-            df.columns = ['date', name]  
-            df['date'] = pd.to_datetime(df['date']).dt.tz_localize(None)  #타임존 제거
-            fred_data_frames.append(df.set_index('date'))
-        else:
-            print(f"No data found for indicator {name} ({code}).")
+fred_data_frames = []
+fred_missing = []  # total.csv 에서 빠지는 지표
+for (code, name, params), result in zip(fred_requests, fred_results):
+    if result.status == 'ok':
+        series = fred_cache.update(code, params['frequency'], start_date, pd.DataFrame(result.observations),
+                                   vintage=result.vintage or end_date, full_refresh=full_refresh)
     else:
-        print(f"Failed to fetch data for indicator {name} ({code}): {response.status_code}")
-
+        if result.status == 'failed':
+            print(f"Failed to fetch data for indicator {name} ({code}) after {result.attempts} attempts: {result.error}")
+        # 새 관측값이 없거나 요청 실패 시 캐시된 관측값 사용
+        series = fred_cache.load(code)
+        if result.status == 'failed' and series is not None and not series.empty:
+            print(f"Using cached data for indicator {name} ({code}) up to {series.index.max():%Y-%m-%d}.")
+
+    if series is not None and not series.empty:
+        fred_data_frames.append(series.rename(columns={'value': name}))
+    else:
+        print(f"No data found for indicator {name} ({code}).")
+        fred_missing.append(result)
 
-    #데이터 빈도에 따른 리샘플링 처리
+if fred_missing:
+    print(f"Missing {len(fred_missing)} FRED indicators: "
+          + ", ".join(f"{r.name} ({r.code}, {r.status}: {r.error})" for r in fred_missing))
 
-for i, df in enumerate(fred_data_frames):
-    if df.empty: #아얘 없을때
-        print(f"DataFrame {i} is empty, skipping resampling.")
-        continue
-    try:
-        inferred_freq = df.index.inferred_freq #데이터 빈도 확인
-        # 빈도에 따라 일간 데이터로 변환
-        if inferred_freq in ['M', 'MS']:  # 월간 데이터
-            fred_data_frames[i] = df.resample('D').ffill() #ffill 이전 날짜에서 채우기
-        elif inferred_freq in ['W', 'W-FRI']:  # 주간 데이터
-            fred_data_frames[i] = df.resample('D').ffill()
-        elif inferred_freq in ['Q', 'QS-OCT']:  # 분기 데이터
-            fred_data_frames[i] = df.resample('D').ffill()
-        elif inferred_freq in ['B']:  # 영업일 데이터
-            fred_data_frames[i] = df.resample('D').ffill()
-        # else:
-        #     print(f"Unknown frequency for DataFrame {i}: {inferred_freq}")
-        else:
-            fred_data_frames[i] = df.resample('D').ffill()
-    except Exception as e:
-        print(f"Error processing DataFrame {i}: {e}")
+# FRED 지표는 원래 주기(일간/주간/월간/분기) 그대로 두고, 결합할 때 거래일 기준으로 as-of 정렬 (일간 리샘플링 없음)
 '''
     print(fred_data_frames)
     #리샘플링 후 저장 (테스트)
@@ -192,20 +164,18 @@ for i, df in enumerate(fred_data_frames):
         
 '''
 
-# yfinance를 통한 데이터 수집
-yfinance_data_frames = []
-for name, ticker in yfinance_indicators.items():
-    df = yf.download(ticker, start=start_date, end=end_date, auto_adjust=True)
-    if not df.empty:
-        # df = df[['Close']].rename(columns={'Close': name})
-        # name만 사용하여 컬럼 이름 지정
-        df = df[['Close']]
-        df.columns = [name]  # rename 대신 직접 columns 할당
-        df.index = df.index.tz_localize(None)  
-        yfinance_data_frames.append(df)
-    else:
-        print(f"No data found for indicator {name} ({ticker}).")
+# yfinance를 통한 데이터 수집 (지수 + 나스닥 100 상위 종목을 묶음 단위로 한번에 다운로드)
+yf_tickers = {ticker: name for name, ticker in yfinance_indicators.items()}
+yf_tickers.update({ticker: name for ticker, name in nasdaq_top_100})
+with stage('yahoo.download') as trace:
+    yf_close, yf_failed = download_close(yf_tickers, start_date, end_date,
+                                         chunk_size=yf_chunk_size, threads=yf_threads)
+    trace.output(yf_close)
+if yf_failed:
+    print(f"Failed to download {len(yf_failed)} tickers (delisted or invalid): "
+          + ", ".join(f"{ticker} ({name})" for ticker, name in yf_failed.items()))
 
+yfinance_data_frames = [yf_close[[name for name in yfinance_indicators if name in yf_close.columns]]]
 
 
 '''
@@ -222,19 +192,8 @@ else:
 
 '''
 
-# 나스닥 100 상위 종목 데이터 수집
-nasdaq_data_frames = []
-for ticker, name in nasdaq_top_100:
-    try:
-        df = yf.download(ticker, start=start_date, end=end_date, auto_adjust=True)
-        if not df.empty:
-            #df = df[['Close']].rename(columns={'Close': f"{name}"})
-            df = df[['Close']] #시가(Open) 고가(High) 저가(Low) 종가(Close) 조정종가(Adj Close) 거래량(Volume) 값중 종가만
-            df.columns = [name]  # rename 대신 직접 columns 할당
-            df.index = df.index.tz_localize(None)
-            nasdaq_data_frames.append(df)
-    except Exception as e:
-        print(f"Error downloading data for {ticker} ({name}): {e}")
+# 나스닥 100 상위 종목 데이터 (종가)
+nasdaq_data_frames = [yf_close[[name for ticker, name in nasdaq_top_100 if name in yf_close.columns]]]
 
 
 '''
@@ -250,41 +209,28 @@ else:
     print("저장할 데이터가 없습니다.")
 '''
 
-# 모든 데이터를 날짜 기준으로 외부 결합하여 하나의 데이터프레임으로 결합
+# 야후 거래일마다 각 FRED 지표의 가장 최근 관측값을 결합하여 하나의 데이터프레임으로 결합
 all_data_frames = fred_data_frames + yfinance_data_frames + nasdaq_data_frames
 if all_data_frames:
-    # 결합
-    result_df = pd.concat(all_data_frames, axis=1, join='outer')  # 외부 결합으로 누락된 날짜 보완
-
-    # 결측치 및 비정상적인 값 처리
-    result_df.replace('.', pd.NA, inplace=True)  # '.'을 NaN으로 변환
-    # result_df = result_df.dropna(subset=['10년 기대 인플레이션율', '장단기 금리차', '금융스트레스지수', '5년 변동금리 모기지'], how='any')  # 해당 열에서 NaN 제거
-    result_df = result_df.dropna(subset=['10년 기대 인플레이션율', '장단기 금리차'], how='any')  # 해당 열에서 NaN 제거
-    
-    # 결측치를 이전 값으로 채움
-    result_df.sort_index(inplace=True)
-    result_df.ffill(inplace=True)
-
-    # 특정 열에서 결측치가 있는 행 제거
-    # result_df = result_df.dropna(subset=['S&P 500 지수'])
+    with stage('fred.merge') as trace:
+        result_df = build_total(fred_data_frames, yfinance_data_frames + nasdaq_data_frames)
+        trace.output(result_df)
 
-    # CSV 파일로 저장
+    # float32 npy 번들(report/total/)로 저장, 필요 시 CSV 도 함께 저장
     folder_name = "report"
     folder_path = os.path.join(os.getcwd(), folder_name)
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)
         print(f"'{folder_name}' 폴더 생성 완료")
         
-    try:
-        result_df.to_csv(folder_path + "/total.csv", index_label="날짜", encoding='utf-8-sig')
-        print(f"Data saved to {folder_path}")
-    except PermissionError:
-        # 현재 시간을 파일명에 추가하여 새로운 파일 생성
-        # from datetime import datetime
-        # timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        # folder_path = f'total_{timestamp}.csv'
-        result_df.to_csv(folder_path + "/total.csv", index_label="날짜", encoding='utf-8-sig')
-        print(f"Permission denied for original file. Data saved to {folder_path}")
+    with stage('total.write') as trace:
+        trace.output(result_df)
+        try:
+            write_total(result_df, folder_path, export_csv=total_csv_export)
+            print(f"Data saved to {folder_path}")
+        except PermissionError:
+            # total.csv 가 다른 프로그램(엑셀 등)에서 열려 있는 경우: 번들은 이미 저장됨
+            print(f"Permission denied for total.csv. Typed data saved to {folder_path}/total, CSV export skipped")
 else:
     print("No data collected for any indicators.")
 
@@ -0,0 +1,102 @@
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+# FRED 지표별 로컬 캐시 저장 위치
+CACHE_DIR = os.path.join(os.getcwd(), "report", "cache", "fred")
+MANIFEST_FILE = "manifest.json"
+
+
+class FredCache:
+    """
+    FRED 지표별 관측값 캐시
+    - 지표마다 관측값을 {코드}.csv 로 저장
+    - manifest.json 에 지표 코드, 요청 주기, 시작일, 마지막 관측일, vintage 기록
+    - 다음 실행에서는 마지막 관측일 이후(마지막 관측일 포함) 데이터만 요청하여 병합
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.manifest_path = os.path.join(self.cache_dir, MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"FRED 캐시 manifest 로드 실패, 전체 재수집합니다: {e}")
+            return {}
+
+    def _save_manifest(self):
+        # 저장 도중 중단되어도 기존 manifest가 깨지지 않도록 임시 파일 후 교체
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _series_path(self, code):
+        return os.path.join(self.cache_dir, f"{code}.csv")
+
+    def fetch_start(self, code, frequency, start_date, full_refresh=False):
+        """
+        이번 실행에서 FRED에 요청할 observation_start 반환
+        캐시가 없거나, 주기/시작일이 바뀌었거나, 강제 재수집이면 start_date 부터 전체 요청
+        그 외에는 마지막 관측일부터 요청 (마지막 관측값의 수정분도 함께 반영)
+        """
+        entry = self.manifest.get(code)
+        if (full_refresh or entry is None
+                or entry.get('frequency') != frequency
+                or entry.get('start_date') != start_date
+                or not os.path.exists(self._series_path(code))):
+            return start_date
+        return entry['last_observation']
+
+    def load(self, code):
+        """캐시된 관측값 로드 (date 인덱스, value 컬럼). 없으면 None"""
+        path = self._series_path(code)
+        if code not in self.manifest or not os.path.exists(path):
+            return None
+        df = pd.read_csv(path, parse_dates=['date'], index_col='date')
+        return df
+
+    def update(self, code, frequency, start_date, observations, vintage, full_refresh=False):
+        """
+        새로 받은 관측값(date, value)을 캐시에 병합하고 병합된 전체 관측값 반환
+        - 겹치는 날짜는 새로 받은 값으로 덮어씀
+        - full_refresh 이면 기존 캐시를 버리고 새 관측값으로 교체
+        """
+        new_df = observations[['date', 'value']].copy()
+        new_df['date'] = pd.to_datetime(new_df['date']).dt.tz_localize(None)
+        new_df['value'] = pd.to_numeric(new_df['value'], errors='coerce')  # FRED 결측값 '.' -> NaN
+        new_df = new_df.set_index('date')
+
+        incremental = self.fetch_start(code, frequency, start_date, full_refresh) != start_date
+        cached = self.load(code) if incremental else None
+        if cached is not None:
+            merged = pd.concat([cached, new_df])
+            merged = merged[~merged.index.duplicated(keep='last')]
+        else:
+            merged = new_df
+        merged = merged.sort_index()
+
+        if merged.empty:
+            return merged
+
+        merged.to_csv(self._series_path(code), index_label='date')
+        self.manifest[code] = {
+            'series_id': code,
+            'frequency': frequency,
+            'start_date': start_date,
+            'last_observation': merged.index.max().strftime('%Y-%m-%d'),
+            'vintage': vintage,
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self._save_manifest()
+        return merged
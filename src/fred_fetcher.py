@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import record_http
+
+FRED_URL = 'https://api.stlouisfed.org/fred/series/observations'
+FRED_RATE_LIMIT = 120  # FRED API 요청 제한: API 키당 분당 120회
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class FredFetchResult:
+    """지표 하나에 대한 요청 결과 (status: 'ok' / 'empty' / 'failed')"""
+    code: str
+    name: str
+    status: str
+    observations: list = field(default_factory=list)
+    vintage: str = None
+    http_status: int = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    error: str = None
+
+
+class RateLimiter:
+    """여러 스레드가 공유하는 요청 간격 제한 (분당 rate_per_minute 회)"""
+
+    def __init__(self, rate_per_minute):
+        self.interval = 60.0 / rate_per_minute
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+def create_session(pool_size):
+    """연결을 재사용하는 requests 세션 생성"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _retry_delay(response, attempt, backoff):
+    # 429 응답의 Retry-After 우선, 없으면 지수 백오프 + 지터
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * (2 ** attempt) + random.uniform(0, backoff)
+
+
+def fetch_series(session, limiter, code, name, params, timeout=30, max_retries=4, backoff=1.0):
+    """지표 하나의 관측값 요청 (429/5xx/연결 오류는 백오프 후 재시도)"""
+    result = FredFetchResult(code=code, name=name, status='failed')
+    started = time.monotonic()
+    for attempt in range(max_retries + 1):
+        result.attempts = attempt + 1
+        response = None
+        limiter.wait()
+        request_started = time.monotonic()
+        try:
+            response = session.get(FRED_URL, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            record_http('fred', time.monotonic() - request_started, ok=False)
+            result.error = f"{type(e).__name__}: {e}"
+        else:
+            elapsed = time.monotonic() - request_started
+            result.http_status = response.status_code
+            payload = None
+            if response.status_code == 200:
+                try:
+                    payload = response.json()
+                    if not isinstance(payload, dict):
+                        raise ValueError(type(payload).__name__)
+                except ValueError:
+                    # 200 이지만 JSON 객체가 아닌 응답 (점검 페이지, 잘린 응답 등) 은 실패로 보고 재시도
+                    payload = None
+                    result.error = "invalid JSON"
+            else:
+                result.error = f"HTTP {response.status_code}"
+            # 본문까지 읽을 수 있었는지로 성공 여부 기록
+            record_http('fred', elapsed, len(response.content), ok=payload is not None)
+            if payload is not None:
+                result.observations = payload.get('observations', [])
+                result.vintage = payload.get('realtime_end')
+                result.status = 'ok' if result.observations else 'empty'
+                result.error = None
+                break
+            if response.status_code != 200 and response.status_code not in RETRY_STATUS:
+                break  # 잘못된 지표 코드, API 키 오류 등은 재시도하지 않음
+        if attempt < max_retries:
+            time.sleep(_retry_delay(response, attempt, backoff))
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def fetch_all(series_requests, api_key, max_workers=8, timeout=30, max_retries=4,
+              backoff=1.0, rate_limit=FRED_RATE_LIMIT):
+    """
+    여러 지표를 동시에 요청
+    series_requests: (code, name, params) 목록, params 에는 api_key/file_type 제외한 요청 파라미터
+    반환: 요청 순서대로 정렬된 FredFetchResult 목록
+    """
+    limiter = RateLimiter(rate_limit)
+    with create_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(fetch_series, session, limiter, code, name,
+                            {**params, 'api_key': api_key, 'file_type': 'json'},
+                            timeout, max_retries, backoff)
+            for code, name, params in series_requests
+        ]
+        return [future.result() for future in futures]
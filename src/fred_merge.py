@@ -0,0 +1,37 @@
+import pandas as pd
+
+# 이 지표의 첫 관측일 이전 날짜는 total 데이터에서 제외
+REQUIRED_COLUMNS = ['10년 기대 인플레이션율', '장단기 금리차']
+
+
+def trading_calendar(close):
+    """종가가 하나라도 있는 날짜 (야후 거래일, 주말/휴장일 제외)"""
+    return close.dropna(how='all').index.sort_values()
+
+
+def asof_join(calendar, data_frames):
+    """
+    지표별 원래 주기(일간/주간/월간/분기)의 관측값을 calendar 각 날짜 기준 가장 최근 관측값으로 정렬
+    모든 지표를 관측일 합집합으로 한번 결합한 뒤 한번의 reindex 로 맞춤 (일간 리샘플링 없음)
+    data_frames: 날짜 인덱스, 숫자 컬럼 (FredCache 에서 읽은 값)
+    """
+    if not data_frames:
+        return pd.DataFrame(index=calendar)
+    native = pd.concat(data_frames, axis=1, join='outer').sort_index()
+    native = native.apply(pd.to_numeric, errors='coerce')  # 캐시 밖에서 들어온 '.' 등도 NaN 으로
+    # 관측값이 없는 날(FRED '.')은 직전 관측값 사용
+    return native.ffill().reindex(calendar, method='ffill')
+
+
+def build_total(fred_frames, close_frames, required_columns=REQUIRED_COLUMNS):
+    """
+    거래일 기준 total 데이터 생성: 야후 종가의 거래일에 FRED 지표를 as-of 결합
+    종가는 해당 거래일에 값이 없는 종목만 이전 값으로 채움, required_columns 관측 시작 전 날짜는 제외
+    """
+    close = pd.concat(close_frames, axis=1)
+    calendar = trading_calendar(close)
+    econ = asof_join(calendar, fred_frames)
+    result_df = pd.concat([econ, close.reindex(calendar).ffill()], axis=1)
+    result_df = result_df.dropna(subset=[c for c in required_columns if c in result_df.columns], how='any')
+    result_df.index.name = close.index.name
+    return result_df
@@ -0,0 +1,251 @@
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from tracing import timed_http
+
+# 종목별 기업 정보 캐시 위치 (report/cache/fundamentals/{티커}.json)
+CACHE_DIR = os.path.join(os.getcwd(), "report", "cache", "fundamentals")
+
+# 그룹별 유효 기간: info(현재가, 시가총액 등 시세성 값 포함)는 짧게, 연간 재무제표는 길게
+GROUP_TTLS = {
+    'info': timedelta(hours=float(os.getenv('FUNDAMENTALS_INFO_TTL_HOURS', '6'))),
+    'financials': timedelta(days=float(os.getenv('FUNDAMENTALS_STATEMENTS_TTL_DAYS', '30'))),
+    'balance_sheet': timedelta(days=float(os.getenv('FUNDAMENTALS_STATEMENTS_TTL_DAYS', '30'))),
+}
+
+info_columns_mapper = {
+    'market': 'market',
+    'sector': 'sector',
+    'industry': 'industry',
+    'recommendationKey': 'recommendationKey',
+    'sharesOutstanding': 'sharesOutstanding',
+    'averageVolume10days': 'averageVolume10days',
+    'averageVolume': 'averageVolume',
+    'heldPercentInstitutions': 'heldPercentInstitutions',
+    'shortRatio': 'shortRatio',
+    'sharesPercentSharesOut': 'sharesPercentSharesOut',
+    'shortPercentOfFloat': 'shortPercentOfFloat',
+    'marketCap': 'marketCap',
+    'currentPrice': 'currentPrice',
+    'fiftyDayAverage': 'fiftyDayAverage',
+    'twoHundredDayAverage': 'twoHundredDayAverage',
+    'fiftyTwoWeekHigh': 'fiftyTwoWeekHigh',
+    'fiftyTwoWeekLow': 'fiftyTwoWeekLow',
+    'SandP52WeekChange': 'SandP52WeekChange',
+    '52WeekChange': '52WeekChange',
+    'ytdReturn': 'ytdReturn',
+    'fiveYearAverageReturn': 'fiveYearAverageReturn',
+    'beta': 'beta',
+    'totalRevenue': 'totalRevenue',
+    'grossProfits': 'grossProfits',
+    'revenuePerShare': 'revenuePerShare',
+    'ebitda': 'ebitda',
+    'ebitdaMargins': 'ebitdaMargins',
+    'debtToEquity': 'debtToEquity',
+    'operatingCashflow': 'operatingCashflow',
+    'freeCashflow': 'freeCashflow',
+    'totalCashPerShare': 'totalCashPerShare',
+    'currentRatio': 'currentRatio',
+    'quickRatio': 'quickRatio',
+    'returnOnAssets': 'returnOnAssets',
+    'returnOnEquity': 'returnOnEquity',
+    'grossMargins': 'grossMargins',
+    'operatingMargins': 'operatingMargins',
+    'profitMargins': 'profitMargins',
+    'totalCash': 'totalCash',
+    'totalDebt': 'totalDebt',
+    'priceToBook': 'priceToBook',
+    'enterpriseValue': 'enterpriseValue',
+    'enterpriseToRevenue': 'enterpriseToRevenue',
+    'enterpriseToEbitda': 'enterpriseToEbitda',
+    'forwardEps': 'forwardEps',
+    'trailingEps': 'trailingEps',
+    'priceToSalesTrailing12Months': 'priceToSalesTrailing12Months',
+    'forwardPE': 'forwardPE',
+    'trailingPE': 'trailingPE',
+    'dividendYield': 'dividendYield',
+    'payoutRatio': 'payoutRatio',
+    'trailingAnnualDividendYield': 'trailingAnnualDividendYield',
+    'dividendRate': 'dividendRate',
+    'trailingAnnualDividendRate': 'trailingAnnualDividendRate',
+    'revenueGrowth': 'revenueGrowth',
+    'earningsGrowth': 'earningsGrowth',
+    'earningsQuarterlyGrowth': 'earningsQuarterlyGrowth',
+    'revenueQuarterlyGrowth': 'revenueQuarterlyGrowth',
+    'heldPercentInsiders': 'heldPercentInsiders',
+}
+
+financial_columns_mapper = {
+    'Research Development': 'ResearchDevelopment',
+    'Net Income': 'NetIncome',
+    'Gross Profit': 'GrossProfit',
+    'Operating Income': 'OperatingIncome',
+    'Total Revenue': 'TotalRevenue',
+    'Cost Of Revenue': 'CostOfRevenue',
+}
+
+balance_sheet_columns_mapper = {
+    'Total Liab': 'TotalLiab',
+    'Total Stockholder Equity': 'TotalStockholderEquity',
+    'Total Assets': 'TotalAssets',
+}
+
+
+@dataclass
+class FundamentalsFetchResult:
+    """종목 하나의 갱신 결과 (status: 'ok' / 'fresh' / 'failed')"""
+    symbol: str
+    status: str
+    groups: list = field(default_factory=list)  # 새로 요청한 그룹
+    elapsed: float = 0.0
+    error: str = None
+
+
+def _json_safe(value):
+    # NaN -> None, numpy 값 -> 파이썬 값
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _statement_lists(frame, columns_mapper, prefix):
+    # 재무제표 (항목, 연도) -> {prefix + 항목: [과거 -> 최근 값]}
+    statement = frame.T.to_dict('list') if frame is not None and not frame.empty else {}
+    return {prefix + english_name: [_json_safe(v) for v in reversed(statement.get(column, []))]
+            for column, english_name in columns_mapper.items()}
+
+
+def fetch_group(ticker, group):
+    """yfinance Ticker 에서 그룹 하나 요청 (info / financials / balance_sheet)"""
+    if group == 'info':
+        with timed_http('yahoo'):
+            raw_info = ticker.info
+        return {english_name: _json_safe(raw_info.get(column)) for column, english_name in info_columns_mapper.items()}
+    if group == 'financials':
+        with timed_http('yahoo'):
+            statement = ticker.financials
+        return _statement_lists(statement, financial_columns_mapper, "list_financial_")
+    if group == 'balance_sheet':
+        with timed_http('yahoo'):
+            statement = ticker.balance_sheet
+        return _statement_lists(statement, balance_sheet_columns_mapper, "list_balancesheet_")
+    raise ValueError(f"Unknown fundamentals group: {group}")
+
+
+class FundamentalsCache:
+    """
+    종목별 기업 정보를 그룹(info / financials / balance_sheet)마다 유효 기간을 두고 저장
+    유효 기간이 지난 그룹만 다시 요청, 갱신 중에도 이전 값(stale)을 바로 사용 가능
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttls=None):
+        self.cache_dir = cache_dir
+        self.ttls = {**GROUP_TTLS, **(ttls or {})}
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol):
+        return os.path.join(self.cache_dir, f"{symbol.replace('/', '_')}.json")
+
+    def _lock(self, symbol):
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def load(self, symbol):
+        """{그룹: {'fetched_at', 'data'}} (없으면 빈 dict)"""
+        try:
+            with open(self._path(symbol), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def stale_groups(self, symbol, entry=None, now=None):
+        """유효 기간이 지났거나 없는 그룹 목록"""
+        entry = self.load(symbol) if entry is None else entry
+        now = now or datetime.now()
+        stale = []
+        for group, ttl in self.ttls.items():
+            fetched_at = entry.get(group, {}).get('fetched_at')
+            if fetched_at is None or now - datetime.strptime(fetched_at, '%Y-%m-%d %H:%M:%S') >= ttl:
+                stale.append(group)
+        return stale
+
+    def get(self, symbol):
+        """캐시된 값을 기존 {티커}_info.json 형식으로 합쳐 반환 (없으면 None, 오래된 값도 그대로 반환)"""
+        entry = self.load(symbol)
+        if not entry:
+            return None
+        info_dict = {}
+        for group in ('info', 'financials', 'balance_sheet'):
+            info_dict.update(entry.get(group, {}).get('data', {}))
+        return info_dict
+
+    def refresh(self, symbol, force=False):
+        """유효 기간이 지난 그룹만 요청하여 저장 (같은 종목을 동시에 갱신하지 않음)"""
+        import yfinance as yf
+
+        result = FundamentalsFetchResult(symbol=symbol, status='failed')
+        started = time.monotonic()
+        with self._lock(symbol):
+            entry = self.load(symbol)
+            groups = list(self.ttls) if force else self.stale_groups(symbol, entry)
+            if not groups:
+                result.status = 'fresh'
+                return result
+            ticker = yf.Ticker(symbol)
+            errors = []
+            for group in groups:
+                try:
+                    entry[group] = {'fetched_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                    'data': fetch_group(ticker, group)}
+                    result.groups.append(group)
+                except Exception as e:  # 실패한 그룹은 이전 값 유지
+                    errors.append(f"{group}: {type(e).__name__}: {e}")
+            if result.groups:
+                tmp_path = self._path(symbol) + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False, indent=4)
+                os.replace(tmp_path, self._path(symbol))
+            result.status = 'ok' if not errors else 'failed'
+            result.error = '; '.join(errors) or None
+        result.elapsed = time.monotonic() - started
+        return result
+
+
+def refresh_all(cache, symbols, max_workers=8, force=False):
+    """여러 종목을 스레드 풀에서 갱신 (유효한 그룹은 요청하지 않음), 반환: 종목 순서대로 정렬된 결과 목록"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda symbol: cache.refresh(symbol, force), symbols))
+
+
+def get_all(cache, symbols, max_workers=8):
+    """
+    stale-while-refresh: 캐시가 있는 종목은 오래된 값이라도 바로 반환하고 백그라운드에서 갱신,
+    캐시가 없는 종목만 기다려서 요청
+    반환: ({티커: info_dict}, 백그라운드 갱신 future 목록)
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    data, background, missing = {}, [], []
+    for symbol in symbols:
+        cached = cache.get(symbol)
+        if cached is None:
+            missing.append((symbol, executor.submit(cache.refresh, symbol)))
+            continue
+        data[symbol] = cached
+        if cache.stale_groups(symbol):
+            background.append(executor.submit(cache.refresh, symbol))
+    for symbol, future in missing:
+        future.result()
+        data[symbol] = cache.get(symbol)
+    executor.shutdown(wait=False)  # 남은 갱신은 계속 진행 (프로세스 종료 전까지 완료됨)
+    return data, background
@@ -0,0 +1,353 @@
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from cpu_training import TRAIN_INTER_OP_THREADS, configure_threads, holdout_split
+from feature_columns import economic_features
+from tracing import track_script
+from train_universe import TRAIN_THREADS_PER_WORKER, TRAIN_WORKERS, load_training_data
+
+FOLDER_PATH = os.path.join(os.getcwd(), "report")
+TRIAL_LOG = os.path.join(FOLDER_PATH, "search", "trials.jsonl")  # 시도 하나당 한 줄 (다시 실행하면 이어서 진행)
+CACHE_DIR = os.path.join(FOLDER_PATH, "cache", "search")  # 공유 학습 데이터, 단계별 모델
+
+# 탐색 설정 (방법, 시도 수, epoch 예산, 동시에 실행할 프로세스 수, 탐색할 종목)
+SEARCH_METHOD = os.getenv('SEARCH_METHOD', 'halving')  # 'grid' / 'random' / 'halving' (successive halving)
+SEARCH_TRIALS = int(os.getenv('SEARCH_TRIALS', '27'))  # random / halving 에서 뽑을 설정 수
+SEARCH_MAX_EPOCHS = int(os.getenv('SEARCH_MAX_EPOCHS', '50'))
+SEARCH_MIN_EPOCHS = int(os.getenv('SEARCH_MIN_EPOCHS', '3'))  # halving 첫 단계 epoch 수, grid / random 은 가지치기 시작 epoch
+SEARCH_ETA = int(os.getenv('SEARCH_ETA', '3'))  # halving 단계마다 상위 1/eta 만 다음 단계로
+SEARCH_WORKERS = int(os.getenv('SEARCH_WORKERS', str(TRAIN_WORKERS)))
+SEARCH_THREADS_PER_WORKER = int(os.getenv('SEARCH_THREADS_PER_WORKER', str(TRAIN_THREADS_PER_WORKER)))
+SEARCH_TARGET = os.getenv('SEARCH_TARGET', '구글 A')
+SEARCH_VALIDATION_FRACTION = float(os.getenv('SEARCH_VALIDATION_FRACTION', '0.1'))
+SEARCH_SEED = int(os.getenv('SEARCH_SEED', '0'))
+# 탐색 범위 (JSON, 예: {"lookback": [60, 90], "learning_rate": [0.0001, 0.001]}), 없는 항목은 기본 범위 사용
+SEARCH_SPACE = os.getenv('SEARCH_SPACE', '')
+
+# 기본 탐색 범위 (main.ipynb 학습 셀 값 포함)
+DEFAULT_SPACE = {
+    'lookback': [60, 90, 120],
+    'num_heads': [4, 8],
+    'ff_dim': [128, 256],
+    'learning_rate': [0.0001, 0.0003, 0.001],
+    'batch_size': [32, 128],
+}
+FORECAST_HORIZON = 7
+
+_values = None  # 워커 프로세스마다 메모리 맵으로 연 공유 학습 데이터 (읽기 전용)
+
+
+def search_space(spec=SEARCH_SPACE):
+    """기본 탐색 범위에 SEARCH_SPACE(JSON) 값을 덮어쓴 범위"""
+    space = dict(DEFAULT_SPACE)
+    if spec:
+        space.update(json.loads(spec))
+    return space
+
+
+def trial_id(params):
+    """설정으로 만든 시도 id (같은 설정은 다시 실행해도 같은 id)"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def grid_configs(space):
+    """탐색 범위의 모든 조합"""
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_configs(space, n, seed=SEARCH_SEED):
+    """탐색 범위에서 겹치지 않게 n 개 조합을 뽑음 (seed 가 같으면 같은 조합)"""
+    configs = grid_configs(space)
+    return random.Random(seed).sample(configs, min(n, len(configs)))
+
+
+def halving_budgets(min_epochs=SEARCH_MIN_EPOCHS, max_epochs=SEARCH_MAX_EPOCHS, eta=SEARCH_ETA):
+    """successive halving 단계별 epoch 수 (min_epochs 부터 eta 배씩, 마지막은 max_epochs)"""
+    budgets = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        budgets.append(epochs)
+        epochs *= eta
+    return budgets + [max_epochs]
+
+
+def prepare_dataset(folder_path, target, validation_fraction=SEARCH_VALIDATION_FRACTION,
+                    max_lookback=max(DEFAULT_SPACE['lookback']), cache_dir=CACHE_DIR):
+    """
+    모든 시도가 함께 쓰는 학습 데이터 (종목 + 경제 지표 스케일링 값, float32 npy) 를 한번만 만듦
+    - 검증 구간(마지막 validation_fraction 윈도우)은 모든 lookback 에서 같은 날짜, 스케일러는 검증 구간 이전 값으로만 학습
+    - 데이터가 같으면 이전 실행에서 만든 파일을 그대로 사용
+    반환: {'key', 'path', 'split', 'n_rows', 'n_econ', ...} (워커에 넘길 정보)
+    """
+    data = load_training_data(folder_path)
+    if target not in data.columns:
+        raise ValueError(f"{target} not found in total data")
+    econ_columns = [c for c in economic_features if c in data.columns]
+    values = data[[target] + econ_columns].to_numpy(dtype=np.float64)
+    split = holdout_split(len(values), max_lookback, FORECAST_HORIZON, validation_fraction)
+    if split is None:
+        raise ValueError(f"Not enough rows ({len(values)}) for a validation split")
+
+    digest = hashlib.sha1(json.dumps([target, econ_columns, str(data.index[0]), str(data.index[-1]), len(values),
+                                      split, FORECAST_HORIZON]).encode('utf-8'))
+    digest.update(values.tobytes())
+    key = digest.hexdigest()[:16]
+    path = os.path.join(cache_dir, f"{key}.npy")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        scaled = MinMaxScaler().fit(values[:split]).transform(values).astype(np.float32)
+        tmp_path = os.path.join(cache_dir, f"{key}.tmp.npy")
+        np.save(tmp_path, scaled)
+        os.replace(tmp_path, path)
+    return {'key': key, 'path': path, 'target': target, 'split': int(split), 'n_rows': len(values),
+            'n_econ': len(econ_columns), 'first_date': str(data.index[0].date()),
+            'last_date': str(data.index[-1].date())}
+
+
+def _worker_init(threads, inter_op_threads, values_path):
+    """워커 프로세스 초기화: TensorFlow 스레드 수 제한, 공유 학습 데이터 메모리 맵 열기"""
+    global _values
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    configure_threads(threads, inter_op_threads)
+    _values = np.load(values_path, mmap_mode='r')
+
+
+def _run_trial(params, dataset, epochs, initial_epoch=0, resume_path=None, save_path=None, reference=None,
+               prune_after=None):
+    """
+    시도 하나 학습 (실패해도 예외 대신 결과로 반환)
+    initial_epoch > 0 이고 resume_path 에 이전 단계 모델이 있으면 이어서 학습, 끝나면 save_path 에 저장 (halving)
+    reference: epoch 별 완료된 시도들의 검증 loss 중앙값 목록, prune_after epoch 이후 이보다 나쁘면 중단 (grid / random)
+    """
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import Callback
+    from tensorflow.keras.models import load_model
+    from tf_pipeline import window_dataset
+    from transformer_model import compile_model
+
+    started = time.time()
+    try:
+        tf.keras.utils.set_random_seed(SEARCH_SEED)
+        lookback, batch_size = params['lookback'], params['batch_size']
+        split, n_rows = dataset['split'], dataset['n_rows']
+        values = np.asarray(_values)
+        n_train = split - lookback
+        train = window_dataset(values[:split + FORECAST_HORIZON], lookback, FORECAST_HORIZON, 1,
+                               batch_size=batch_size, seed=SEARCH_SEED, drop_remainder=n_train >= batch_size)
+        n_validation = n_rows - FORECAST_HORIZON - split
+        validation = window_dataset(values, lookback, FORECAST_HORIZON, 1, batch_size=min(n_validation, 1024),
+                                    shuffle=False, start=split)
+
+        if initial_epoch and resume_path and os.path.exists(resume_path):
+            model = load_model(resume_path)
+        else:
+            model = compile_model(lookback, 1, dataset['n_econ'], params['num_heads'], params['ff_dim'],
+                                  params['learning_rate'])
+            initial_epoch = 0
+        status = {'pruned': False, 'best': math.inf}
+
+        class MedianPruner(Callback):
+            def on_epoch_end(self, epoch, logs=None):
+                status['best'] = min(status['best'], logs['val_loss'])
+                if reference and prune_after and epoch + 1 >= prune_after and epoch < len(reference):
+                    if status['best'] > reference[epoch]:
+                        status['pruned'] = True
+                        self.model.stop_training = True
+
+        history = model.fit(train, validation_data=validation, initial_epoch=initial_epoch, epochs=epochs,
+                            verbose=0, callbacks=[MedianPruner()])
+        if save_path:
+            model.save(save_path)
+        curve = [float(v) for v in history.history['val_loss']]
+        return {'status': 'pruned' if status['pruned'] else 'complete', 'curve': curve,
+                'initial_epoch': initial_epoch, 'epochs': initial_epoch + len(curve), 'seconds': round(time.time() - started, 1)}
+    except Exception as e:
+        return {'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc(),
+                'epochs': initial_epoch, 'seconds': round(time.time() - started, 1)}
+
+
+def load_trials(log_path=TRIAL_LOG, dataset_key=None):
+    """시도 기록 (dataset_key 가 있으면 같은 학습 데이터로 실행한 기록만)"""
+    if not os.path.exists(log_path):
+        return []
+    with open(log_path, 'r', encoding='utf-8') as f:
+        trials = [json.loads(line) for line in f if line.strip()]
+    return [t for t in trials if dataset_key is None or t['dataset'] == dataset_key]
+
+
+def append_trial(record, log_path=TRIAL_LOG):
+    if not os.path.exists(os.path.dirname(log_path)):
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def best_curve(trial):
+    """epoch 별 지금까지의 최소 검증 loss (이전 단계 기록 포함)"""
+    return list(np.minimum.accumulate(trial['curve'])) if trial.get('curve') else []
+
+
+def median_reference(trials):
+    """완료된 시도들의 epoch 별 최소 검증 loss 중앙값 (가지치기 기준)"""
+    curves = [best_curve(t) for t in trials if t['status'] == 'complete']
+    length = max((len(c) for c in curves), default=0)
+    return [float(np.median([c[e] for c in curves if len(c) > e])) for e in range(length)]
+
+
+def score(trial):
+    """시도의 목표값: 검증 loss 최소값 (실패하면 inf)"""
+    return min(trial['curve']) if trial.get('curve') else math.inf
+
+
+class TrialRunner:
+    """
+    워커 프로세스 풀에서 시도를 실행하고 결과를 시도 기록에 추가 (이미 기록된 시도는 다시 실행하지 않음)
+    모든 워커는 prepare_dataset 의 npy 파일을 메모리 맵으로 공유
+    """
+
+    def __init__(self, dataset, method, workers=SEARCH_WORKERS, threads_per_worker=SEARCH_THREADS_PER_WORKER,
+                 log_path=TRIAL_LOG, cache_dir=CACHE_DIR):
+        self.dataset = dataset
+        self.method = method
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.log_path = log_path
+        self.model_dir = os.path.join(cache_dir, dataset['key'], "models")
+        self.trials = load_trials(log_path, dataset['key'])
+
+    def model_path(self, tid, epochs):
+        """epochs 까지 학습한 시도 모델 (halving 다음 단계에서 이어서 학습)"""
+        return os.path.join(self.model_dir, f"{tid}-{epochs}.keras")
+
+    def recorded(self, tid, epochs):
+        """같은 설정/epoch 예산으로 이미 끝난 시도 기록 (없으면 None)"""
+        for trial in self.trials:
+            if trial['trial_id'] == tid and trial['budget'] == epochs and trial['status'] != 'failed':
+                return trial
+        return None
+
+    def run(self, jobs, prune_after=None):
+        """
+        jobs: (설정, epoch 예산, 이어서 학습할 이전 기록 또는 None) 목록, 반환: 같은 순서의 시도 기록
+        prune_after 가 있으면 완료된 시도들의 중앙값으로 가지치기 (제출할 때마다 기준을 새로 계산)
+        """
+        results = {}
+        pending = []
+        for k, (params, epochs, previous) in enumerate(jobs):
+            recorded = self.recorded(trial_id(params), epochs)
+            if recorded is not None:
+                results[k] = recorded
+            else:
+                pending.append(k)
+        if not pending:
+            return [results[k] for k in range(len(jobs))]
+        print(f"Running {len(pending)} trials on {self.workers} workers "
+              f"({len(jobs) - len(pending)} already in {self.log_path})")
+        os.makedirs(self.model_dir, exist_ok=True)
+        context = multiprocessing.get_context('spawn')  # TensorFlow 는 fork 된 프로세스에서 안전하지 않음
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_worker_init,
+                                 initargs=(self.threads_per_worker, TRAIN_INTER_OP_THREADS,
+                                           self.dataset['path'])) as executor:
+            running = {}
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    k = pending.pop(0)
+                    params, epochs, previous = jobs[k]
+                    tid = trial_id(params)
+                    initial_epoch = previous['epochs'] if previous and previous['status'] == 'complete' else 0
+                    reference = median_reference(self.trials) if prune_after else None
+                    future = executor.submit(_run_trial, params, self.dataset, epochs, initial_epoch,
+                                             self.model_path(tid, initial_epoch), self.model_path(tid, epochs),
+                                             reference, prune_after)
+                    running[future] = (k, tid, initial_epoch)
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    k, tid, initial_epoch = running.pop(future)
+                    params, epochs, previous = jobs[k]
+                    try:
+                        result = future.result()
+                    except Exception as e:  # 워커 프로세스가 비정상 종료된 경우 등
+                        result = {'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'epochs': initial_epoch}
+                    # 이전 단계 모델을 찾지 못해 처음부터 학습했으면 이전 기록을 잇지 않음
+                    resumed = result.pop('initial_epoch', 0)
+                    curve = (previous['curve'][:resumed] if resumed else []) + result.pop('curve', [])
+                    record = {'trial_id': tid, 'dataset': self.dataset['key'], 'method': self.method,
+                              'params': params, 'budget': epochs, 'curve': curve, **result}
+                    record['val_loss'] = score(record) if curve else None
+                    self.trials.append(record)
+                    append_trial(record, self.log_path)
+                    results[k] = record
+                    detail = f"val_loss {record['val_loss']:.6f}" if curve else record.get('error', '')
+                    print(f"[{tid}] {record['status']} after {record['epochs']}/{epochs} epochs, {detail} "
+                          f"({record.get('seconds', 0):.0f}s) {params}")
+        return [results[k] for k in range(len(jobs))]
+
+
+def run_search(method=SEARCH_METHOD, folder_path=FOLDER_PATH, target=SEARCH_TARGET, space=None,
+               trials=SEARCH_TRIALS, max_epochs=SEARCH_MAX_EPOCHS, min_epochs=SEARCH_MIN_EPOCHS, eta=SEARCH_ETA,
+               workers=SEARCH_WORKERS, log_path=TRIAL_LOG):
+    """
+    하이퍼파라미터 탐색
+    - grid: 모든 조합, random: trials 개 조합 (둘 다 min_epochs 이후 중앙값보다 나쁜 시도는 중단)
+    - halving: trials 개 조합을 min_epochs 부터 학습하고 단계마다 상위 1/eta 만 eta 배 epoch 까지 이어서 학습
+    반환: 설정별 가장 마지막 기록을 epoch 예산이 큰 순, 같으면 검증 loss 순으로 정렬한 목록
+    """
+    space = space or search_space()
+    dataset = prepare_dataset(folder_path, target, max_lookback=max(space['lookback']))
+    print(f"Search dataset {dataset['key']}: {target}, {dataset['n_rows']} rows "
+          f"({dataset['first_date']} ~ {dataset['last_date']}), validation from row {dataset['split']}")
+    runner = TrialRunner(dataset, method, workers=workers, log_path=log_path)
+
+    if method == 'halving':
+        survivors = [(params, None) for params in random_configs(space, trials)]
+        for rung, budget in enumerate(halving_budgets(min_epochs, max_epochs, eta)):
+            print(f"Rung {rung}: {len(survivors)} configs x {budget} epochs")
+            records = runner.run([(params, budget, previous) for params, previous in survivors])
+            ranked = sorted(zip(survivors, records), key=lambda pair: score(pair[1]))
+            keep = max(1, math.ceil(len(ranked) / eta))
+            survivors = [(params, record) for (params, _), record in ranked[:keep]]
+    elif method in ('grid', 'random'):
+        configs = grid_configs(space) if method == 'grid' else random_configs(space, trials)
+        runner.run([(params, max_epochs, None) for params in configs], prune_after=min_epochs)
+    else:
+        raise ValueError(f"Unknown SEARCH_METHOD: {method} (available: grid, random, halving)")
+
+    latest = {}
+    for trial in runner.trials:
+        latest[trial['trial_id']] = trial
+    return sorted(latest.values(), key=lambda t: (-t['budget'], score(t)))
+
+
+def format_leaderboard(trials, top=10):
+    """검증 loss 상위 시도 표"""
+    keys = sorted(DEFAULT_SPACE)
+    lines = [f"{'trial':<14}{'status':<10}{'epochs':>7}{'val_loss':>12}  " + '  '.join(keys)]
+    for trial in trials[:top]:
+        val_loss = f"{trial['val_loss']:.6f}" if trial.get('val_loss') is not None else '-'
+        lines.append(f"{trial['trial_id']:<14}{trial['status']:<10}{trial['epochs']:>7}{val_loss:>12}  "
+                     + '  '.join(str(trial['params'].get(k)) for k in keys))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    trace = track_script('search')  # 시간/메모리/워커 CPU 기록
+    method = next((a for a in sys.argv[1:] if not a.startswith('--')), SEARCH_METHOD)
+    ranked = run_search(method)
+    trace.output(rows=len(ranked))
+    print(f"\n=============== Search Results ({method}) ===============")
+    print(format_leaderboard(ranked))
+    if ranked and ranked[0].get('val_loss') is not None:
+        print(f"\nBest: {json.dumps(ranked[0]['params'])} (val_loss {ranked[0]['val_loss']:.6f})")
@@ -0,0 +1,156 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from tracing import track_script
+
+PREDICTION_FILE = "predicted_stock.csv"
+
+# 추론 설정 (예측할 종목, 다시 계산할 날짜 범위)
+INFER_TARGETS = os.getenv('INFER_TARGETS', '')  # 쉼표로 구분한 한글 종목명, 비어 있으면 예측 기록에 있는 종목 전체
+INFER_RECOMPUTE_FROM = os.getenv('INFER_RECOMPUTE_FROM', '')  # YYYY-MM-DD, 이 기간은 기존 예측을 다시 계산
+INFER_RECOMPUTE_TO = os.getenv('INFER_RECOMPUTE_TO', '')
+
+
+def load_prediction_history(folder_path):
+    """기존 예측 기록(predicted_stock.csv) 로드 (없으면 None)"""
+    path = os.path.join(folder_path, PREDICTION_FILE)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, parse_dates=['날짜'])
+
+
+def prediction_start(history, column, dates):
+    """
+    column 의 마지막 예측 날짜 다음 날짜의 행 번호 (이 행부터 새로 예측)
+    예측 기록이 없으면 None (전체 기간 예측)
+    """
+    predicted_col = f'{column}_Predicted'
+    if history is None or predicted_col not in history.columns:
+        return None
+    predicted_dates = history.loc[history[predicted_col].notna(), '날짜']
+    if predicted_dates.empty:
+        return None
+    return int(np.searchsorted(dates, np.datetime64(predicted_dates.max()), side='right'))
+
+
+def date_range_rows(dates, start_date, end_date):
+    """start_date <= 날짜 <= end_date 인 행 범위 (start, end) 반환"""
+    start = 0 if not start_date else int(np.searchsorted(dates, np.datetime64(start_date), side='left'))
+    end = len(dates) if not end_date else int(np.searchsorted(dates, np.datetime64(end_date), side='right'))
+    return start, end
+
+
+def prediction_frame(column, dates, actual_values, start, predicted):
+    """기준 행 start 부터의 예측값으로 예측 기록 형식(날짜, {종목}_Predicted, {종목}_Actual)의 DataFrame 생성"""
+    rows = slice(start, start + len(predicted))
+    return pd.DataFrame({
+        '날짜': pd.DatetimeIndex(dates[rows]),
+        f'{column}_Predicted': np.asarray(predicted).reshape(-1),
+        f'{column}_Actual': np.asarray(actual_values)[rows],
+    })
+
+
+def merge_predictions(history, updates, replace_columns=()):
+    """
+    새 예측값을 기존 예측 기록에 병합 (같은 날짜/컬럼은 새 값으로 덮어씀, 나머지 기록은 유지)
+    replace_columns: 기존 기록을 버리고 새 예측으로 교체할 종목 (전체 재학습 후 전체 기간을 다시 예측한 종목,
+                     total 데이터의 날짜가 바뀐 경우 이전 날짜의 기록이 남지 않도록)
+    반환: 날짜순으로 정렬되고 날짜가 'YYYY-MM-DD' 문자열인 DataFrame
+    """
+    merged = history.set_index('날짜') if history is not None else pd.DataFrame()
+    columns = list(merged.columns)
+    stale = [c for col in replace_columns for c in (f'{col}_Predicted', f'{col}_Actual') if c in columns]
+    if stale:
+        merged[stale] = np.nan
+    for update in updates:
+        if update.empty:
+            continue
+        update = update.set_index('날짜')
+        columns += [c for c in update.columns if c not in columns]
+        merged = update.combine_first(merged)
+    merged = merged[columns].dropna(how='all').sort_index()
+    merged.index = pd.DatetimeIndex(merged.index).strftime('%Y-%m-%d')
+    merged.index.name = '날짜'
+    return merged.reset_index()
+
+
+def save_predictions(folder_path, predictions):
+    output_file_path = os.path.join(folder_path, PREDICTION_FILE)
+    predictions.to_csv(output_file_path, index=False)
+    return output_file_path
+
+
+def run_inference(folder_path, target_columns=None, recompute=None):
+    """
+    저장된 체크포인트로 예측 기록 이후의 날짜만 예측하여 predicted_stock.csv 에 추가
+    recompute: (시작일, 종료일) 이 기간은 기존 예측이 있어도 다시 계산
+    """
+    from model_cache import load_checkpoint, model_fingerprint
+    from prediction_store import append_run, model_version
+    from train_universe import load_training_data
+    from transformer_model import (economic_features, predict_range, LOOKBACK, FORECAST_HORIZON,
+                                   NUM_HEADS, FF_DIM)
+
+    started = time.time()
+    data = load_training_data(folder_path)
+    dates = data.index.to_numpy()
+    econ_columns = [c for c in economic_features if c in data.columns]
+    econ_values = data[econ_columns].to_numpy(dtype=np.float64)
+    fingerprint = model_fingerprint(econ_columns, LOOKBACK, FORECAST_HORIZON, NUM_HEADS, FF_DIM)
+    history = load_prediction_history(folder_path)
+
+    if target_columns is None:
+        if history is not None:
+            target_columns = [c[:-len('_Predicted')] for c in history.columns if c.endswith('_Predicted')]
+        else:
+            target_columns = [c for c in data.columns if c not in economic_features]
+
+    updates = []
+    runs_meta = {}
+    for col in target_columns:
+        if col not in data.columns:
+            print(f"Skipping {col}: not found in total data")
+            continue
+        checkpoint = load_checkpoint(col, fingerprint, os.path.join(folder_path, "models"))
+        if checkpoint is None:
+            print(f"Skipping {col}: no trained checkpoint (run train_universe.py first)")
+            continue
+        stock_scaler = checkpoint['stock_scaler']
+        stock_values = data[[col]].to_numpy(dtype=np.float64)
+        window_values = np.hstack([stock_scaler.transform(stock_values),
+                                   checkpoint['econ_scaler'].transform(econ_values)]).astype(np.float32)
+
+        # 새로 추가된 날짜 + 다시 계산할 날짜 범위
+        ranges = [(prediction_start(history, col, dates), None)]
+        if recompute is not None:
+            ranges.append(date_range_rows(dates, *recompute))
+        for start, end in ranges:
+            predicted = predict_range(checkpoint['model'], window_values, LOOKBACK, 1, start, end)
+            if len(predicted) == 0:
+                continue
+            first = LOOKBACK if start is None else max(LOOKBACK, start)
+            updates.append(prediction_frame(col, dates, stock_values[:, 0], first,
+                                            stock_scaler.inverse_transform(predicted)))
+            runs_meta[col] = {'mode': 'inference', 'model': model_version(checkpoint['meta'])}
+
+    new_rows = sum(len(u) for u in updates)
+    if not new_rows:
+        print(f"Predictions are up to date ({time.time() - started:.2f}s)")
+        return history
+    predictions = merge_predictions(history, updates)
+    output_file_path = save_predictions(folder_path, predictions)
+    run_id = append_run(folder_path, updates, 'inference', runs_meta, history=history)
+    print(f"Predicted {new_rows} new rows for {len(updates)} ranges in {time.time() - started:.2f}s, "
+          f"saved to {output_file_path} (run {run_id})")
+    return predictions
+
+
+if __name__ == '__main__':
+    folder_path = os.path.join(os.getcwd(), "report")
+    targets = [t.strip() for t in INFER_TARGETS.split(',') if t.strip()] or None
+    recompute = (INFER_RECOMPUTE_FROM, INFER_RECOMPUTE_TO) if INFER_RECOMPUTE_FROM or INFER_RECOMPUTE_TO else None
+    trace = track_script('inference')  # 시간/메모리 기록 (report/trace.jsonl)
+    trace.output(run_inference(folder_path, targets, recompute))
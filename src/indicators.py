@@ -0,0 +1,278 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def _env_periods(name, default):
+    return tuple(int(p) for p in os.getenv(name, default).split(',') if p.strip())
+
+
+# 기술 지표 설정 (쉼표로 구분한 기간)
+SMA_WINDOWS = _env_periods('INDICATOR_SMA', '5,20,50,200')
+EMA_WINDOWS = _env_periods('INDICATOR_EMA', '5,20,50,200')
+RSI_PERIOD = int(os.getenv('INDICATOR_RSI', '14'))
+MACD_PERIODS = _env_periods('INDICATOR_MACD', '12,26,9')  # 단기 EMA, 장기 EMA, 시그널
+VOLATILITY_WINDOW = int(os.getenv('INDICATOR_VOLATILITY', '20'))
+TRADING_DAYS = 252  # 변동성 연율화 기준
+
+STATE_DIR = os.path.join("cache", "indicators")  # report/ 아래 상태 저장 위치
+STATE_FILE = "state.npz"
+META_FILE = "meta.json"
+SNAPSHOT_FILE = "technical_indicators.json"
+
+
+def _nan_to_zero(values):
+    return np.where(np.isnan(values), 0.0, values)
+
+
+def _ema_step(ema, value, alpha):
+    # 값이 없으면 이전 EMA 유지, 첫 값이면 그 값으로 시작 (pandas ewm(adjust=False, ignore_na=True) 와 동일)
+    updated = np.where(np.isnan(ema), value, ema + alpha * (value - ema))
+    return np.where(np.isnan(value), ema, updated)
+
+
+def _ewm(frame, **kwargs):
+    return frame.ewm(adjust=False, ignore_na=True, **kwargs).mean().to_numpy()
+
+
+class IndicatorEngine:
+    """
+    여러 종목의 기술 지표(SMA, EMA, RSI, MACD, 변동성)를 (종목,) 배열로 한번에 계산
+    fit 으로 전체 기간을 벡터 연산한 뒤, update 로 새 봉 하나를 지표마다 O(1) 로 반영
+    (SMA/변동성은 링 버퍼와 누적합, EMA/RSI/MACD 는 직전 값만 유지)
+    """
+
+    def __init__(self, symbols, sma_windows=SMA_WINDOWS, ema_windows=EMA_WINDOWS, rsi_period=RSI_PERIOD,
+                 macd_periods=MACD_PERIODS, volatility_window=VOLATILITY_WINDOW):
+        self.symbols = list(symbols)
+        self.sma_windows = tuple(sma_windows)
+        self.ema_windows = tuple(ema_windows)
+        self.rsi_period = rsi_period
+        self.macd_periods = tuple(macd_periods)
+        self.volatility_window = volatility_window
+        self.buffer_size = max(self.sma_windows + (1,))
+        self.last_date = None
+        self.state = None
+
+    def config(self):
+        return {'sma_windows': list(self.sma_windows), 'ema_windows': list(self.ema_windows),
+                'rsi_period': self.rsi_period, 'macd_periods': list(self.macd_periods),
+                'volatility_window': self.volatility_window}
+
+    def indicator_names(self):
+        return ([f'SMA_{w}' for w in self.sma_windows] + [f'EMA_{w}' for w in self.ema_windows]
+                + [f'RSI_{self.rsi_period}', 'MACD', 'MACD_Signal', 'MACD_Hist',
+                   f'Volatility_{self.volatility_window}'])
+
+    def _outputs(self, s):
+        """누적 상태(배열 모양 무관)로 지표값 계산 (fit 의 전체 기간 / update 의 마지막 봉 공통)"""
+        fast, slow, signal = self.macd_periods
+        out = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for w in self.sma_windows:
+                out[f'SMA_{w}'] = np.where(s[f'sma_count_{w}'] == w, s[f'sma_sum_{w}'] / w, np.nan)
+            for w in self.ema_windows:
+                out[f'EMA_{w}'] = np.where(s['bars'] >= w, s[f'ema_{w}'], np.nan)
+            avg_gain, avg_loss = s['avg_gain'], s['avg_loss']
+            rsi = np.where(avg_loss > 0, 100 - 100 / (1 + avg_gain / avg_loss), np.where(avg_gain > 0, 100.0, 50.0))
+            out[f'RSI_{self.rsi_period}'] = np.where(s['diff_count'] >= self.rsi_period, rsi, np.nan)
+            macd = np.where(s['bars'] >= slow, s['macd_fast'] - s['macd_slow'], np.nan)
+            macd_signal = np.where(s['macd_count'] >= signal, s['macd_signal'], np.nan)
+            out['MACD'] = macd
+            out['MACD_Signal'] = macd_signal
+            out['MACD_Hist'] = macd - macd_signal
+            n = self.volatility_window
+            variance = (s['ret_sumsq'] - np.square(s['ret_sum']) / n) / (n - 1)
+            out[f'Volatility_{n}'] = np.where(s['ret_count'] == n,
+                                              np.sqrt(np.maximum(variance, 0) * TRADING_DAYS), np.nan)
+        return out
+
+    def fit(self, dates, values):
+        """
+        전체 기간 (날짜, 종목) 종가로 지표를 벡터 연산하고 update 용 상태를 만듦
+        반환: {지표명: (날짜, 종목) 배열}
+        """
+        closes = pd.DataFrame(np.asarray(values, dtype=np.float64))
+        fast, slow, signal = self.macd_periods
+        n = self.volatility_window
+        diffs = closes.diff()
+        returns = closes / closes.shift(1) - 1
+        s = {'bars': closes.notna().cumsum().to_numpy(),
+             'macd_fast': _ewm(closes, span=fast), 'macd_slow': _ewm(closes, span=slow),
+             'avg_gain': _ewm(diffs.clip(lower=0), alpha=1 / self.rsi_period),
+             'avg_loss': _ewm((-diffs).clip(lower=0), alpha=1 / self.rsi_period),
+             'diff_count': diffs.notna().cumsum().to_numpy(),
+             'ret_sum': returns.rolling(n, min_periods=0).sum().to_numpy(),
+             'ret_sumsq': np.square(returns).rolling(n, min_periods=0).sum().to_numpy(),
+             'ret_count': returns.rolling(n, min_periods=0).count().to_numpy()}
+        for w in self.sma_windows:
+            s[f'sma_sum_{w}'] = closes.rolling(w, min_periods=0).sum().to_numpy()
+            s[f'sma_count_{w}'] = closes.rolling(w, min_periods=0).count().to_numpy()
+        for w in self.ema_windows:
+            s[f'ema_{w}'] = _ewm(closes, span=w)
+        macd = pd.DataFrame(np.where(s['bars'] >= slow, s['macd_fast'] - s['macd_slow'], np.nan))
+        s['macd_signal'] = _ewm(macd, span=signal)
+        s['macd_count'] = macd.notna().cumsum().to_numpy()
+        history = self._outputs(s)
+
+        # 마지막 행 상태 + 이후 update 에서 빠져나갈 값(링 버퍼)만 보관
+        state = {name: np.array(v[-1], dtype=np.float64) if len(v) else np.full(len(self.symbols), np.nan)
+                 for name, v in s.items()}
+        for name in ('bars', 'diff_count', 'macd_count', 'ret_count') + tuple(f'sma_count_{w}' for w in self.sma_windows):
+            state[name] = np.nan_to_num(state[name]).astype(np.int64)
+        state['closes'] = self._ring(closes.to_numpy(), self.buffer_size)
+        state['returns'] = self._ring(returns.to_numpy(), n)
+        state['prev_close'] = closes.to_numpy()[-1] if len(closes) else np.full(len(self.symbols), np.nan)
+        state['close_pos'] = np.array(0)
+        state['return_pos'] = np.array(0)
+        self.state = state
+        self.last_date = pd.Timestamp(dates[-1]) if len(dates) else None
+        return history
+
+    def _ring(self, values, size):
+        # 마지막 size 행 (부족하면 앞을 NaN 으로 채움), 다음 쓰기 위치는 0 (= 가장 오래된 값)
+        ring = np.full((size, len(self.symbols)), np.nan)
+        tail = values[-size:]
+        if len(tail):
+            ring[size - len(tail):] = tail
+        return ring
+
+    def update(self, date, close):
+        """새 봉 하나(종목별 종가 배열)로 모든 지표를 O(1) 갱신, 반환: 갱신된 스냅샷"""
+        s = self.state
+        close = np.asarray(close, dtype=np.float64)
+        valid = ~np.isnan(close)
+        fast, slow, signal = self.macd_periods
+
+        pos = int(s['close_pos'])
+        for w in self.sma_windows:
+            leaving = s['closes'][(pos - w) % self.buffer_size]  # w 봉 전 종가 (윈도우에서 빠지는 값)
+            s[f'sma_sum_{w}'] = s[f'sma_sum_{w}'] + _nan_to_zero(close) - _nan_to_zero(leaving)
+            s[f'sma_count_{w}'] = s[f'sma_count_{w}'] + valid - ~np.isnan(leaving)
+        s['closes'][pos] = close
+        s['close_pos'] = np.array((pos + 1) % self.buffer_size)
+
+        s['bars'] = s['bars'] + valid
+        for w in self.ema_windows:
+            s[f'ema_{w}'] = _ema_step(s[f'ema_{w}'], close, 2 / (w + 1))
+        s['macd_fast'] = _ema_step(s['macd_fast'], close, 2 / (fast + 1))
+        s['macd_slow'] = _ema_step(s['macd_slow'], close, 2 / (slow + 1))
+        macd = np.where(s['bars'] >= slow, s['macd_fast'] - s['macd_slow'], np.nan)
+        s['macd_signal'] = _ema_step(s['macd_signal'], macd, 2 / (signal + 1))
+        s['macd_count'] = s['macd_count'] + ~np.isnan(macd)
+
+        diff = close - s['prev_close']
+        s['avg_gain'] = _ema_step(s['avg_gain'], np.where(np.isnan(diff), np.nan, np.maximum(diff, 0)),
+                                  1 / self.rsi_period)
+        s['avg_loss'] = _ema_step(s['avg_loss'], np.where(np.isnan(diff), np.nan, np.maximum(-diff, 0)),
+                                  1 / self.rsi_period)
+        s['diff_count'] = s['diff_count'] + ~np.isnan(diff)
+
+        ret = close / s['prev_close'] - 1
+        pos = int(s['return_pos'])
+        leaving = s['returns'][pos]
+        s['ret_sum'] = s['ret_sum'] + _nan_to_zero(ret) - _nan_to_zero(leaving)
+        s['ret_sumsq'] = s['ret_sumsq'] + _nan_to_zero(ret) ** 2 - _nan_to_zero(leaving) ** 2
+        s['ret_count'] = s['ret_count'] + ~np.isnan(ret) - ~np.isnan(leaving)
+        s['returns'][pos] = ret
+        s['return_pos'] = np.array((pos + 1) % self.volatility_window)
+
+        s['prev_close'] = close
+        self.last_date = pd.Timestamp(date)
+        return self.snapshot()
+
+    def snapshot(self):
+        """마지막 봉 기준 {지표명: (종목,) 배열}"""
+        return self._outputs(self.state)
+
+    def records(self):
+        """종목별 스냅샷 레코드 (JSON 저장용, 값이 없으면 None)"""
+        date = self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None
+        values = {'Recent_Close_Price': self.state['prev_close'], **self.snapshot()}
+        return [{'Stock': symbol, 'Date': date,
+                 **{name: float(v[k]) if np.isfinite(v[k]) else None for name, v in values.items()}}
+                for k, symbol in enumerate(self.symbols)]
+
+    def save(self, path):
+        """상태(state.npz)를 먼저 저장하고 meta.json 을 마지막에 교체"""
+        if not os.path.exists(path):
+            os.makedirs(path)
+        tmp_path = os.path.join(path, "state.tmp.npz")
+        np.savez(tmp_path, **self.state)
+        os.replace(tmp_path, os.path.join(path, STATE_FILE))
+        meta = {'symbols': self.symbols, 'config': self.config(),
+                'last_date': self.last_date.strftime('%Y-%m-%d') if self.last_date is not None else None,
+                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        tmp_path = os.path.join(path, META_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, os.path.join(path, META_FILE))
+
+    def load(self, path):
+        """저장된 상태 로드 (종목/설정이 같을 때만), 성공하면 True"""
+        try:
+            with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['symbols'] != self.symbols or meta['config'] != self.config() or meta['last_date'] is None:
+                return False
+            with np.load(os.path.join(path, STATE_FILE)) as state:
+                self.state = {name: state[name].copy() for name in state.files}
+        except (OSError, ValueError, KeyError):
+            return False
+        self.last_date = pd.Timestamp(meta['last_date'])
+        return True
+
+
+def trading_bars(data):
+    """
+    거래일 봉만 남김 (total 은 이미 거래일 캘린더 기준이므로 보통 그대로 반환,
+    이전 방식의 달력일 total/csv 가 들어와도 주말 행이 섞이지 않도록 하는 안전장치)
+    """
+    return data[data.index.dayofweek < 5]
+
+
+def update_indicators(folder_path, symbols=None, full_refresh=False):
+    """
+    total 데이터의 종목별 종가로 기술 지표를 계산하여 report/technical_indicators.json 에 한번에 저장
+    저장된 상태가 있으면 마지막 봉 이후의 새 봉만 update (마지막 봉 종가가 바뀌었으면 전체 다시 계산)
+    반환: 종목별 스냅샷 레코드 목록
+    """
+    from feature_columns import stock_columns
+    from total_store import load_schema, read_total
+
+    if symbols is None:
+        schema = load_schema(folder_path)
+        columns = schema['columns'] if schema else list(read_total(folder_path).columns)
+        symbols = stock_columns(columns)
+    data = trading_bars(read_total(folder_path, columns=symbols))
+    data = data.dropna(axis=1, how='all')
+    missing = [s for s in symbols if s not in data.columns]
+    if missing:
+        print(f"Skipping {len(missing)} symbols without prices: {', '.join(missing)}")
+    symbols = list(data.columns)
+
+    engine = IndicatorEngine(symbols)
+    state_path = os.path.join(folder_path, STATE_DIR)
+    values = data.to_numpy(dtype=np.float64)
+    resumed = (not full_refresh and engine.load(state_path) and engine.last_date in data.index
+               and np.allclose(values[data.index.get_loc(engine.last_date)], engine.state['prev_close'],
+                               equal_nan=True))
+    if resumed:
+        new_rows = np.flatnonzero(data.index > engine.last_date)
+        for i in new_rows:
+            engine.update(data.index[i], values[i])
+        print(f"Updated indicators for {len(symbols)} symbols with {len(new_rows)} new bars")
+    else:
+        engine.fit(data.index, values)
+        print(f"Computed indicators for {len(symbols)} symbols over {len(data)} bars")
+    engine.save(state_path)
+
+    records = engine.records()
+    output_path = os.path.join(folder_path, SNAPSHOT_FILE)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=4)
+    print(f"Saved indicator snapshot to {output_path}")
+    return records
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import pickle
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+# 종목별 학습 모델/스케일러 저장 위치
+MODEL_DIR = os.path.join(os.getcwd(), "report", "models")
+MODEL_FILE = "model.keras"
+SCALER_FILE = "scalers.pkl"  # stock_scaler, econ_scaler
+META_FILE = "meta.json"
+ECON_SCALER_FILE = "econ_scaler.pkl"  # 모든 종목이 함께 쓰는 경제 지표 스케일러 (model_dir 바로 아래)
+
+# 전체 재학습 기준 (이 중 하나라도 해당하면 warm-start 대신 처음부터 학습)
+MAX_AGE_DAYS = int(os.getenv('MODEL_MAX_AGE_DAYS', '30'))  # 마지막 전체 학습 후 경과일
+MAX_FINETUNES = int(os.getenv('MODEL_MAX_FINETUNES', '20'))  # 전체 학습 후 누적 fine-tuning 횟수
+MAX_NEW_ROWS = int(os.getenv('MODEL_MAX_NEW_ROWS', '60'))  # 한번에 추가된 날짜 수
+SCALER_TOLERANCE = float(os.getenv('MODEL_SCALER_TOLERANCE', '0.1'))  # 스케일러 범위를 벗어난 정도 (범위 대비)
+FINETUNE_EPOCHS = int(os.getenv('FINETUNE_EPOCHS', '3'))
+
+# 모델 구조 버전: build_transformer_with_two_inputs 구조를 바꾸면 올려서 기존 체크포인트 무효화
+ARCHITECTURE_VERSION = 1
+
+
+def model_fingerprint(econ_columns, lookback, forecast_horizon, num_heads, ff_dim):
+    """입력 특성, lookback, 예측 기간, 모델 구조로 만든 체크포인트 키"""
+    key = json.dumps({
+        'econ_columns': list(econ_columns),
+        'lookback': lookback,
+        'forecast_horizon': forecast_horizon,
+        'num_heads': num_heads,
+        'ff_dim': ff_dim,
+        'architecture_version': ARCHITECTURE_VERSION,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def checkpoint_dir(column, fingerprint, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, column.replace(' ', '_').replace('/', '_'), fingerprint)
+
+
+def load_checkpoint(column, fingerprint, model_dir=MODEL_DIR):
+    """저장된 모델, 스케일러, 메타정보 로드 (없거나 깨졌으면 None)"""
+    from tensorflow.keras.models import load_model
+
+    path = checkpoint_dir(column, fingerprint, model_dir)
+    if not all(os.path.exists(os.path.join(path, f)) for f in (MODEL_FILE, SCALER_FILE, META_FILE)):
+        return None
+    try:
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(path, SCALER_FILE), 'rb') as f:
+            scalers = pickle.load(f)
+        model = load_model(os.path.join(path, MODEL_FILE))
+    except Exception as e:
+        print(f"Failed to load checkpoint for {column}, retraining: {e}")
+        return None
+    return {'model': model, 'stock_scaler': scalers['stock_scaler'],
+            'econ_scaler': scalers['econ_scaler'], 'meta': meta}
+
+
+def save_checkpoint(column, fingerprint, model, stock_scaler, econ_scaler, meta, model_dir=MODEL_DIR):
+    path = checkpoint_dir(column, fingerprint, model_dir)
+    if not os.path.exists(path):
+        os.makedirs(path)
+    # 모델/스케일러를 먼저 저장하고 meta.json 을 마지막에 교체 (meta 가 있으면 짝이 맞는 체크포인트)
+    model.save(os.path.join(path, MODEL_FILE))
+    with open(os.path.join(path, SCALER_FILE), 'wb') as f:
+        pickle.dump({'stock_scaler': stock_scaler, 'econ_scaler': econ_scaler}, f)
+    tmp_path = os.path.join(path, META_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, os.path.join(path, META_FILE))
+    return path
+
+
+def _out_of_range(scaler, values):
+    # 스케일러가 학습한 범위 밖으로 벗어난 정도 (범위 대비 비율, 특성 중 최대값)
+    data_range = np.where(scaler.data_range_ > 0, scaler.data_range_, 1.0)
+    below = (scaler.data_min_ - np.nanmin(values, axis=0)) / data_range
+    above = (np.nanmax(values, axis=0) - scaler.data_max_) / data_range
+    return float(np.max(np.maximum(np.maximum(below, above), 0)))
+
+
+def _same_scaler(a, b):
+    return (a.data_min_.shape == b.data_min_.shape and np.array_equal(a.data_min_, b.data_min_)
+            and np.array_equal(a.data_max_, b.data_max_))
+
+
+def shared_econ_scaler(econ_values, econ_columns, model_dir=MODEL_DIR):
+    """
+    모든 종목 모델이 함께 쓰는 경제 지표 스케일러 (학습 실행마다 한번만 준비)
+    저장된 스케일러의 컬럼이 같고 값이 SCALER_TOLERANCE 안이면 그대로 사용 (체크포인트 warm-start 유지),
+    아니면 새로 fit 하여 저장
+    반환: (스케일러, 새로 fit 한 사유 또는 None)
+    """
+    path = os.path.join(model_dir, ECON_SCALER_FILE)
+    saved = None
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+        except Exception as e:
+            print(f"Failed to load shared economic scaler, refitting: {e}")
+    if saved is None:
+        reason = "no shared scaler"
+    elif saved['columns'] != list(econ_columns):
+        reason = "economic columns changed"
+    else:
+        drift = _out_of_range(saved['scaler'], econ_values)
+        reason = f"values moved {drift:.0%} outside the fitted scaler range" if drift > SCALER_TOLERANCE else None
+    if reason is None:
+        return saved['scaler'], None
+    scaler = MinMaxScaler().fit(econ_values)
+    if not os.path.exists(model_dir):
+        os.makedirs(model_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'columns': list(econ_columns), 'scaler': scaler}, f)
+    os.replace(tmp_path, path)
+    return scaler, reason
+
+
+def staleness_reason(checkpoint, dates, stock_values, econ_scaler):
+    """warm-start 가 불가능하면 전체 재학습 사유를, 가능하면 None 반환"""
+    meta = checkpoint['meta']
+    trained_rows = meta['trained_rows']
+    if len(dates) < trained_rows:
+        return "data is shorter than the trained history"
+    if (pd.Timestamp(dates[0]) != pd.Timestamp(meta['first_date'])
+            or pd.Timestamp(dates[trained_rows - 1]) != pd.Timestamp(meta['last_date'])):
+        return "trained history changed"
+    age_days = (datetime.now() - datetime.strptime(meta['full_trained_at'], '%Y-%m-%d %H:%M:%S')).days
+    if age_days >= MAX_AGE_DAYS:
+        return f"last full training was {age_days} days ago"
+    if meta.get('finetune_count', 0) >= MAX_FINETUNES:
+        return f"fine-tuned {meta['finetune_count']} times since full training"
+    if len(dates) - trained_rows > MAX_NEW_ROWS:
+        return f"{len(dates) - trained_rows} new rows since last training"
+    if not _same_scaler(checkpoint['econ_scaler'], econ_scaler):
+        return "shared economic scaler was refit"
+    drift = _out_of_range(checkpoint['stock_scaler'], stock_values)
+    if drift > SCALER_TOLERANCE:
+        return f"values moved {drift:.0%} outside the fitted scaler range"
+    return None
+
+
+def train_with_checkpoint(column, stock_values, econ_scaled, econ_scaler, dates, econ_columns,
+                          lookback, forecast_horizon, num_heads, ff_dim, learning_rate,
+                          epochs, batch_size, finetune_epochs=FINETUNE_EPOCHS,
+                          model_dir=MODEL_DIR, verbose=0, training=None):
+    """
+    체크포인트가 유효하면 새로 추가된 윈도우로만 fine-tuning, 아니면 처음부터 학습
+    stock_values: 스케일링 전 주식 값 (행, 종목), dates: 행별 날짜
+    econ_scaled / econ_scaler: 모든 종목이 공유하는 스케일된 경제 지표 (float32, 읽기 전용) 와 그 스케일러 (shared_econ_scaler)
+    training: 전체 학습 방식 cpu_training.TrainingMode (없으면 batch_size 로 epochs 만큼 고정 학습, early stopping 이면 최대값)
+    반환: (모델, stock_scaler, 스케일된 입력 배열 (주식 + 경제 지표), 정보 dict (mode, reason, new_windows, checkpoint, fit))
+    mode: 'full' (처음부터 학습) / 'finetune' (새 윈도우로 fine-tuning) / 'cached' (새 윈도우 없음)
+    fit: 전체 학습한 경우 epoch 수, 검증 loss, steps/s (cpu_training.fit_model)
+    """
+    from cpu_training import TrainingMode, fit_model
+    from tf_pipeline import window_dataset
+    from tracing import epoch_callback
+    from transformer_model import compile_model
+
+    training = training or TrainingMode(batch_size=batch_size)
+    stock_values = np.asarray(stock_values, dtype=np.float64).reshape(len(stock_values), -1)
+    econ_scaled = np.asarray(econ_scaled, dtype=np.float32)
+    n_targets = stock_values.shape[1]
+    fingerprint = model_fingerprint(econ_columns, lookback, forecast_horizon, num_heads, ff_dim)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    checkpoint = load_checkpoint(column, fingerprint, model_dir)
+    reason = "no checkpoint" if checkpoint is None else staleness_reason(checkpoint, dates, stock_values, econ_scaler)
+
+    fit = None
+    if reason is None:
+        # warm-start: 저장된 주식 스케일러 그대로 사용, 지난 학습 이후 정답이 생긴 윈도우만 학습
+        model = checkpoint['model']
+        stock_scaler = checkpoint['stock_scaler']
+        meta = checkpoint['meta']
+        window_values = np.hstack([stock_scaler.transform(stock_values).astype(np.float32), econ_scaled])
+        new_start = meta['trained_rows'] - forecast_horizon
+        new_windows = max(0, len(window_values) - forecast_horizon - max(lookback, new_start))
+        if new_windows > 0:
+            finetune_dataset = window_dataset(window_values, lookback, forecast_horizon, n_targets,
+                                              batch_size=batch_size, start=new_start)
+            model.fit(finetune_dataset, epochs=finetune_epochs, verbose=verbose,
+                      callbacks=[epoch_callback(column, new_windows)])
+            meta.update({'finetune_count': meta.get('finetune_count', 0) + 1, 'fine_tuned_at': now})
+            mode = 'finetune'
+        else:
+            mode = 'cached'  # 정답이 생긴 새 윈도우가 없음: 체크포인트 그대로 사용
+    else:
+        stock_scaler = MinMaxScaler()
+        window_values = np.hstack([stock_scaler.fit_transform(stock_values).astype(np.float32), econ_scaled])
+        model = compile_model(lookback, n_targets, econ_scaled.shape[1], num_heads, ff_dim, learning_rate,
+                              jit_compile=training.jit_compile)
+        fit = fit_model(model, window_values, lookback, forecast_horizon, n_targets, epochs, training,
+                        trace_name=column, verbose=verbose)
+        meta = {'fingerprint': fingerprint, 'column': column, 'full_trained_at': now,
+                'fine_tuned_at': None, 'finetune_count': 0, 'epochs': fit['epochs'],
+                'training_mode': training.name, 'best_epoch': fit['best_epoch'], 'val_loss': fit['val_loss']}
+        new_windows = None
+        mode = 'full'
+
+    meta.update({'trained_rows': len(dates),
+                 'first_date': pd.Timestamp(dates[0]).strftime('%Y-%m-%d'),
+                 'last_date': pd.Timestamp(dates[-1]).strftime('%Y-%m-%d')})
+    if mode == 'cached':
+        path = checkpoint_dir(column, fingerprint, model_dir)
+    else:
+        path = save_checkpoint(column, fingerprint, model, stock_scaler, econ_scaler, meta, model_dir)
+    return model, stock_scaler, window_values, {'mode': mode, 'reason': reason, 'new_windows': new_windows,
+                                                'checkpoint': path, 'fit': fit}
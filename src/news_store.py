@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from tracing import timed_http
+
+# 종목별 뉴스 저장 위치 (report/news/{티커}.jsonl, 한 줄에 기사 하나, 추가만 함)
+STORE_DIR = os.path.join(os.getcwd(), "report", "news")
+
+
+@dataclass
+class NewsFetchResult:
+    """종목 하나의 뉴스 요청 결과 (status: 'ok' / 'failed')"""
+    symbol: str
+    status: str
+    fetched: int = 0
+    new: int = 0
+    requests: int = 0
+    elapsed: float = 0.0
+    error: str = None
+
+
+def article_id(content):
+    """기사 id (없으면 제목 해시)"""
+    if content.get('id'):
+        return str(content['id'])
+    title = re.sub(r'\s+', ' ', content.get('title') or '').strip().lower()
+    return 'title-' + hashlib.sha1(title.encode('utf-8')).hexdigest()[:16]
+
+
+def _utc(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp
+
+
+def parse_news_time(value):
+    """기사 발행 시각 (UTC 기준 aware datetime, 시간대가 없으면 UTC 로 간주, 읽을 수 없으면 가장 오래된 시각)"""
+    try:
+        published = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    return published.replace(tzinfo=timezone.utc) if published.tzinfo is None else published.astimezone(timezone.utc)
+
+
+class NewsStore:
+    """여러 종목 뉴스를 기사 id(없으면 제목 해시)로 중복 제거하며 쌓는 저장소"""
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        if not os.path.exists(store_dir):
+            os.makedirs(store_dir)
+        self._items = {}  # 종목별 기사 목록 캐시 (파일을 한번만 읽음)
+
+    def _path(self, symbol):
+        return os.path.join(self.store_dir, f"{symbol.replace('/', '_')}.jsonl")
+
+    def items(self, symbol):
+        """저장된 기사 전체 (저장 순서)"""
+        if symbol not in self._items:
+            items = []
+            if os.path.exists(self._path(symbol)):
+                with open(self._path(symbol), 'r', encoding='utf-8') as f:
+                    items = [json.loads(line) for line in f if line.strip()]
+            self._items[symbol] = items
+        return self._items[symbol]
+
+    def seen_ids(self, symbol):
+        items = self.items(symbol)
+        return {item['id'] for item in items} | {article_id({'title': item.get('title')}) for item in items}
+
+    def append(self, symbol, entries):
+        """처음 보는 기사만 파일 끝에 추가, 반환: 추가된 기사 목록"""
+        seen = self.seen_ids(symbol)
+        new_entries = []
+        for entry in entries:
+            title_key = article_id({'title': entry.get('title')})
+            if entry['id'] in seen or title_key in seen:
+                continue
+            seen.update((entry['id'], title_key))
+            new_entries.append(entry)
+        if new_entries:
+            with open(self._path(symbol), 'a', encoding='utf-8') as f:
+                for entry in new_entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.items(symbol).extend(new_entries)
+        return new_entries
+
+    def latest(self, symbol, n=20, since=None, until=None):
+        """since <= 발행 시각 <= until 인 기사 중 최신 n 개 (최신순)"""
+        since = _utc(since) if since is not None else None
+        until = _utc(until) if until is not None else None
+        items = []
+        for item in self.items(symbol):
+            published = parse_news_time(item.get('date'))
+            if (since is None or published >= since) and (until is None or published <= until):
+                items.append((published, item))
+        items.sort(key=lambda pair: pair[0], reverse=True)
+        return [item for _, item in items[:n]]
+
+
+def _news_entries(symbol, count):
+    import yfinance as yf
+
+    with timed_http('yahoo'):
+        news = yf.Ticker(symbol).get_news(count=count)
+    entries = []
+    for item in news:
+        content = item.get('content') or item
+        entries.append({
+            "id": article_id({'id': item.get('id') or content.get('id'), 'title': content.get('title')}),
+            "stock": symbol,
+            "date": content.get('pubDate'),
+            "title": content.get('title'),
+            "provider": (content.get('provider') or {}).get('displayName', '알 수 없음'),
+            "summary": content.get('summary') or '콘텐츠 없음',
+        })
+    return entries
+
+
+def fetch_symbol(store, symbol, count=20, refresh_count=10):
+    """
+    종목 하나의 새 뉴스 저장
+    이미 저장된 기사가 있으면 refresh_count 개만 요청하고, 그 안에 아는 기사가 하나도 없을 때만 count 개로 다시 요청
+    """
+    result = NewsFetchResult(symbol=symbol, status='failed')
+    started = time.monotonic()
+    try:
+        known = store.seen_ids(symbol)
+        entries = _news_entries(symbol, refresh_count if known else count)
+        result.requests = 1
+        if known and refresh_count < count and not any(e['id'] in known for e in entries):
+            entries = _news_entries(symbol, count)  # 지난 실행 이후 기사가 많아 겹치는 부분이 없음
+            result.requests = 2
+        result.fetched = len(entries)
+        result.new = len(store.append(symbol, entries))
+        result.status = 'ok'
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def fetch_all(store, symbols, count=20, refresh_count=10, max_workers=8):
+    """여러 종목 뉴스를 동시에 요청하여 새 기사만 저장, 반환: 종목 순서대로 정렬된 NewsFetchResult 목록"""
+    for symbol in symbols:
+        store.items(symbol)  # 저장된 기사는 스레드 시작 전에 읽어 둠
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(fetch_symbol, store, symbol, count, refresh_count) for symbol in symbols]
+        return [future.result() for future in futures]
@@ -0,0 +1,239 @@
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import tracing
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+REPORT_DIR = os.path.join(ROOT_DIR, "report")
+STATE_FILE = os.path.join(REPORT_DIR, "pipeline_state.json")
+LOG_DIR = os.path.join(REPORT_DIR, "logs")
+
+# 동시에 실행할 단계 수
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '3'))
+
+
+@dataclass
+class Stage:
+    """
+    파이프라인 단계 하나 (src/ 의 스크립트를 별도 프로세스로 실행)
+    inputs/outputs: report/ 기준 경로, deps: 먼저 끝나야 하는 단계
+    daily: 외부 API 에서 데이터를 받는 단계 (입력이 같아도 날짜가 바뀌면 다시 실행)
+    env_prefixes: 이 접두사로 시작하는 환경 변수 값도 지문에 포함
+    """
+    name: str
+    script: str
+    args: list = field(default_factory=list)
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    deps: list = field(default_factory=list)
+    daily: bool = False
+    env_prefixes: list = field(default_factory=list)
+
+
+# 단계 정의 (report/ 의 파일로 서로 연결)
+STAGES = [
+    Stage('collect', 'fred.py', outputs=['total/schema.json', 'total/values.npy', 'total/index.npy'],
+          daily=True, env_prefixes=['FRED_', 'YF_', 'TOTAL_']),
+    Stage('train', 'train_universe.py', inputs=['total/schema.json', 'total/values.npy', 'total/index.npy'],
+          outputs=['predicted_stock.csv', 'predictions'], deps=['collect'],
+          env_prefixes=['TRAIN_', 'MODEL_', 'FINETUNE_']),
+    Stage('indicators', 'stock_movingaverage.py',
+          inputs=['total/schema.json', 'total/values.npy', 'total/index.npy'],
+          outputs=['technical_indicators.json', 'GOOGL_Moving_Average.json'], deps=['collect'],
+          env_prefixes=['INDICATOR_']),
+    Stage('features', 'feature_store.py', inputs=['total/schema.json', 'total/values.npy', 'total/index.npy'],
+          outputs=['features/schema.json', 'features/values.npy', 'features/index.npy'], deps=['collect']),
+    Stage('news', 'yf_newsdata.py', outputs=['GOOGL_news.json'], daily=True, env_prefixes=['NEWS_']),
+    Stage('fundamentals', 'yf_companyinfo.py', outputs=['GOOGL_info.json'], daily=True,
+          env_prefixes=['FUNDAMENTALS_']),
+    Stage('report', 'stock_dl_report.py', inputs=['predicted_stock.csv', 'predictions'], outputs=['dl_report.json'],
+          deps=['train'], env_prefixes=['DL_REPORT_']),
+    Stage('backtest', 'backtest.py', inputs=['predicted_stock.csv'], outputs=['backtest_report.json'],
+          deps=['train'], env_prefixes=['BACKTEST_']),
+    Stage('analyze', 'stock_analyzer.py', args=['--batch'],
+          inputs=['dl_report.json', 'technical_indicators.json', 'news', 'cache/fundamentals'],
+          outputs=['deepseek_recommendations.json'], deps=['report', 'indicators', 'news', 'fundamentals'],
+          env_prefixes=['DEEPSEEK_', 'ANALYZE_', 'PROMPT_']),
+]
+
+
+def local_modules(script, src_dir=SRC_DIR):
+    """스크립트가 (함수 안의 import 포함) 사용하는 src/ 모듈 파일 목록 (재귀)"""
+    found = set()
+    pending = [script]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        found.add(name)
+        with open(os.path.join(src_dir, name), 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                path = module.split('.')[0] + '.py'
+                if os.path.exists(os.path.join(src_dir, path)):
+                    pending.append(path)
+    return sorted(found)
+
+
+def _hash_path(digest, path):
+    # 파일은 내용, 폴더는 하위 파일 (경로, 크기, 수정 시각), 없으면 '없음'으로 지문에 반영
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    elif os.path.isdir(path):
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                stat = os.stat(file_path)
+                digest.update(f"{os.path.relpath(file_path, path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    else:
+        digest.update(b'<missing>')
+
+
+def fingerprint(stage, report_dir=REPORT_DIR, src_dir=SRC_DIR):
+    """단계 입력 지문: 명령 + 스크립트/사용 모듈 코드 + 입력 파일 내용 + 관련 환경 변수 (+ 날짜)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([stage.name, stage.script, stage.args]).encode('utf-8'))
+    for module in local_modules(stage.script, src_dir):
+        digest.update(module.encode('utf-8'))
+        _hash_path(digest, os.path.join(src_dir, module))
+    for path in stage.inputs:
+        digest.update(path.encode('utf-8'))
+        _hash_path(digest, os.path.join(report_dir, path))
+    env = {k: v for k, v in sorted(os.environ.items()) if any(k.startswith(p) for p in stage.env_prefixes)}
+    digest.update(json.dumps(env, sort_keys=True).encode('utf-8'))
+    if stage.daily:
+        digest.update(datetime.now().strftime('%Y-%m-%d').encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def load_state(state_file=STATE_FILE):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, state_file=STATE_FILE):
+    tmp_path = state_file + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, state_file)
+
+
+def run_stage(stage, log_dir=LOG_DIR):
+    """스크립트를 저장소 최상위 폴더에서 실행 (출력은 report/logs/{단계}.log), 반환: 종료 코드"""
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    with open(os.path.join(log_dir, f"{stage.name}.log"), 'w', encoding='utf-8') as log:
+        process = subprocess.run([sys.executable, os.path.join(SRC_DIR, stage.script)] + stage.args,
+                                 cwd=ROOT_DIR, stdout=log, stderr=subprocess.STDOUT)
+    return process.returncode
+
+
+def select_stages(names=None, stages=STAGES):
+    """지정한 단계와 그 선행 단계 (지정하지 않으면 전체), 정의 순서 유지"""
+    by_name = {stage.name: stage for stage in stages}
+    if not names:
+        return list(stages)
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(unknown)} (available: {', '.join(by_name)})")
+    selected = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in stages if stage.name in selected]
+
+
+def run_pipeline(names=None, force=False, workers=PIPELINE_WORKERS, stages=STAGES, dry_run=False):
+    """
+    선행 단계가 끝난 단계부터 최대 workers 개씩 병렬 실행
+    - 입력 지문이 지난 성공 때와 같고 출력이 있으면 건너뜀 (force 이면 모두 실행)
+    - 실패한 단계의 후속 단계는 실행하지 않음, 다시 실행하면 성공한 단계는 건너뛰고 이어서 진행
+    반환: {단계: 'ok' / 'skipped' / 'failed' / 'blocked'}
+    """
+    selected = select_stages(names, stages)
+    os.environ['TRACE_RUN_ID'] = tracing.RUN_ID  # 단계 프로세스의 실행 기록을 하나로 묶음
+    state = load_state()
+    status = {}
+    running = {}  # future: 단계 이름
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while len(status) < len(selected):
+            for stage in selected:
+                if stage.name in status or stage.name in running.values():
+                    continue
+                if any(status.get(dep) in ('failed', 'blocked') for dep in stage.deps):
+                    status[stage.name] = 'blocked'
+                    print(f"[{stage.name}] blocked by failed dependency")
+                    continue
+                if not all(status.get(dep) in ('ok', 'skipped') for dep in stage.deps):
+                    continue  # 선행 단계 진행 중
+                key = fingerprint(stage)
+                previous = state.get(stage.name, {})
+                outputs_exist = all(os.path.exists(os.path.join(REPORT_DIR, p)) for p in stage.outputs)
+                if not force and previous.get('status') == 'ok' and previous.get('fingerprint') == key \
+                        and outputs_exist:
+                    status[stage.name] = 'skipped'
+                    print(f"[{stage.name}] up to date, skipped")
+                    continue
+                if dry_run:
+                    status[stage.name] = 'ok'
+                    print(f"[{stage.name}] would run ({'forced' if force else 'inputs changed'})")
+                    continue
+                print(f"[{stage.name}] running {stage.script} {' '.join(stage.args)}".rstrip())
+                future = executor.submit(run_stage, stage)
+                future.started, future.key = time.time(), key
+                running[future] = stage.name
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                elapsed = time.time() - future.started
+                try:
+                    returncode = future.result()
+                except Exception as e:
+                    returncode, error = None, f"{type(e).__name__}: {e}"
+                else:
+                    error = None if returncode == 0 else f"exit code {returncode}"
+                status[name] = 'ok' if error is None else 'failed'
+                state[name] = {'status': status[name], 'fingerprint': future.key if error is None else None,
+                               'finished_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                               'elapsed': round(elapsed, 1), 'error': error}
+                save_state(state)
+                detail = f"done in {elapsed:.1f}s" if error is None else f"failed ({error}), see report/logs/{name}.log"
+                print(f"[{name}] {detail}")
+    return status
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    result = run_pipeline(args or None, force='--force' in sys.argv, dry_run='--dry-run' in sys.argv)
+    print("Pipeline: " + ", ".join(f"{name} {s}" for name, s in result.items()))
+    events = tracing.load_events(tracing.RUN_ID)
+    if events:
+        print(tracing.format_summary(events))
+    sys.exit(1 if any(s in ('failed', 'blocked') for s in result.values()) else 0)
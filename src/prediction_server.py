@@ -0,0 +1,361 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from tracing import track_script
+
+# 예측 서버 설정 (주소, 마이크로 배치 대기 시간/최대 크기, 체크포인트/데이터 변경 확인 주기, 제공할 종목)
+SERVE_HOST = os.getenv('SERVE_HOST', '127.0.0.1')
+SERVE_PORT = int(os.getenv('SERVE_PORT', '8800'))
+SERVE_BATCH_WAIT_MS = float(os.getenv('SERVE_BATCH_WAIT_MS', '2'))  # 첫 요청 이후 같은 배치로 모을 시간
+SERVE_MAX_BATCH = int(os.getenv('SERVE_MAX_BATCH', '256'))  # 한 배치에 모을 최대 요청 수
+SERVE_RELOAD_SECONDS = float(os.getenv('SERVE_RELOAD_SECONDS', '10'))  # 0 이면 다시 로드하지 않음
+SERVE_TARGETS = os.getenv('SERVE_TARGETS', '')  # 쉼표로 구분한 한글 종목명, 비어 있으면 체크포인트가 있는 종목 전체
+
+LATENCY_SAMPLES = 1000  # /health 에 보고할 최근 요청 수
+
+
+class PredictionError(Exception):
+    """요청한 종목/날짜로 예측할 수 없음 (HTTP 404 로 응답)"""
+
+
+class PredictionService:
+    """
+    종목별 체크포인트(report/models/)와 total 데이터를 한번만 메모리에 올려두고 예측
+    - 요청은 큐에 넣고 배치 스레드가 SERVE_BATCH_WAIT_MS 동안 모아서, 종목별로 한번의 predict_on_batch 로 계산
+    - 같은 (종목, 기준 행) 예측은 모델/데이터가 바뀔 때까지 재사용 (최신 날짜 예측은 로드할 때 미리 계산)
+    - reload: meta.json(체크포인트 마지막 저장 파일) 또는 total 스키마가 바뀐 경우에만 해당 모델/데이터를 다시 로드
+    """
+
+    def __init__(self, folder_path, targets=None, batch_wait_ms=SERVE_BATCH_WAIT_MS, max_batch=SERVE_MAX_BATCH):
+        self.folder_path = folder_path
+        self.model_dir = os.path.join(folder_path, "models")
+        self.targets = targets
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_batch = max_batch
+        self.models = {}  # 종목 -> {'model', 'stock_scaler', 'econ_scaler', 'meta', 'mtime'}
+        self.data = None  # {'dates', 'econ_values', 'stock', 'fingerprint', 'lookback', 'horizon', 'mtime', ...}
+        self.cache = {}  # (종목, 기준 행) -> 예측 결과
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.stats = {'requests': 0, 'predicted': 0, 'batches': 0, 'model_calls': 0, 'reloads': 0,
+                      'loaded_at': None}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+    def _load_data(self):
+        """total 데이터 로드 (학습과 같은 결측치 처리), 체크포인트 지문은 경제 지표 컬럼으로 결정"""
+        from model_cache import model_fingerprint
+        from total_store import load_schema
+        from train_universe import load_training_data
+        from transformer_model import economic_features, LOOKBACK, FORECAST_HORIZON, NUM_HEADS, FF_DIM
+
+        schema = load_schema(self.folder_path)
+        data = load_training_data(self.folder_path)
+        econ_columns = [c for c in economic_features if c in data.columns]
+        stock = {c: data[c].to_numpy(dtype=np.float64) for c in data.columns if c not in economic_features}
+        return {'dates': data.index.to_numpy(), 'econ_values': data[econ_columns].to_numpy(dtype=np.float64),
+                'stock': stock, 'econ_columns': econ_columns,
+                'fingerprint': model_fingerprint(econ_columns, LOOKBACK, FORECAST_HORIZON, NUM_HEADS, FF_DIM),
+                'lookback': LOOKBACK, 'horizon': FORECAST_HORIZON, 'mtime': self._total_mtime(),
+                'last_date': schema['last_date'] if schema else str(data.index[-1].date())}
+
+    def _total_mtime(self):
+        from total_store import SCHEMA_FILE, STORE_DIR, CSV_FILE
+        for path in (os.path.join(self.folder_path, STORE_DIR, SCHEMA_FILE), os.path.join(self.folder_path, CSV_FILE)):
+            if os.path.exists(path):
+                return os.path.getmtime(path)
+        return None
+
+    def _checkpoints(self, fingerprint):
+        """현재 설정(지문)의 체크포인트 {종목: meta.json 경로} (meta.json 이 있으면 짝이 맞는 체크포인트)"""
+        from model_cache import META_FILE
+        found = {}
+        for meta_path in glob.glob(os.path.join(self.model_dir, "*", fingerprint, META_FILE)):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    column = json.load(f)['column']
+            except (OSError, ValueError, KeyError):
+                continue
+            if self.targets is None or column in self.targets:
+                found[column] = meta_path
+        return found
+
+    def reload(self):
+        """
+        바뀐 데이터/체크포인트만 다시 로드하고 최신 날짜 예측을 미리 계산
+        반환: 다시 로드한 종목 목록 (데이터가 바뀌면 전체)
+        """
+        from model_cache import load_checkpoint
+
+        data = self.data
+        data_changed = data is None or self._total_mtime() != data['mtime']
+        if data_changed:
+            data = self._load_data()
+        checkpoints = self._checkpoints(data['fingerprint'])
+        # 지문(경제 지표 컬럼)이 그대로면 데이터가 바뀌어도 로드된 모델을 그대로 사용
+        same_models = self.data is not None and data['fingerprint'] == self.data['fingerprint']
+        models = {c: m for c, m in self.models.items() if c in data['stock']} if same_models else {}
+        changed = []
+        for column, meta_path in checkpoints.items():
+            mtime = os.path.getmtime(meta_path)
+            if column not in data['stock'] or (column in models and models[column]['mtime'] == mtime):
+                continue
+            checkpoint = load_checkpoint(column, data['fingerprint'], self.model_dir)
+            if checkpoint is None:
+                continue
+            checkpoint['mtime'] = mtime
+            self._warm_up(checkpoint['model'], data)
+            models[column] = checkpoint
+            changed.append(column)
+        for column in [c for c in models if c not in checkpoints]:
+            del models[column]
+            changed.append(column)
+
+        reloaded = sorted(models) if data_changed else changed
+        if data_changed or changed:
+            with self.lock:
+                self.data, self.models = data, models
+                self.cache = {} if data_changed else {k: v for k, v in self.cache.items() if k[0] not in changed}
+            self.stats['reloads'] += 1
+            self.stats['loaded_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            # 새 모델의 최신 날짜 예측을 미리 계산 (첫 요청이 모델 준비 시간을 기다리지 않도록)
+            self.predict([(column, None) for column in reloaded if column in models])
+        return reloaded
+
+    @staticmethod
+    def _warm_up(model, data):
+        """
+        교체 전에 배치 크기 1, 2 로 한번씩 예측해 둠 (예측 함수 trace 가 요청 처리 중에 일어나지 않도록,
+        두 가지 배치 크기로 trace 된 뒤에는 배치 크기가 바뀌어도 다시 trace 하지 않음)
+        """
+        for batch in (1, 2):
+            model.predict_on_batch((np.zeros((batch, data['lookback'], 1), dtype=np.float32),
+                                    np.zeros((batch, data['lookback'], len(data['econ_columns'])), dtype=np.float32)))
+
+    def watch(self, interval=SERVE_RELOAD_SECONDS):
+        """interval 초마다 reload 하는 백그라운드 스레드 시작"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    reloaded = self.reload()
+                    if reloaded:
+                        print(f"Refreshed {len(reloaded)} tickers: {', '.join(reloaded[:10])}"
+                              + (" ..." if len(reloaded) > 10 else ""))
+                except Exception as e:  # 학습 중 파일이 바뀌는 경우 등, 다음 주기에 다시 시도
+                    print(f"Reload failed: {type(e).__name__}: {e}")
+
+        if interval > 0:
+            threading.Thread(target=loop, daemon=True).start()
+
+    def _base_row(self, data, date):
+        """date 까지의 행으로 만든 윈도우의 기준 행 (None 이면 마지막 행까지 = 다음 예측)"""
+        if date is None:
+            return len(data['dates'])
+        return int(np.searchsorted(data['dates'], np.datetime64(date), side='right'))
+
+    def predict(self, requests):
+        """
+        requests: (종목, 기준 날짜 또는 None) 목록, 반환: 같은 순서의 결과 dict 또는 PredictionError
+        캐시에 없는 요청만 배치 스레드로 보내고 결과를 기다림
+        """
+        started = time.perf_counter()
+        with self.lock:
+            data, models, cache = self.data, self.models, self.cache
+        results, pending = [None] * len(requests), []
+        for k, (column, date) in enumerate(requests):
+            if column not in models:
+                results[k] = PredictionError(f"No model loaded for {column}")
+                continue
+            try:
+                row = self._base_row(data, date)
+            except ValueError:
+                results[k] = PredictionError(f"Invalid date: {date}")
+                continue
+            if row < data['lookback']:
+                results[k] = PredictionError(f"Not enough history before {date} for {column}")
+            elif (column, row) in cache:
+                results[k] = {**cache[(column, row)], 'cached': True}
+            else:
+                future = Future()
+                self.requests.put((column, row, data, models[column], cache, future))
+                pending.append((k, future))
+        for k, future in pending:
+            results[k] = future.result()
+        self.stats['requests'] += len(requests)
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        return results
+
+    def _batch_loop(self):
+        """첫 요청을 받은 뒤 batch_wait 동안 더 모아서 종목별로 한번에 계산 (TensorFlow 호출은 이 스레드에서만)"""
+        while True:
+            items = [self.requests.get()]
+            deadline = time.perf_counter() + self.batch_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.stats['batches'] += 1
+            groups = {}
+            for item in items:
+                # 데이터만 다시 읽은 경우 체크포인트는 그대로이므로 데이터 스냅샷까지 같은 요청끼리 묶음
+                groups.setdefault((id(item[2]), id(item[3])), []).append(item)
+            for group in groups.values():
+                try:
+                    self._run_group(group)
+                except Exception as e:
+                    for item in group:
+                        if not item[5].done():
+                            item[5].set_result(PredictionError(f"{type(e).__name__}: {e}"))
+
+    def _run_group(self, group):
+        """같은 데이터 스냅샷, 같은 모델의 요청들: 겹치지 않는 기준 행의 윈도우만 쌓아서 predict_on_batch 한번"""
+        column, _, data, checkpoint, cache, _ = group[0]
+        lookback = data['lookback']
+        rows = sorted({item[1] for item in group})
+        stock_scaler, econ_scaler = checkpoint['stock_scaler'], checkpoint['econ_scaler']
+        stock = data['stock'][column]
+        windows = [np.hstack([stock_scaler.transform(stock[row - lookback:row, None]),
+                              econ_scaler.transform(data['econ_values'][row - lookback:row])]) for row in rows]
+        windows = np.stack(windows).astype(np.float32)
+        predicted = checkpoint['model'].predict_on_batch((windows[:, :, :1], windows[:, :, 1:]))
+        predicted = stock_scaler.inverse_transform(np.asarray(predicted))[:, 0]
+        self.stats['model_calls'] += 1
+        self.stats['predicted'] += len(rows)
+
+        meta = checkpoint['meta']
+        model_info = {'fingerprint': data['fingerprint'], 'trained_through': meta.get('last_date'),
+                      'full_trained_at': meta.get('full_trained_at'), 'fine_tuned_at': meta.get('fine_tuned_at'),
+                      'training_mode': meta.get('training_mode')}
+        computed = {}
+        for row, value in zip(rows, predicted):
+            last_close = float(stock[row - 1])
+            computed[row] = {
+                'ticker': column,
+                'as_of': str(np.datetime_as_string(data['dates'][row - 1], unit='D')),
+                'horizon': data['horizon'],
+                'last_close': last_close,
+                'predicted': float(value),
+                'rise_pct': float((value - last_close) / last_close * 100) if last_close else None,
+                'model': model_info,
+            }
+            cache[(column, row)] = computed[row]
+        for _, row, _, _, _, future in group:
+            future.set_result({**computed[row], 'cached': False})
+
+    def health(self):
+        latencies = sorted(self.latencies)
+        percentile = (lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3)
+                      if latencies else None)
+        data = self.data or {}
+        return {'models': len(self.models), 'data_last_date': data.get('last_date'),
+                'fingerprint': data.get('fingerprint'), **self.stats,
+                'latency_ms': {'p50': percentile(0.5), 'p99': percentile(0.99)}}
+
+
+class _PredictionHandler(BaseHTTPRequestHandler):
+    """
+    GET /predict?ticker=구글 A[&date=YYYY-MM-DD]: 종목 하나
+    GET /predict?tickers=구글 A,애플[&date=] / POST /predict {"tickers": [...], "date": ...}: 여러 종목 (all 이면 전체)
+    GET /tickers, GET /health
+    """
+    protocol_version = 'HTTP/1.1'  # keep-alive (대시보드가 연결을 재사용)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _batch(self, tickers, date):
+        service = self.server.service
+        if tickers == ['all']:
+            tickers = sorted(service.models)
+        results = service.predict([(t, date) for t in tickers])
+        self._send(200, {'predictions': [r for r in results if not isinstance(r, PredictionError)],
+                         'errors': {t: str(r) for t, r in zip(tickers, results) if isinstance(r, PredictionError)}})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+        date = query.get('date', [None])[0]
+        if url.path == '/predict' and 'tickers' in query:
+            self._batch([t.strip() for t in query['tickers'][0].split(',') if t.strip()], date)
+        elif url.path == '/predict' and 'ticker' in query:
+            result = service.predict([(query['ticker'][0], date)])[0]
+            if isinstance(result, PredictionError):
+                self._send(404, {'error': str(result)})
+            else:
+                self._send(200, result)
+        elif url.path == '/tickers':
+            self._send(200, sorted(service.models))
+        elif url.path == '/health':
+            self._send(200, service.health())
+        else:
+            self._send(404, {'error': f"Unknown path: {url.path} (available: /predict, /tickers, /health)"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/predict':
+            self._send(404, {'error': f"Unknown path: {url.path}"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            tickers = body['tickers']
+            # 'all' 또는 종목명 문자열 목록만 허용 (문자열 하나를 글자 단위로 나누지 않도록)
+            if tickers != 'all' and not (isinstance(tickers, list) and all(isinstance(t, str) for t in tickers)):
+                raise TypeError(tickers)
+        except (ValueError, KeyError, TypeError):
+            self._send(400, {'error': 'Expected JSON body {"tickers": [...], "date": "YYYY-MM-DD"}'})
+            return
+        self._batch(['all'] if tickers == 'all' else tickers, body.get('date'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(folder_path, targets=None, host=SERVE_HOST, port=SERVE_PORT, reload_seconds=SERVE_RELOAD_SECONDS):
+    """모델/데이터를 로드하고 HTTP 서버 시작 (종료: Ctrl+C)"""
+    started = time.time()
+    service = PredictionService(folder_path, targets)
+    service.reload()
+    print(f"Loaded {len(service.models)} models (data through {service.data['last_date']}) "
+          f"in {time.time() - started:.1f}s")
+    service.watch(reload_seconds)
+    server = ThreadingHTTPServer((host, port), _PredictionHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"Serving predictions on http://{host}:{server.server_port}/predict?ticker=")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return service
+
+
+if __name__ == '__main__':
+    folder_path = os.path.join(os.getcwd(), "report")
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    trace = track_script('serve')  # 시간/메모리 기록 (서버 종료 시)
+    targets = [t.strip() for t in SERVE_TARGETS.split(',') if t.strip()] or None
+    service = serve(folder_path, targets)
+    trace.output(rows=service.stats['requests'])
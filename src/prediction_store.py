@@ -0,0 +1,229 @@
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# report/predictions/ticker={종목}/run_date={실행일}/run={실행 id}/ 에 실행마다 새 폴더로 추가 (기존 파일은 수정하지 않음)
+STORE_DIR = "predictions"
+META_FILE = "meta.json"
+COLUMNS = ('date', 'predicted', 'actual')  # 컬럼마다 npy 파일 하나 (읽을 컬럼만 연다)
+# checkpoint meta.json 중 예측과 함께 기록할 모델 버전 정보
+MODEL_FIELDS = ('fingerprint', 'full_trained_at', 'fine_tuned_at', 'finetune_count', 'training_mode', 'epochs',
+                'val_loss', 'last_date')
+
+
+def _partition_name(ticker):
+    # model_cache.checkpoint_dir 과 같은 규칙 (원래 종목명은 meta.json 에 저장)
+    return ticker.replace(' ', '_').replace('/', '_')
+
+
+def new_run_id(now=None):
+    """실행 id (시간순으로 정렬되는 문자열)"""
+    now = now or datetime.now()
+    return f"{now:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+
+
+def model_version(checkpoint_meta):
+    """체크포인트 meta.json 에서 예측과 함께 남길 모델 버전 정보 (trained_through: 마지막 학습 날짜)"""
+    if not checkpoint_meta:
+        return None
+    version = {k: checkpoint_meta.get(k) for k in MODEL_FIELDS}
+    version['trained_through'] = version.pop('last_date')
+    return version
+
+
+def read_checkpoint_meta(checkpoint_path):
+    try:
+        with open(os.path.join(checkpoint_path, META_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def write_partition(folder_path, run_id, run_date, ticker, frame, meta):
+    """
+    종목 하나의 실행 결과를 새 파티션으로 저장 (임시 폴더에 쓴 뒤 이름을 바꿔 한번에 나타나도록)
+    frame: prediction_frame 형식 (날짜, {종목}_Predicted, {종목}_Actual)
+    """
+    store_path = os.path.join(folder_path, STORE_DIR)
+    tmp_path = os.path.join(store_path, ".tmp", f"{run_id}-{_partition_name(ticker)}")
+    os.makedirs(tmp_path, exist_ok=True)
+    values = {'date': pd.DatetimeIndex(frame['날짜']).to_numpy().astype('datetime64[D]'),
+              'predicted': frame[f'{ticker}_Predicted'].to_numpy(dtype=np.float64),
+              'actual': frame[f'{ticker}_Actual'].to_numpy(dtype=np.float64)}
+    for column in COLUMNS:
+        np.save(os.path.join(tmp_path, f"{column}.npy"), values[column])
+    meta = {'ticker': ticker, 'run_id': run_id, 'run_date': run_date, 'rows': len(frame),
+            'first_date': str(values['date'][0]) if len(frame) else None,
+            'last_date': str(values['date'][-1]) if len(frame) else None, **meta}
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+    path = os.path.join(store_path, f"ticker={_partition_name(ticker)}", f"run_date={run_date}", f"run={run_id}")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def has_runs(folder_path):
+    store_path = os.path.join(folder_path, STORE_DIR)
+    return os.path.isdir(store_path) and any(name.startswith('ticker=') for name in os.listdir(store_path))
+
+
+def append_run(folder_path, updates, source, runs_meta=None, history=None, now=None):
+    """
+    실행 한번의 새 예측을 종목별 파티션으로 추가
+    updates: prediction_frame 목록 (종목 하나당 여러 개면 날짜순으로 합침)
+    source: 'train' / 'inference', runs_meta: {종목: {'mode', 'replaces_history', 'model'}}
+    history: 저장소가 비어 있으면 먼저 이 예측 기록(predicted_stock.csv)을 'imported' 실행으로 넣어 이전 기록을 보존
+    반환: 실행 id
+    """
+    now = now or datetime.now()
+    if history is not None and not has_runs(folder_path):
+        import_history(folder_path, history, now - timedelta(microseconds=1))  # 실행 id 순서에서 이번 실행보다 앞
+    run_id, run_date = new_run_id(now), now.strftime('%Y-%m-%d')
+    created_at = now.strftime('%Y-%m-%d %H:%M:%S')
+    frames = {}
+    for update in updates:
+        if update.empty:
+            continue
+        ticker = next(c[:-len('_Predicted')] for c in update.columns if c.endswith('_Predicted'))
+        frames.setdefault(ticker, []).append(update)
+    for ticker, parts in frames.items():
+        frame = pd.concat(parts).drop_duplicates('날짜', keep='last').sort_values('날짜')
+        meta = {'source': source, 'created_at': created_at, 'mode': None, 'replaces_history': False,
+                'model': None, **(runs_meta or {}).get(ticker, {})}
+        write_partition(folder_path, run_id, run_date, ticker, frame, meta)
+    return run_id
+
+
+def import_history(folder_path, history, now=None):
+    """예측 기록(predicted_stock.csv 형식) 전체를 종목별 'imported' 실행 하나로 저장 (모델 버전 정보 없음)"""
+    now = now or datetime.now()
+    run_id = new_run_id(now)
+    tickers = [c[:-len('_Predicted')] for c in history.columns if c.endswith('_Predicted')]
+    for ticker in tickers:
+        frame = history[['날짜', f'{ticker}_Predicted', f'{ticker}_Actual']]
+        frame = frame[frame[f'{ticker}_Predicted'].notna()]
+        write_partition(folder_path, run_id, now.strftime('%Y-%m-%d'), ticker, frame,
+                        {'source': 'imported', 'created_at': now.strftime('%Y-%m-%d %H:%M:%S'), 'mode': 'imported',
+                         'replaces_history': True, 'model': None})
+    print(f"Imported {len(tickers)} tickers from the existing prediction history as run {run_id}")
+    return run_id
+
+
+def list_runs(folder_path, tickers=None, run_from=None, run_to=None):
+    """
+    파티션 폴더 이름만으로 고른 실행 목록 [(종목 폴더, 실행일, 실행 id, 경로)] (실행 id 순)
+    tickers: 종목명 목록, run_from / run_to: 실행일 범위 (YYYY-MM-DD, 양 끝 포함)
+    """
+    store_path = os.path.join(folder_path, STORE_DIR)
+    if not os.path.isdir(store_path):
+        return []
+    if tickers is None:
+        ticker_dirs = sorted(name for name in os.listdir(store_path) if name.startswith('ticker='))
+    else:
+        ticker_dirs = [f"ticker={_partition_name(t)}" for t in tickers]
+    runs = []
+    for ticker_dir in ticker_dirs:
+        ticker_path = os.path.join(store_path, ticker_dir)
+        if not os.path.isdir(ticker_path):
+            continue
+        for date_dir in os.listdir(ticker_path):
+            run_date = date_dir[len('run_date='):]
+            if (run_from and run_date < run_from) or (run_to and run_date > run_to):
+                continue
+            for run_dir in os.listdir(os.path.join(ticker_path, date_dir)):
+                runs.append((ticker_dir, run_date, run_dir[len('run='):],
+                             os.path.join(ticker_path, date_dir, run_dir)))
+    return sorted(runs, key=lambda run: (run[0], run[2]))
+
+
+def _read_partition(path, columns, mmap=True):
+    return {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode='r' if mmap else None) for c in columns}
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_predictions(folder_path, tickers=None, run_from=None, run_to=None, columns=COLUMNS, model=False):
+    """
+    실행별 예측을 긴 형식(한 행 = 실행 하나의 날짜 하나)으로 읽음, 예: 3월 실행의 구글 A 예측
+        read_predictions(folder_path, ['구글 A'], '2025-03-01', '2025-03-31', columns=['date', 'predicted'])
+    columns: 읽을 컬럼 (나머지 npy 파일은 열지 않음), model: 모델 버전 정보 컬럼 추가 (meta.json 을 읽음)
+    반환: run_id, run_date, ticker, [mode, fingerprint, trained_through, ...], columns 컬럼 DataFrame
+    """
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown prediction columns: {', '.join(unknown)} (available: {', '.join(COLUMNS)})")
+    frames = []
+    for ticker_dir, run_date, run_id, path in list_runs(folder_path, tickers, run_from, run_to):
+        values = _read_partition(path, columns)
+        rows = len(next(iter(values.values()))) if values else read_meta(path)['rows']
+        frame = {'run_id': np.repeat(run_id, rows), 'run_date': np.repeat(run_date, rows)}
+        if model or tickers is None:
+            meta = read_meta(path)
+            frame['ticker'] = np.repeat(meta['ticker'], rows)
+        else:
+            frame['ticker'] = np.repeat(next(t for t in tickers if f"ticker={_partition_name(t)}" == ticker_dir),
+                                        rows)
+        if model:
+            frame['mode'] = np.repeat(meta['mode'], rows)
+            for key in MODEL_FIELDS[:-1] + ('trained_through',):
+                frame[key] = np.repeat((meta.get('model') or {}).get(key), rows)
+        frame.update({c: np.asarray(v) for c, v in values.items()})
+        frames.append(pd.DataFrame(frame))
+    if not frames:
+        return pd.DataFrame(columns=['run_id', 'run_date', 'ticker', *columns])
+    return pd.concat(frames, ignore_index=True)
+
+
+def prediction_history(folder_path, tickers=None, run_to=None):
+    """
+    실행들을 합친 예측 기록 (predicted_stock.csv 와 같은 형식: 날짜, {종목}_Predicted, {종목}_Actual)
+    종목별로 마지막 전체 예측(replaces_history) 이후의 실행만 순서대로 덮어씀 (train_universe 의 병합과 같은 결과)
+    run_to: 이 실행일까지의 실행만 사용 (그날 기준으로 보고서를 다시 만들 때)
+    없으면 None
+    """
+    by_ticker = {}
+    for ticker_dir, _, _, path in list_runs(folder_path, tickers, run_to=run_to):
+        by_ticker.setdefault(ticker_dir, []).append(path)
+    frames = []
+    for paths in by_ticker.values():
+        selected = []
+        for path in reversed(paths):  # 최근 실행부터 마지막 전체 예측까지만 읽음
+            meta = read_meta(path)
+            selected.append(path)
+            if meta.get('replaces_history'):
+                break
+        ticker = meta['ticker']
+        parts = [pd.DataFrame(_read_partition(path, COLUMNS, mmap=False)) for path in reversed(selected)]
+        merged = pd.concat(parts).drop_duplicates('date', keep='last').set_index('date')
+        frames.append(merged.rename(columns={'predicted': f'{ticker}_Predicted', 'actual': f'{ticker}_Actual'}))
+    if not frames:
+        return None
+    history = pd.concat(frames, axis=1).sort_index()
+    history.index = pd.DatetimeIndex(history.index.astype('datetime64[ns]'), name='날짜')
+    return history.reset_index()
+
+
+if __name__ == '__main__':
+    # 예: python src/prediction_store.py 구글 A --from 2025-03-01 --to 2025-03-31
+    folder_path = os.path.join(os.getcwd(), "report")
+    args = sys.argv[1:]
+    options = {name: args[args.index(name) + 1] for name in ('--from', '--to') if name in args}
+    ticker = ' '.join(a for a in args if a not in options and a not in options.values()) or None
+    predictions = read_predictions(folder_path, [ticker] if ticker else None, options.get('--from'),
+                                   options.get('--to'), model=True)
+    if predictions.empty:
+        print("No stored predictions for the given filter")
+    else:
+        summary = predictions.groupby(['run_id', 'ticker']).agg(
+            run_date=('run_date', 'first'), mode=('mode', 'first'), trained_through=('trained_through', 'first'),
+            rows=('date', 'size'), first_date=('date', 'min'), last_date=('date', 'max'))
+        print(summary.reset_index().to_string(index=False))
@@ -0,0 +1,154 @@
+import html
+import json
+import math
+import os
+import re
+
+from news_store import parse_news_time
+
+# 시스템 프롬프트 토큰 예산 (로컬 추정치 기준), 뉴스는 나머지 섹션을 넣고 남은 만큼만 포함
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '4000'))
+NEWS_SUMMARY_CHARS = int(os.getenv('PROMPT_NEWS_SUMMARY_CHARS', '600'))  # 뉴스 요약 최대 글자 수
+FLOAT_DIGITS = 4  # 소수점 자리수 (가격/비율 표시에 충분한 정도)
+
+ROLE_SECTION = """[Role]
+You are a seasoned Wall Street analyst with 20 years of experience, specializing in ultra-short-term trading decisions."""
+
+METRIC_GUIDE = """[Stock Analysis]
+- MAE (Mean Absolute Error): Average absolute error between actual and predicted (lower is better, same unit as original data)
+- MSE (Mean Squared Error): Average of squared errors (lower is better)
+- RMSE (Root Mean Squared Error): Square root of MSE (lower is better, often used with MAE)
+- MAPE (Mean Absolute Percentage Error): Error as a percentage of the actual values (lower is better)
+- Accuracy (%): Computed as 100 - MAPE, serving as a simple accuracy measure
+- Rise_probability (%): represents the percentage change of the predicted future price relative to the last actual price. In other words, it represents the predicted price increase rate as a percentage."""
+
+MODEL_NOTE = ("Note: These predictions are derived from a deep learning model using a Transformer architecture "
+              "that predicts stock prices one week into the future. Consider the Transformer architecture prediction "
+              "as one input among many for your analysis.")
+
+TASK_SECTION = """[Task]
+Analyze the provided stock data and predict whether the stock will rise or fall in price over the next week. Provide a brief justification for your prediction, and recommend whether to buy, hold, or sell the stock."""
+
+USER_PROMPT = "Provide a one-week prediction and recommendation."
+
+
+def estimate_tokens(text):
+    """로컬 토큰 수 추정 (영문/숫자/기호 약 4글자당 1토큰, 한글 등 비 ASCII 문자는 글자당 1토큰)"""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return math.ceil((len(text) - non_ascii) / 4) + non_ascii
+
+
+def drop_empty(value):
+    """None, NaN, 빈 문자열/목록/dict 를 재귀적으로 제거하고 실수는 FLOAT_DIGITS 자리로 반올림"""
+    if isinstance(value, dict):
+        cleaned = {k: drop_empty(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, '', [], {})}
+    if isinstance(value, list):
+        cleaned = [drop_empty(v) for v in value]
+        return [v for v in cleaned if v not in (None, '', [], {})]
+    if isinstance(value, float):
+        return round(value, FLOAT_DIGITS) if math.isfinite(value) else None
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(value):
+    """공백 없는 JSON (한글은 이스케이프하지 않음)"""
+    return json.dumps(drop_empty(value), ensure_ascii=False, separators=(',', ':'))
+
+
+def _clean_text(text, max_chars=None):
+    text = re.sub(r'\s+', ' ', html.unescape(text or '')).strip()
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars].rsplit(' ', 1)[0] + '...'
+    return text
+
+
+def _title_key(title):
+    return re.sub(r'[^0-9a-z가-힣]+', '', title.lower())
+
+
+def prepare_news(news_data, summary_chars=NEWS_SUMMARY_CHARS):
+    """
+    뉴스 정리: 제목이 같은 기사 제거, 요약 정리/길이 제한, 종목 필드(파일 단위로 같은 값) 제거, 최신순 정렬
+    반환: (정리된 뉴스 목록, 제거된 중복 기사 수)
+    """
+    seen = set()
+    items = []
+    duplicates = 0
+    for item in sorted(news_data or [], key=lambda item: parse_news_time(item.get('date')), reverse=True):
+        title = _clean_text(item.get('title'))
+        key = _title_key(title) or _title_key(item.get('summary') or '')
+        if not key:
+            continue  # 제목/요약이 없는 기사 (중복 수에는 포함하지 않음)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        summary = _clean_text(item.get('summary'), summary_chars)
+        cleaned = {'date': item.get('date'), 'title': title, 'provider': item.get('provider'),
+                   'summary': summary if summary != title and summary != '콘텐츠 없음' else None}
+        items.append(drop_empty(cleaned))
+    return items, duplicates
+
+
+def fit_news(items, token_budget):
+    """순위대로 예산 안에 들어가는 기사만 포함 (들어가지 않는 긴 기사는 건너뛰고 다음 기사 시도)"""
+    kept = []
+    used = 2  # '[]'
+    for item in items:
+        size = estimate_tokens(compact_json(item)) + 1
+        if used + size > token_budget:
+            continue
+        kept.append(item)
+        used += size
+    return kept
+
+
+def build_prompt(stock_data, news_data, stock_info, price_data, token_budget=PROMPT_TOKEN_BUDGET):
+    """
+    토큰 예산에 맞춘 DeepSeek 요청 메시지 생성
+    뉴스 외 섹션은 압축 JSON 으로 모두 포함하고, 뉴스는 남은 예산만큼 최신순으로 포함
+    반환: (messages, 섹션별 추정 토큰 수 dict), 시스템 프롬프트가 예산을 넘으면 sizes['over_budget'] 이 True
+    """
+    stock_data = drop_empty(stock_data)
+    analysis = '\n'.join([
+        METRIC_GUIDE,
+        f"Stock: {stock_data.get('Stock')}",
+        f"Prediction: {compact_json({k: v for k, v in stock_data.items() if k != 'Stock'})}",
+        MODEL_NOTE,
+    ])
+    company = f"[Company Information]\n{compact_json(stock_info or {})}"
+    price = f"[Stock Price Data]\n{compact_json(price_data or {})}"
+
+    fixed = [ROLE_SECTION, analysis, company, price, TASK_SECTION]
+    news_items, duplicates = prepare_news(news_data)
+    # 뉴스 제목 줄은 실제로 쓰는 형식 그대로 (기사 수 자리수는 최대값 기준), 섹션 사이 빈 줄도 예산에 포함
+    header = f"[Recent Stock-Related News (Top {len(news_items)})]\n"
+    news_budget = (token_budget - sum(estimate_tokens(s) for s in fixed) - estimate_tokens(header)
+                   - estimate_tokens('\n\n' * len(fixed)))
+    kept = fit_news(news_items, max(news_budget, 0))
+    news = f"[Recent Stock-Related News (Top {len(kept)})]\n{compact_json(kept)}"
+
+    sections = {'role': ROLE_SECTION, 'analysis': analysis, 'news': news, 'company': company,
+                'price': price, 'task': TASK_SECTION}
+    system_prompt = '\n\n'.join(sections.values())
+    sizes = {name: estimate_tokens(text) for name, text in sections.items()}
+    sizes.update({'system': estimate_tokens(system_prompt), 'user': estimate_tokens(USER_PROMPT),
+                  'news_items': len(kept), 'news_available': len(news_items), 'news_duplicates': duplicates,
+                  'budget': token_budget})
+    sizes['over_budget'] = sizes['system'] > token_budget  # 뉴스 외 섹션만으로 예산을 넘은 경우
+    messages = [{"role": "system", "content": system_prompt},
+                {"role": "user", "content": USER_PROMPT}]
+    return messages, sizes
+
+
+def format_sizes(sizes):
+    """섹션별 토큰 수 한 줄 요약"""
+    sections = ', '.join(f"{name} {sizes[name]}" for name in ('role', 'analysis', 'news', 'company', 'price', 'task'))
+    summary = (f"~{sizes['system'] + sizes['user']} tokens ({sections}); "
+               f"news {sizes['news_items']}/{sizes['news_available']} items, {sizes['news_duplicates']} duplicates dropped")
+    if sizes.get('over_budget'):
+        summary += f"; over budget ({sizes['system']} > {sizes['budget']} system tokens, fixed sections alone exceed it)"
+    return summary
@@ -1,14 +1,27 @@
 import json
-from openai import OpenAI
 import os
+import sys
 from dotenv import load_dotenv
 
-# 딥시크 구매 판단은 한개의 종목만 있는 dl_report만 가능 dl_report에서 첫번째 종목을 분석하도록 설정되어 있습니다
-# DeepSeek API 설정
+from deepseek_batch import run_batch
+from fundamentals_cache import FundamentalsCache, get_all
+from news_store import NewsStore
+from prompt_builder import build_prompt, format_sizes
+from tracing import track_script
+from universe import ticker_by_name
+
+# 기본 실행은 dl_report 의 첫번째 종목만 분석, --batch (또는 ANALYZE_BATCH=1) 이면 dl_report 전체 종목을 동시에 분석
+# DeepSeek API 설정 (DEEPSEEK_URL 을 바꾸면 OpenAI 호환 로컬 서버로 테스트 가능)
 load_dotenv()
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
-DEEPSEEK_URL = "https://api.deepseek.com"
-client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_URL)
+DEEPSEEK_URL = os.getenv('DEEPSEEK_URL', "https://api.deepseek.com")
+# 일괄 분석 설정 (동시 요청 수, 요청당 타임아웃(초), 재시도 횟수, 분석할 종목)
+DEEPSEEK_CONCURRENCY = int(os.getenv('DEEPSEEK_CONCURRENCY', '4'))
+DEEPSEEK_TIMEOUT = float(os.getenv('DEEPSEEK_TIMEOUT', '300'))
+DEEPSEEK_MAX_RETRIES = int(os.getenv('DEEPSEEK_MAX_RETRIES', '4'))
+ANALYZE_TARGETS = os.getenv('ANALYZE_TARGETS', '')  # 쉼표로 구분한 한글 종목명, 비어 있으면 dl_report 전체
+NEWS_COUNT = 20  # 종목별 프롬프트에 넣을 최신 뉴스 수
+
 
 def load_news_data(news_path):
     """최근 20개 종목 뉴스 JSON 파일 로드"""
@@ -27,78 +40,111 @@ def load_stock_info(stock_info_path):
         stock_info = json.load(f)
     return stock_info
 
-def get_deepseek_recommendation(stock_data, news_data, stock_info):
-    """DeepSeek API 호출: 주가 데이터 + 뉴스 분석 + 기업 정보"""
-    system_prompt = f"""
-    [Role]
-    You are a seasoned Wall Street analyst with 20 years of experience, specializing in ultra-short-term trading decisions.
-
-    [Stock Analysis]
-    - MAE (Mean Absolute Error): Average absolute error between actual and predicted
-      (lower is better, same unit as original data)
-    - MSE (Mean Squared Error): Average of squared errors
-      (lower is better)
-    - RMSE (Root Mean Squared Error): Square root of MSE
-      (lower is better, often used with MAE)
-    - MAPE (Mean Absolute Percentage Error): Error as a percentage of the actual values
-      (lower is better)
-    - Accuracy (%): Computed as 100 - MAPE, serving as a simple accuracy measure
-    - Rise_probability (%): represents the percentage change of the predicted future price relative to the last actual price. In other words, it represents the predicted price increase rate as a percentage.
-    Stock: {stock_data['Stock']}
-    Last Actual Price: {stock_data['Last Actual Price']}
-    Predicted Future Price: {stock_data['Predicted Future Price']}
-    Rise Probability (%): {stock_data['Rise Probability (%)']}%
-    Accuacy (%): {stock_data['Accuracy (%)']}%
-    Technical Indicators: MAE = {stock_data['MAE']}, RMSE = {stock_data['RMSE']}, MAPE = {stock_data['MAPE (%)']}%
-    Note:  Note: These predictions are derived from a deep learning model using a Transformer architecture that predicts stock prices one week into the future. Consider the Transformer architecture prediction as one input among many for your analysis.
-
-    [Recent Stock-Related News (Top 20)]
-    {json.dumps(news_data, indent=4)}
-
-     [Company Information]
-    {json.dumps(stock_info, indent=4)}
-
-    [Stock Price Data]
-    {json.dumps(price_data, indent=4)}
-
-    [Task]
-    Analyze the provided stock data and predict whether the stock will rise or fall in price over the next week. Provide a brief justification for your prediction, and recommend whether to buy, hold, or sell the stock.
-    """
-    user_prompt = "Provide a one-week prediction and recommendation."
-    messages = [{"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}]
-
-    response = client.chat.completions.create(
-        model="deepseek-reasoner",
-        messages=messages,
-    )
-    reasoning_content = response.choices[0].message.reasoning_content
-    content = response.choices[0].message.content
-    print('resoning_content : ', reasoning_content)
+def build_messages(stock_data, news_data, stock_info, price_data, verbose=False):
+    """주가 데이터 + 뉴스 + 기업 정보 + 기술 지표로 DeepSeek 요청 메시지 생성 (PROMPT_TOKEN_BUDGET 토큰 이내)"""
+    messages, sizes = build_prompt(stock_data, news_data, stock_info, price_data)
+    if verbose or sizes['over_budget']:  # 예산 초과는 verbose 가 아니어도 출력
+        print(f"{stock_data['Stock']} prompt: {format_sizes(sizes)}")
+    return messages
+
+
+def get_deepseek_recommendation(stock_data, news_data, stock_info, price_data):
+    """DeepSeek API 호출: 주가 데이터 + 뉴스 분석 + 기업 정보 (같은 입력으로 다시 실행하면 캐시된 응답 사용)"""
+    messages = build_messages(stock_data, news_data, stock_info, price_data, verbose=True)
+    result, = run_batch([(stock_data['Stock'], messages)], DEEPSEEK_API_KEY, base_url=DEEPSEEK_URL,
+                        timeout=DEEPSEEK_TIMEOUT, max_retries=DEEPSEEK_MAX_RETRIES)
+    if result.status == 'failed':
+        print(f"DeepSeek 요청 실패 ({result.attempts}회 시도): {result.error}")
+        return
+    print('resoning_content : ', result.reasoning_content)
     print('===========================')
-    print('content : ', content)
+    print('content : ', result.content)
+
+
+def load_optional(path, default):
+    """종목별 입력 파일이 없으면 default"""
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def batch_requests(folder_path, stock_data_list, target_names=None):
+    """
+    dl_report 종목별 요청 메시지 목록 [(한글 종목명, messages)]
+    뉴스: 뉴스 저장소(report/news/)의 최신 NEWS_COUNT 개 (없으면 {티커}_news.json)
+    기업 정보: 기업 정보 캐시 (없으면 {티커}_info.json), 기술 지표: technical_indicators.json (없으면 {티커}_Moving_Average.json)
+    """
+    tickers = ticker_by_name()
+    indicators = {r['Stock']: r for r in load_optional(folder_path + '/technical_indicators.json', [])}
+    news_store = NewsStore(os.path.join(folder_path, "news"))
+    stock_data_list = [d for d in stock_data_list if not target_names or d['Stock'] in target_names]
+    # 기업 정보: 캐시가 있으면 오래된 값이라도 바로 사용하고 백그라운드에서 갱신
+    fundamentals, _ = get_all(FundamentalsCache(os.path.join(folder_path, "cache", "fundamentals")),
+                              [tickers[d['Stock']] for d in stock_data_list if d['Stock'] in tickers])
+    chat_requests = []
+    for stock_data in stock_data_list:
+        name = stock_data['Stock']
+        symbol = tickers.get(name, name)
+        price_data = indicators.get(name) or load_optional(folder_path + f'/{symbol}_Moving_Average.json', {})
+        news_data = news_store.latest(symbol, NEWS_COUNT) or load_optional(folder_path + f'/{symbol}_news.json', [])
+        stock_info = fundamentals.get(symbol) or load_optional(folder_path + f'/{symbol}_info.json', {})
+        chat_requests.append((name, build_messages(stock_data, news_data, stock_info, price_data, verbose=True)))
+    return chat_requests
+
+
+def analyze_all(folder_path, stock_data_list, target_names=None):
+    """dl_report 전체 종목을 동시에 분석하여 deepseek_recommendations.json 에 저장 (같은 입력은 캐시 사용)"""
+    chat_requests = batch_requests(folder_path, stock_data_list, target_names)
+    print(f"Analyzing {len(chat_requests)} stocks ({DEEPSEEK_CONCURRENCY} concurrent requests)...")
+    results = run_batch(chat_requests, DEEPSEEK_API_KEY, base_url=DEEPSEEK_URL, concurrency=DEEPSEEK_CONCURRENCY,
+                        timeout=DEEPSEEK_TIMEOUT, max_retries=DEEPSEEK_MAX_RETRIES,
+                        cache_dir=os.path.join(folder_path, "cache", "deepseek"))
+    recommendations = []
+    for result in results:
+        if result.status == 'failed':
+            print(f"{result.name} failed after {result.attempts} attempts: {result.error}")
+        else:
+            print(f"{result.name} done ({'cached' if result.status == 'cached' else f'{result.elapsed:.1f}s'})")
+        recommendations.append({'Stock': result.name, 'status': result.status, 'content': result.content,
+                                'reasoning_content': result.reasoning_content, 'error': result.error})
+    output_path = folder_path + '/deepseek_recommendations.json'
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(recommendations, f, ensure_ascii=False, indent=4)
+    cached = sum(r.status == 'cached' for r in results)
+    failed = sum(r.status == 'failed' for r in results)
+    print(f"Saved {len(results)} recommendations to {output_path} ({cached} cached, {failed} failed)")
+    return recommendations
+
 
 #######################
 # Main Code
 #######################
-# File path setting
-STOCK_SYMBOL = 'GOOGL' # 분석할 종목 데이터 주식 심볼
-folder_path = os.path.join(os.getcwd(), "report")
-news_path = folder_path + f'/{STOCK_SYMBOL}_news.json'
-stock_data_path = folder_path + f'/dl_report.json'
-stock_info_path = folder_path + f'/{STOCK_SYMBOL}_info.json'
-price_data_path = folder_path + f'/{STOCK_SYMBOL}_Moving_Average.json'
-
-# 데이터 로드
-news_data = load_news_data(news_path)
-stock_data_list = json.load(open(stock_data_path, 'r', encoding='utf-8'))
-stock_info = load_stock_info(stock_info_path)
-price_data = load_price_data(price_data_path)
-
-# 첫 번째 종목 데이터 사용 (필요에 따라 다른 종목 선택 가능)
-if stock_data_list:
-    stock_data = stock_data_list[0]
-    # 결과 저장 및 출력
-    get_deepseek_recommendation(stock_data, news_data, stock_info)
-else:
-    print("/dl_report.json 파일에 데이터가 없습니다.")
\ No newline at end of file
+if __name__ == '__main__':
+    trace = track_script('analyze')  # 시간/메모리/HTTP 기록 (report/trace.jsonl)
+    # File path setting
+    STOCK_SYMBOL = 'GOOGL' # 분석할 종목 데이터 주식 심볼
+    folder_path = os.path.join(os.getcwd(), "report")
+    news_path = folder_path + f'/{STOCK_SYMBOL}_news.json'
+    stock_data_path = folder_path + f'/dl_report.json'
+    stock_info_path = folder_path + f'/{STOCK_SYMBOL}_info.json'
+    price_data_path = folder_path + f'/{STOCK_SYMBOL}_Moving_Average.json'
+
+    stock_data_list = json.load(open(stock_data_path, 'r', encoding='utf-8'))
+    batch = '--batch' in sys.argv or os.getenv('ANALYZE_BATCH', '').lower() in ('1', 'true', 'yes')
+
+    if not stock_data_list:
+        print("/dl_report.json 파일에 데이터가 없습니다.")
+    elif batch:
+        targets = [t.strip() for t in ANALYZE_TARGETS.split(',') if t.strip()] or None
+        trace.output(analyze_all(folder_path, stock_data_list, targets))
+    else:
+        # 데이터 로드
+        news_data = load_news_data(news_path)
+        stock_info = load_stock_info(stock_info_path)
+        price_data = load_price_data(price_data_path)
+
+        # 첫 번째 종목 데이터 사용 (필요에 따라 다른 종목 선택 가능)
+        stock_data = stock_data_list[0]
+        # 결과 저장 및 출력
+        get_deepseek_recommendation(stock_data, news_data, stock_info, price_data)
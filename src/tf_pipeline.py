@@ -0,0 +1,39 @@
+import numpy as np
+import tensorflow as tf
+
+from windowing import window_positions
+
+
+def window_dataset(values, lookback, horizon, n_stock, batch_size=32, training=True,
+                   shuffle=True, seed=None, stride=1, start=None, drop_remainder=False):
+    """
+    기본 시계열(float32, (행, 특성))에서 배치마다 윈도우를 바로 만들어 주는 tf.data 파이프라인
+    - 전체 윈도우 텐서를 미리 만들지 않으므로 메모리는 배치 크기에 비례
+    - 앞 n_stock 개 특성이 주식 입력(정답), 나머지가 경제 지표 입력
+    training: True 이면 ((주식, 경제), 정답) / False 이면 전체 예측용 ((주식, 경제),)
+              (윈도우 기준 행은 windowing.window_positions 와 동일)
+    start: 기준 행이 start 이상인 윈도우만 사용 (새로 추가된 날짜만 학습/예측할 때)
+    drop_remainder: 마지막 작은 배치를 버려 배치 모양을 고정 (학습 함수를 배치 모양마다 다시 trace 하지 않음)
+    """
+    values = np.asarray(values, dtype=np.float32)
+    n_rows = len(values)
+    positions = window_positions(n_rows, lookback, horizon if training else 0, stride, start)
+    series = tf.constant(values)
+    offsets = tf.range(-lookback, 0, dtype=tf.int64)
+
+    dataset = tf.data.Dataset.from_tensor_slices(positions.astype(np.int64))
+    if training and shuffle:
+        # 기준 행 번호만 섞으므로 버퍼 전체를 잡아도 메모리 부담이 작음
+        dataset = dataset.shuffle(len(positions), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size, drop_remainder=drop_remainder)
+
+    def to_windows(batch_positions):
+        windows = tf.gather(series, batch_positions[:, None] + offsets)  # (배치, lookback, 특성)
+        inputs = (windows[:, :, :n_stock], windows[:, :, n_stock:])
+        if not training:
+            return (inputs,)  # Keras 가 (주식, 경제) 를 (입력, 정답) 으로 해석하지 않도록 한번 더 감쌈
+        targets = tf.gather(series[:, :n_stock], batch_positions + horizon - 1)
+        return inputs, targets
+
+    dataset = dataset.map(to_windows, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
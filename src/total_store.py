@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# report/total/ 아래에 저장되는 파일
+STORE_DIR = "total"
+VALUES_FILE = "values.npy"  # float32 (행: 날짜, 열: 지표), 열 단위로 연속(Fortran order)
+INDEX_FILE = "index.npy"  # datetime64[D] 날짜 인덱스
+SCHEMA_FILE = "schema.json"  # 컬럼 이름(한글), dtype, 행/열 수
+CSV_FILE = "total.csv"
+INDEX_NAME = "날짜"
+
+
+def _atomic_save(path, array):
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def write_total(df, folder_path, export_csv=True, store_dir=STORE_DIR, metadata=None):
+    """
+    결합된 데이터프레임을 float32 npy 번들 + 스키마(json)로 저장
+    - 값은 저장 시점에 숫자로 변환 (FRED '.' 등 숫자가 아닌 값은 NaN)
+    - export_csv 이면 사람이 보기 위한 total.csv (utf-8-sig) 도 함께 저장 (번들 저장 후)
+    store_dir: report/ 아래 번들 폴더 (feature_store 는 features), metadata: 스키마에 함께 저장할 값
+    """
+    store_path = os.path.join(folder_path, store_dir)
+    if not os.path.exists(store_path):
+        os.makedirs(store_path)
+
+    df = df.sort_index()
+    values = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32)
+    index = pd.DatetimeIndex(df.index).tz_localize(None).to_numpy().astype('datetime64[D]')
+
+    _atomic_save(os.path.join(store_path, VALUES_FILE), np.asfortranarray(values))
+    _atomic_save(os.path.join(store_path, INDEX_FILE), index)
+    schema = {
+        'columns': [str(c) for c in df.columns],
+        'index_name': INDEX_NAME,
+        'dtype': 'float32',
+        'rows': int(values.shape[0]),
+        'cols': int(values.shape[1]),
+        'first_date': str(index[0]) if len(index) else None,
+        'last_date': str(index[-1]) if len(index) else None,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        **(metadata or {}),
+    }
+    # 스키마를 마지막에 교체하여 읽는 쪽이 항상 짝이 맞는 파일을 보도록 함
+    tmp_path = os.path.join(store_path, SCHEMA_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, os.path.join(store_path, SCHEMA_FILE))
+
+    if export_csv:
+        df.to_csv(os.path.join(folder_path, CSV_FILE), index_label=INDEX_NAME, encoding='utf-8-sig')
+    return store_path
+
+
+def load_schema(folder_path, store_dir=STORE_DIR):
+    """번들 스키마 로드 (없으면 None)"""
+    schema_path = os.path.join(folder_path, store_dir, SCHEMA_FILE)
+    if not os.path.exists(schema_path):
+        return None
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_total(folder_path, columns=None, mmap=True, store_dir=STORE_DIR):
+    """
+    total 데이터를 float32 DataFrame(날짜 인덱스)으로 로드
+    - mmap 이면 값 배열을 메모리 맵으로 열어 필요한 열만 읽음 (읽기 전용)
+    - 번들이 없으면 total.csv 를 읽어 숫자로 변환 (이전 버전 호환)
+    columns: 읽을 컬럼 목록 (None 이면 전체)
+    """
+    schema = load_schema(folder_path, store_dir)
+    if schema is None and store_dir != STORE_DIR:
+        raise FileNotFoundError(f"No bundle in {os.path.join(folder_path, store_dir)}")
+    if schema is None:
+        csv_path = os.path.join(folder_path, CSV_FILE)
+        data = pd.read_csv(csv_path, parse_dates=[INDEX_NAME], index_col=INDEX_NAME, encoding='utf-8-sig')
+        if columns is not None:
+            data = data[columns]
+        return data.apply(pd.to_numeric, errors='coerce').astype(np.float32)
+
+    store_path = os.path.join(folder_path, store_dir)
+    values = np.load(os.path.join(store_path, VALUES_FILE), mmap_mode='r' if mmap else None)
+    index = pd.DatetimeIndex(np.load(os.path.join(store_path, INDEX_FILE)).astype('datetime64[ns]'),
+                             name=schema['index_name'])
+    all_columns = schema['columns']
+    if columns is not None:
+        positions = [all_columns.index(c) for c in columns]
+        # Fortran order 이므로 열 단위 읽기는 연속된 구간만 접근
+        values = values[:, positions]
+    else:
+        columns = all_columns
+    return pd.DataFrame(values, index=index, columns=list(columns), copy=False)
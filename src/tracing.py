@@ -0,0 +1,225 @@
+import atexit
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from datetime import datetime
+
+# 실행 기록 (report/trace.jsonl, 한 줄에 이벤트 하나: 단계 / 학습 epoch)
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join(os.getcwd(), "report", "trace.jsonl"))
+TRACE_ENABLED = os.getenv('TRACE_ENABLED', '1').lower() in ('1', 'true', 'yes')
+# 같은 실행에서 나온 이벤트를 묶는 id (pipeline.py 가 단계 프로세스에 같은 값을 넘겨줌)
+RUN_ID = os.getenv('TRACE_RUN_ID') or f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+
+_http_calls = []  # (서비스, 소요 시간(초), 응답 크기(바이트) 또는 None, 성공 여부), 스레드에서 append 만 함
+_write_lock = threading.Lock()
+
+
+def record_http(service, elapsed, nbytes=None, ok=True):
+    """HTTP 요청 하나 기록 (service: 'fred' / 'yahoo' / 'deepseek')"""
+    if TRACE_ENABLED:
+        _http_calls.append((service, elapsed, nbytes, ok))
+
+
+@contextlib.contextmanager
+def timed_http(service):
+    """with 블록을 HTTP 요청 하나로 기록 (예외가 나면 실패로 기록하고 다시 발생), 응답 크기는 call['bytes'] 에 지정"""
+    call = {'bytes': None}
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        record_http(service, time.perf_counter() - started, call['bytes'], ok=False)
+        raise
+    record_http(service, time.perf_counter() - started, call['bytes'])
+
+
+def _percentile(sorted_values, q):
+    # 최근접 순위 백분위수
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+def http_summary(calls):
+    """서비스별 요청 수, 실패 수, 응답 크기 합계, 지연 시간 백분위수(ms)"""
+    summary = {}
+    for service in sorted({call[0] for call in calls}):
+        latencies = sorted(call[1] for call in calls if call[0] == service)
+        sizes = [call[2] for call in calls if call[0] == service and call[2] is not None]
+        summary[service] = {
+            'count': len(latencies),
+            'errors': sum(1 for call in calls if call[0] == service and not call[3]),
+            'bytes': sum(sizes) if sizes else None,
+            'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(_percentile(latencies, 95) * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1),
+        }
+    return summary
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    # Linux 는 KB, macOS 는 바이트 단위
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def write_event(event, trace_file=None):
+    """이벤트 한 줄 추가 (여러 프로세스가 같은 파일에 추가해도 줄 단위로 기록됨)"""
+    if not TRACE_ENABLED:
+        return
+    trace_file = trace_file or TRACE_FILE
+    event = {'run_id': RUN_ID, 'pid': os.getpid(), **event}
+    line = json.dumps(event, ensure_ascii=False, default=str) + '\n'
+    with _write_lock:
+        if not os.path.exists(os.path.dirname(trace_file)):
+            os.makedirs(os.path.dirname(trace_file), exist_ok=True)
+        with open(trace_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+class StageTrace:
+    """단계 하나의 측정 값 (with stage(...) as s: ... s.output(df))"""
+
+    def __init__(self, name, **fields):
+        self.name = name
+        self.fields = fields
+        self.started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._http_start = len(_http_calls)
+        self.status = 'ok'
+
+    def output(self, data=None, rows=None, columns=None):
+        """단계 결과 크기 기록 (DataFrame/배열은 shape 에서, 목록은 길이에서)"""
+        shape = getattr(data, 'shape', None)
+        if shape is not None:
+            rows, columns = shape[0], (shape[1] if len(shape) > 1 else 1)
+        elif data is not None:
+            rows = len(data)
+        self.fields.update({k: v for k, v in (('rows', rows), ('columns', columns)) if v is not None})
+
+    def fail(self, error):
+        """단계를 실패로 표시 (finish 에서 status 를 지정하지 않으면 'failed' 로 기록)"""
+        self.status = 'failed'
+        self.fields['error'] = error
+
+    def finish(self, status=None, **fields):
+        status = status or self.status
+        self.fields.update(fields)
+        event = {'type': 'stage', 'name': self.name, 'status': status, 'started_at': self.started_at,
+                 'wall': round(time.perf_counter() - self._wall, 4),
+                 'cpu': round(time.process_time() - self._cpu, 4),  # 프로세스 전체 스레드 합계
+                 'peak_rss_mb': _peak_rss_mb()}  # 프로세스 시작 후 최대값
+        http = http_summary(_http_calls[self._http_start:])
+        if http:
+            event['http'] = http
+        event.update(self.fields)
+        write_event(event)
+        return event
+
+
+@contextlib.contextmanager
+def stage(name, **fields):
+    """with 블록을 단계 하나로 기록 (예외가 나면 status 'failed' 로 기록하고 다시 발생)"""
+    trace = StageTrace(name, **fields)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.finish('failed', error=f"{type(e).__name__}: {e}")
+        raise
+    trace.finish()
+
+
+def track_script(name):
+    """
+    스크립트 전체를 단계 하나로 기록 (프로세스 종료 시 기록)
+    하위 프로세스(학습 워커 등)의 CPU 시간과 최대 메모리도 함께 기록
+    처리되지 않은 예외는 status 'failed' 로 기록 (SystemExit 로 종료할 때는 먼저 trace.fail(...) 호출)
+    """
+    trace = StageTrace(name)
+    children_cpu = sum(resource.getrusage(resource.RUSAGE_CHILDREN)[:2])
+    previous_hook = sys.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        trace.fail(f"{exc_type.__name__}: {exc}")
+        previous_hook(exc_type, exc, tb)
+
+    def finish():
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        trace.finish(children_cpu=round(usage.ru_utime + usage.ru_stime - children_cpu, 4),
+                     children_peak_rss_mb=_peak_rss_mb(resource.RUSAGE_CHILDREN))
+
+    sys.excepthook = excepthook
+    atexit.register(finish)
+    return trace
+
+
+def epoch_callback(name, samples, steps=None):
+    """
+    학습 epoch 마다 소요 시간, 처리량(samples/s, steps/s), loss 를 기록하는 Keras 콜백
+    samples: epoch 당 학습 윈도우 수, steps: epoch 당 배치 수 (없으면 steps/s 는 기록하지 않음)
+    """
+    from tensorflow.keras.callbacks import Callback
+
+    class EpochTrace(Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self._started = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            wall = time.perf_counter() - self._started
+            logs = logs or {}
+            event = {'type': 'epoch', 'name': name, 'epoch': epoch + 1, 'wall': round(wall, 4),
+                     'samples': samples, 'samples_per_second': round(samples / wall, 1) if wall else None,
+                     'loss': float(logs.get('loss', float('nan')))}
+            if steps:
+                event.update(steps=steps, steps_per_second=round(steps / wall, 2) if wall else None)
+            if 'val_loss' in logs:
+                event['val_loss'] = float(logs['val_loss'])
+            write_event(event)
+
+    return EpochTrace()
+
+
+def load_events(run_id=None, trace_file=None):
+    """run_id 의 이벤트 목록 (None 이면 마지막 실행)"""
+    trace_file = trace_file or TRACE_FILE
+    if not os.path.exists(trace_file):
+        return []
+    with open(trace_file, 'r', encoding='utf-8') as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    if run_id is None and events:
+        run_id = events[-1]['run_id']
+    return [event for event in events if event['run_id'] == run_id]
+
+
+def format_summary(events):
+    """단계별 요약 표 (시간, CPU, 최대 메모리, HTTP, 결과 크기) + 학습 epoch 처리량"""
+    lines = [f"{'stage':<24}{'wall(s)':>9}{'cpu(s)':>9}{'rss(MB)':>9}{'rows x cols':>14}  http"]
+    for event in (e for e in events if e['type'] == 'stage'):
+        http = ', '.join(f"{service} {h['count']}x p50 {h['p50_ms']:.0f}ms p95 {h['p95_ms']:.0f}ms"
+                         + (f" {h['bytes'] / 1e6:.1f}MB" if h['bytes'] else '')
+                         for service, h in event.get('http', {}).items())
+        shape = f"{event['rows']} x {event.get('columns', '-')}" if 'rows' in event else '-'
+        name = event['name'] + ('' if event['status'] == 'ok' else f" ({event['status']})")
+        lines.append(f"{name:<24}{event['wall']:>9.2f}{event['cpu']:>9.2f}{event['peak_rss_mb']:>9.1f}"
+                     f"{shape:>14}  {http or '-'}")
+    epochs = [e for e in events if e['type'] == 'epoch' and e['samples_per_second']]
+    if epochs:
+        rates = sorted(e['samples_per_second'] for e in epochs)
+        lines.append(f"training: {len(epochs)} epochs over {len({e['name'] for e in epochs})} models, "
+                     f"median {_percentile(rates, 50):,.1f} samples/s (min {rates[0]:,.1f}, max {rates[-1]:,.1f})")
+        step_rates = sorted(e['steps_per_second'] for e in epochs if e.get('steps_per_second'))
+        if step_rates:
+            lines[-1] += f", median {_percentile(step_rates, 50):,.2f} steps/s"
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    run_events = load_events(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not run_events:
+        print(f"No trace events found in {TRACE_FILE}")
+    else:
+        print(f"Run {run_events[0]['run_id']}")
+        print(format_summary(run_events))
@@ -0,0 +1,189 @@
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from cpu_training import TRAIN_INTER_OP_THREADS, configure_threads, scaled_learning_rate, training_mode
+from incremental_inference import (load_prediction_history, prediction_start, prediction_frame,
+                                   merge_predictions, save_predictions)
+from model_cache import shared_econ_scaler
+from prediction_store import append_run, model_version, read_checkpoint_meta
+from total_store import read_total
+from tracing import track_script
+
+# 병렬 학습 설정 (프로세스 수, 프로세스당 TensorFlow 스레드 수, 학습할 종목)
+TRAIN_WORKERS = int(os.getenv('TRAIN_WORKERS', str(max(1, (os.cpu_count() or 1) // 4))))
+TRAIN_THREADS_PER_WORKER = int(os.getenv('TRAIN_THREADS_PER_WORKER', '4'))
+TRAIN_TARGETS = os.getenv('TRAIN_TARGETS', '')  # 쉼표로 구분한 한글 종목명, 비어 있으면 전체 종목
+TRAIN_EPOCHS = int(os.getenv('TRAIN_EPOCHS', '50'))
+
+_econ_scaled = None  # 워커 프로세스마다 메모리 맵으로 연 공유 경제 지표 (스케일된 float32, 읽기 전용)
+_econ_scaler = None
+_dates = None
+
+
+def load_training_data(folder_path):
+    """total 데이터 로드 후 결측치 처리 (학습 셀과 동일: ffill -> bfill -> dropna)"""
+    return clean_training_data(read_total(folder_path))
+
+
+def clean_training_data(data):
+    """결측치 처리: 값이 하나도 없는 컬럼 제외 후 ffill -> bfill -> dropna"""
+    data = data.dropna(axis=1, how='all')  # 수집 실패로 값이 하나도 없는 컬럼 제외
+    data = data.ffill().bfill()
+    return data.dropna()
+
+
+def _worker_init(threads, inter_op_threads, econ_path, econ_scaler, dates_path):
+    """워커 프로세스 초기화: TensorFlow 스레드 수 제한, 공유 경제 지표 메모리 맵 열기"""
+    global _econ_scaled, _econ_scaler, _dates
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    configure_threads(threads, inter_op_threads)
+    _econ_scaled = np.load(econ_path, mmap_mode='r')
+    _econ_scaler = econ_scaler
+    _dates = np.load(dates_path)
+
+
+def _train_one(column, stock_values, predict_start, train_params):
+    """
+    종목 하나 학습 후 예측 (실패해도 예외 대신 결과로 반환)
+    유효한 체크포인트가 있으면 새로 추가된 윈도우로만 fine-tuning (model_cache), 전체 학습은 train_params['training'] 방식
+    predict_start: 예측 기록에 없는 첫 행 (처음부터 다시 학습한 경우에는 전체 기간 예측)
+    """
+    from model_cache import train_with_checkpoint
+    from transformer_model import predict_range
+
+    started = time.time()
+    try:
+        model, stock_scaler, window_values, info = train_with_checkpoint(column, stock_values, _econ_scaled,
+                                                                         _econ_scaler, _dates, **train_params)
+        lookback = train_params['lookback']
+        start = lookback if info['mode'] == 'full' or predict_start is None else max(lookback, predict_start)
+        predicted = predict_range(model, window_values, lookback, 1, start,
+                                  batch_size=train_params['batch_size'])
+        return {
+            'column': column,
+            'status': 'ok',
+            'start': start,
+            'predicted': stock_scaler.inverse_transform(predicted)[:, 0] if len(predicted) else predicted[:, 0],
+            'mode': info['mode'],
+            'reason': info['reason'],
+            'fit': info['fit'],
+            'checkpoint': info['checkpoint'],
+            'elapsed': time.time() - started,
+        }
+    except Exception as e:
+        return {
+            'column': column,
+            'status': 'failed',
+            'error': f"{type(e).__name__}: {e}",
+            'traceback': traceback.format_exc(),
+            'elapsed': time.time() - started,
+        }
+
+
+def train_universe(folder_path, target_columns=None, workers=TRAIN_WORKERS,
+                   threads_per_worker=TRAIN_THREADS_PER_WORKER, **train_params):
+    """
+    종목별 모델을 프로세스 풀에서 병렬 학습하고 predicted_stock.csv 에 새 예측 추가
+    - 경제 지표는 한번만 스케일링(model_cache.shared_econ_scaler)하여 npy 파일로 저장, 모든 워커가 메모리 맵으로 공유
+    - 종목별 체크포인트(report/models/)가 유효하면 warm-start 후 새 윈도우로만 fine-tuning
+    - 기존 예측 기록 이후의 날짜만 예측하여 추가 (전체 재학습한 종목은 전체 기간 다시 예측)
+    - 한 종목이 실패해도 나머지 종목은 계속 진행, 실패 종목은 결과로 반환
+    - 전체 학습 방식은 TRAIN_MODE (cpu_training.training_mode): cpu 이면 큰 배치 + 조정된 학습률 + early stopping
+    반환: (예측 기록 DataFrame, 실패한 종목 결과 목록)
+    """
+    from transformer_model import (economic_features, LOOKBACK, FORECAST_HORIZON, NUM_HEADS, FF_DIM,
+                                   LEARNING_RATE, EPOCHS, BATCH_SIZE)
+
+    training = train_params.pop('training', None) or training_mode()
+    train_params = {'lookback': LOOKBACK, 'forecast_horizon': FORECAST_HORIZON, 'num_heads': NUM_HEADS,
+                    'ff_dim': FF_DIM, 'epochs': EPOCHS, 'batch_size': training.batch_size,
+                    'learning_rate': scaled_learning_rate(LEARNING_RATE, training.batch_size, BATCH_SIZE,
+                                                          training.lr_scaling),
+                    'model_dir': os.path.join(folder_path, "models"), 'training': training, **train_params}
+    data = load_training_data(folder_path)
+    econ_columns = [c for c in economic_features if c in data.columns]
+    if target_columns is None:
+        target_columns = [c for c in data.columns if c not in economic_features]
+    missing = [c for c in target_columns if c not in data.columns]
+    if missing:
+        print(f"Skipping {len(missing)} targets not found in total data: {', '.join(missing)}")
+    target_columns = [c for c in target_columns if c in data.columns]
+
+    train_params['econ_columns'] = econ_columns
+
+    # 스케일된 경제 지표, 날짜를 공유 파일로 저장 (워커는 읽기 전용 메모리 맵으로 사용, 자기 종목 컬럼만 스케일링)
+    cache_path = os.path.join(folder_path, "cache", "train")
+    if not os.path.exists(cache_path):
+        os.makedirs(cache_path)
+    econ_path = os.path.join(cache_path, "econ_values.npy")
+    dates_path = os.path.join(cache_path, "dates.npy")
+    econ_values = data[econ_columns].to_numpy(dtype=np.float64)
+    econ_scaler, refit_reason = shared_econ_scaler(econ_values, econ_columns, train_params['model_dir'])
+    if refit_reason:
+        print(f"Fitted shared economic scaler ({refit_reason})")
+    np.save(econ_path, econ_scaler.transform(econ_values).astype(np.float32))
+    dates = data.index.to_numpy()
+    np.save(dates_path, dates)
+    history = load_prediction_history(folder_path)
+
+    results = {}
+    print(f"Training {len(target_columns)} targets on {workers} workers x {threads_per_worker} threads "
+          f"({training.name} mode, batch {train_params['batch_size']}, learning rate {train_params['learning_rate']:g})...")
+    context = multiprocessing.get_context('spawn')  # TensorFlow 는 fork 된 프로세스에서 안전하지 않음
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_worker_init,
+                             initargs=(threads_per_worker, TRAIN_INTER_OP_THREADS, econ_path, econ_scaler,
+                                       dates_path)) as executor:
+        futures = {
+            executor.submit(_train_one, col, data[col].to_numpy(dtype=np.float64),
+                            prediction_start(history, col, dates), train_params): col
+            for col in target_columns
+        }
+        for future in as_completed(futures):
+            col = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # 워커 프로세스가 비정상 종료된 경우 등
+                result = {'column': col, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+            results[col] = result
+            if result['status'] == 'ok':
+                if result['mode'] == 'full':
+                    fit = result['fit']
+                    detail = (f"full training: {result['reason']}, {fit['epochs']} epochs, "
+                              f"{fit['steps_per_second']} steps/s")
+                else:
+                    detail = {'finetune': "fine-tuned", 'cached': "checkpoint up to date"}[result['mode']]
+                print(f"[{len(results)}/{len(target_columns)}] {col} done ({detail}, {result['elapsed']:.1f}s)")
+            else:
+                print(f"[{len(results)}/{len(target_columns)}] {col} failed: {result['error']}")
+
+    # 학습 셀과 같은 형식(날짜, {종목}_Predicted, {종목}_Actual)으로 기존 기록에 병합
+    updates = [prediction_frame(col, dates, data[col].to_numpy(), results[col]['start'], results[col]['predicted'])
+               for col in target_columns if results[col]['status'] == 'ok']
+    full_retrained = [col for col in target_columns if results[col]['status'] == 'ok' and results[col]['mode'] == 'full']
+    result_data = merge_predictions(history, updates, replace_columns=full_retrained)
+    output_file_path = save_predictions(folder_path, result_data)
+    print(f"Predicted stock returns saved to {output_file_path}")
+    # 실행별 예측 기록 (전체 재학습한 종목은 이전 실행의 예측을 대체), 저장소가 비어 있으면 기존 기록부터 옮김
+    runs_meta = {col: {'mode': results[col]['mode'], 'replaces_history': results[col]['mode'] == 'full',
+                       'model': model_version(read_checkpoint_meta(results[col]['checkpoint']))}
+                 for col in target_columns if results[col]['status'] == 'ok'}
+    run_id = append_run(folder_path, updates, 'train', runs_meta, history=history)
+    print(f"Recorded run {run_id} in {os.path.join(folder_path, 'predictions')}")
+
+    failed = [results[col] for col in target_columns if results[col]['status'] != 'ok']
+    if failed:
+        print(f"Failed {len(failed)} targets: " + ", ".join(r['column'] for r in failed))
+    return result_data, failed
+
+
+if __name__ == '__main__':
+    folder_path = os.path.join(os.getcwd(), "report")
+    trace = track_script('train')  # 시간/메모리/학습 워커 CPU 기록 (epoch 별 처리량은 워커에서 기록)
+    targets = [t.strip() for t in TRAIN_TARGETS.split(',') if t.strip()] or None
+    result_data, _ = train_universe(folder_path, targets, epochs=TRAIN_EPOCHS)
+    trace.output(result_data)
@@ -0,0 +1,82 @@
+import numpy as np
+from tensorflow.keras.models import Model
+from tensorflow.keras.layers import (
+    Input, Dense, Dropout, LayerNormalization, MultiHeadAttention, Add, GlobalAveragePooling1D
+)
+from tensorflow.keras.optimizers import Adam
+
+from feature_columns import economic_features
+from tf_pipeline import window_dataset
+
+# 학습 기본 설정 (main.ipynb 학습 셀과 동일)
+LOOKBACK = 90  # 과거 90일을 기준으로 주가 예측
+FORECAST_HORIZON = 7  # 예측 기간 (7일 후를 예측)
+NUM_HEADS = 8
+FF_DIM = 256
+LEARNING_RATE = 0.0001
+EPOCHS = 50
+BATCH_SIZE = 32
+
+
+# Transformer Encoder 정의
+def transformer_encoder(inputs, num_heads, ff_dim, dropout=0.1):
+    attention_output = MultiHeadAttention(num_heads=num_heads, key_dim=inputs.shape[-1])(inputs, inputs)
+    attention_output = Dropout(dropout)(attention_output)
+    attention_output = Add()([inputs, attention_output])
+    attention_output = LayerNormalization(epsilon=1e-6)(attention_output)
+
+    ffn = Dense(ff_dim, activation="relu")(attention_output)
+    ffn = Dense(inputs.shape[-1])(ffn)
+    ffn_output = Dropout(dropout)(ffn)
+    ffn_output = Add()([attention_output, ffn_output])
+    ffn_output = LayerNormalization(epsilon=1e-6)(ffn_output)
+
+    return ffn_output
+
+
+# Transformer 모델 정의 2중입력 transformer 모델
+def build_transformer_with_two_inputs(stock_shape, econ_shape, num_heads, ff_dim, target_size):
+    #주식 데이터 처리
+    stock_inputs = Input(shape=stock_shape)
+    stock_encoded = stock_inputs
+    for _ in range(4):  # 4개의 Transformer Layer
+        stock_encoded = transformer_encoder(stock_encoded, num_heads=num_heads, ff_dim=ff_dim)
+    stock_encoded = Dense(64, activation="relu")(stock_encoded)
+
+    #경제 데이터 처리
+    econ_inputs = Input(shape=econ_shape)
+    econ_encoded = econ_inputs
+    for _ in range(4):  # 4개의 Transformer Layer
+        econ_encoded = transformer_encoder(econ_encoded, num_heads=num_heads, ff_dim=ff_dim)
+    econ_encoded = Dense(64, activation="relu")(econ_encoded)
+
+    merged = Add()([stock_encoded, econ_encoded])
+    merged = Dense(128, activation="relu")(merged)
+    merged = Dropout(0.2)(merged)
+    merged = GlobalAveragePooling1D()(merged)
+    outputs = Dense(target_size)(merged)
+
+    return Model(inputs=[stock_inputs, econ_inputs], outputs=outputs)
+
+
+def compile_model(lookback, n_targets, n_econ, num_heads=NUM_HEADS, ff_dim=FF_DIM,
+                  learning_rate=LEARNING_RATE, jit_compile=False):
+    """학습 셀과 같은 설정(Adam, mse)으로 컴파일된 2중입력 모델 생성 (jit_compile: XLA 컴파일)"""
+    model = build_transformer_with_two_inputs((lookback, n_targets), (lookback, n_econ),
+                                              num_heads=num_heads, ff_dim=ff_dim, target_size=n_targets)
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mse', metrics=['mae'], jit_compile=jit_compile)
+    return model
+
+
+def predict_range(model, window_values, lookback, n_targets, start=None, end=None, batch_size=BATCH_SIZE):
+    """
+    기준 행 start <= i < end 인 윈도우만 예측 (스케일된 값, (윈도우 수, 종목 수))
+    window_values: 앞 n_targets 개 열이 주식, 나머지가 경제 지표인 스케일된 배열
+    """
+    end = len(window_values) if end is None else min(end, len(window_values))
+    first = lookback if start is None else max(lookback, start)
+    if end <= first:
+        return np.empty((0, n_targets), dtype=np.float32)
+    dataset = window_dataset(window_values[:end], lookback, 0, n_targets, batch_size=batch_size,
+                             training=False, start=first)
+    return model.predict(dataset, verbose=0)
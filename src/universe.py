@@ -0,0 +1,43 @@
+# 나스닥 100 상위 종목 티커 리스트와 한글 이름
+nasdaq_top_100 = [
+    ("AAPL", "애플"), ("MSFT", "마이크로소프트"), ("AMZN", "아마존"), ("GOOGL", "구글 A"),
+    ("GOOG", "구글 C"), ("META", "메타"), ("TSLA", "테슬라"), ("NVDA", "엔비디아"), ("PYPL", "페이팔"),
+    ("ADBE", "어도비"), ("NFLX", "넷플릭스")
+
+    , ("CMCSA", "컴캐스트"), ("PEP", "펩시코"),
+    ("INTC", "인텔"), ("CSCO", "시스코"), ("AVGO", "브로드컴"), ("TXN", "텍사스 인스트루먼트"),
+    ("QCOM", "퀄컴"), ("COST", "코스트코"), ("AMGN", "암젠")
+
+    , ("CHTR", "차터 커뮤니케이션"),
+    ("SBUX", "스타벅스"), ("AMD", "AMD")
+    , ("MDLZ", "몬델리즈"), ("INTU", "인트윗"),
+    ("ISRG", "인튜이티브 서지컬"), ("BKNG", "부킹홀딩스"), ("ADP", "ADP"),
+    ("VRTX", "버텍스"), ("MU", "마이크론"), ("AMAT", "어플라이드 머티리얼즈"), ("REGN", "리제네론"),
+    ("LRCX", "램 리서치"), ("KDP", "케우리그 닥터페퍼"), 
+    ("FISV.VI", "피서브"),
+    ("CSX", "CSX"),
+    ("GILD", "길리어드 사이언스"), ("MELI", "메르카도 리브레"), ("SNPS", "시놉시스"),
+    ("EA", "일렉트로닉 아츠")
+    
+    , ("KLAC", "KLA"), ("ADSK", "오토데스크"), ("CTAS", "신타스"),
+    ("XEL", "엑셀 에너지"), ("PANW", "팔로알토 네트웍스"), ("ANSS", "앤시스"), ("TEAM", "아틀라시안"),
+    ("WDAY", "워크데이"), ("ILMN", "일루미나"), ("DOCU", "도큐사인"),
+    ("MRNA", "모더나"), ("IDXX", "아이덱스"), ("ZM", "줌 비디오"), ("DXCM", "덱스컴"),
+    ("ROST", "로스 스토어스"), ("CRWD", "크라우드스트라이크"), ("MAR", "메리어트"),
+    ("EXC", "엑셀론"), ("MNST", "몬스터 비버리지"), ("PCAR", "PACCAR"), ("LCID", "루시드 모터스"),
+    ("ALGN", "얼라인 테크놀로지"), ("BIIB", "바이오젠"),
+    ("MTCH", "매치 그룹"), ("OKTA", "옥타"), ("BKR", "베이커 휴즈"), ("ZS", "지스케일러"),
+    ("CDNS", "케이던스"), ("CPRT", "코파트"), ("FAST", "패스트널"), ("AEP", "아메리칸 일렉트릭"),
+    ("ORLY", "오라일리"), ("VRSK", "버리스크"), ("CTSH", "코그니전트"), ("PDD", "핀둬둬"),
+    ("CHKP", "체크포인트"), ("JD", "징둥"), ("NTES", "넷이즈"), ("KHC", "크래프트 하인즈"),
+    ("DLTR", "달러 트리"), ("EPAM", "EPAM 시스템즈"), ("SWKS", "스카이웍스"),
+    ("NXPI", "NXP 반도체"), ("TTD", "트레이드 데스크"),
+    ("PAYX", "페이첵스"), ("BIDU", "바이두"), ("WDC", "웨스턴 디지털"), ("TRMB", "트림블"),
+    ("FTNT", "포티넷"), ("VRSN", "베리사인"), ("ASML", "ASML 홀딩"), ("BMRN", "바이오마린"),
+    ("LULU", "룰루레몬"), ("EBAY", "이베이"), ("CEG", "컨스텔레이션 에너지"), ("RIVN", "리비안")
+]
+
+
+def ticker_by_name():
+    """한글 종목명 -> 티커"""
+    return {name: ticker for ticker, name in nasdaq_top_100}
@@ -0,0 +1,10 @@
+import numpy as np
+
+
+def window_positions(n_rows, lookback, horizon=0, stride=1, start=None):
+    """
+    각 윈도우의 기준 행 i (윈도우는 i 직전 lookback 행, 정답은 i + horizon - 1 행)
+    start: 이 행 이후의 윈도우만 (새로 추가된 날짜만 학습/예측할 때)
+    """
+    first = lookback if start is None else max(lookback, start)
+    return np.arange(first, n_rows - horizon, stride)
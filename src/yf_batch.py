@@ -0,0 +1,55 @@
+import logging
+
+import pandas as pd
+import yfinance as yf
+
+from tracing import timed_http
+
+# yfinance 의 다운로드 실패 로그는 아래 failed 목록으로 따로 보고
+logging.getLogger('yfinance').setLevel(logging.CRITICAL)
+
+
+def _download_chunk(tickers, start, end, threads):
+    """티커 묶음 하나를 한번에 다운로드하여 종가(Close)만 반환 (컬럼: 티커)"""
+    with timed_http('yahoo'):  # 묶음 하나 = 요청 하나로 기록 (응답 크기는 yfinance 내부라 알 수 없음)
+        df = yf.download(tickers, start=start, end=end, auto_adjust=True, group_by='column',
+                         threads=threads, progress=False)
+    if df is None or df.empty or 'Close' not in df.columns.get_level_values(0):
+        return pd.DataFrame()
+    close = df['Close']
+    if isinstance(close, pd.Series):  # 티커가 하나인 경우
+        close = close.to_frame(tickers[0])
+    close.index = pd.to_datetime(close.index).tz_localize(None)
+    close.columns.name = None
+    return close
+
+
+def download_close(tickers, start, end, chunk_size=25, threads=8, retry_failed=True):
+    """
+    여러 티커의 종가를 묶음(chunk) 단위로 다운로드
+    - 묶음 안의 티커들은 yfinance 내부 스레드로 동시에 요청
+    - 데이터가 없는 티커(상장폐지, 잘못된 심볼 등)는 한번 더 재시도 후 실패 목록으로 반환
+    tickers: {티커: 컬럼 이름}
+    반환: (종가 DataFrame (컬럼: 이름, 날짜 인덱스), 실패 티커 {티커: 이름})
+    """
+    symbols = list(tickers)
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    closes = [_download_chunk(chunk, start, end, threads) for chunk in chunks]
+    close = pd.concat(closes, axis=1) if closes else pd.DataFrame()
+
+    # 컬럼이 없거나 전부 NaN 인 티커 = 실패
+    def failed_symbols(frame):
+        return [s for s in symbols if s not in frame.columns or frame[s].isna().all()]
+
+    failed = failed_symbols(close)
+    if failed and retry_failed:
+        retried = _download_chunk(failed, start, end, threads)
+        if not retried.empty:
+            recovered = [s for s in failed if s in retried.columns and not retried[s].isna().all()]
+            close = pd.concat([close.drop(columns=recovered, errors='ignore'), retried[recovered]], axis=1)
+            failed = failed_symbols(close)
+
+    ok_symbols = [s for s in symbols if s not in failed]
+    close = close[ok_symbols].rename(columns=tickers).sort_index()
+    close.index.name = 'Date'
+    return close, {s: tickers[s] for s in failed}
@@ -1,116 +1,40 @@
 import os
-import yfinance as yf
+import sys
 import json
 
-STOCK_SYMBOL = 'GOOGL'
+from fundamentals_cache import FundamentalsCache, refresh_all
+from tracing import track_script
+from universe import nasdaq_top_100
 
-ticker = yf.Ticker(STOCK_SYMBOL)
+STOCK_SYMBOL = 'GOOGL'  # {STOCK_SYMBOL}_info.json 으로도 저장할 종목 (stock_analyzer.py 기본 실행용)
+# 기업 정보 수집 설정 (수집할 종목, 동시 요청 수)
+FUNDAMENTALS_SYMBOLS = os.getenv('FUNDAMENTALS_SYMBOLS', '')  # 쉼표로 구분한 티커, 비어 있으면 나스닥 100 상위 종목 전체
+FUNDAMENTALS_MAX_WORKERS = int(os.getenv('FUNDAMENTALS_MAX_WORKERS', '8'))
 
-info_columns_mapper = {
-    'market': 'market',
-    'sector': 'sector',
-    'industry': 'industry',
-    'recommendationKey': 'recommendationKey',
-    'sharesOutstanding': 'sharesOutstanding',
-    'averageVolume10days': 'averageVolume10days',
-    'averageVolume': 'averageVolume',
-    'heldPercentInstitutions': 'heldPercentInstitutions',
-    'shortRatio': 'shortRatio',
-    'sharesPercentSharesOut': 'sharesPercentSharesOut',
-    'shortPercentOfFloat': 'shortPercentOfFloat',
-    'marketCap': 'marketCap',
-    'currentPrice': 'currentPrice',
-    'fiftyDayAverage': 'fiftyDayAverage',
-    'twoHundredDayAverage': 'twoHundredDayAverage',
-    'fiftyTwoWeekHigh': 'fiftyTwoWeekHigh',
-    'fiftyTwoWeekLow': 'fiftyTwoWeekLow',
-    'SandP52WeekChange': 'SandP52WeekChange',
-    '52WeekChange': '52WeekChange',
-    'ytdReturn': 'ytdReturn',
-    'fiveYearAverageReturn': 'fiveYearAverageReturn',
-    'beta': 'beta',
-    'totalRevenue': 'totalRevenue',
-    'grossProfits': 'grossProfits',
-    'revenuePerShare': 'revenuePerShare',
-    'ebitda': 'ebitda',
-    'ebitdaMargins': 'ebitdaMargins',
-    'debtToEquity': 'debtToEquity',
-    'operatingCashflow': 'operatingCashflow',
-    'freeCashflow': 'freeCashflow',
-    'totalCashPerShare': 'totalCashPerShare',
-    'currentRatio': 'currentRatio',
-    'quickRatio': 'quickRatio',
-    'returnOnAssets': 'returnOnAssets',
-    'returnOnEquity': 'returnOnEquity',
-    'grossMargins': 'grossMargins',
-    'operatingMargins': 'operatingMargins',
-    'profitMargins': 'profitMargins',
-    'totalCash': 'totalCash',
-    'totalDebt': 'totalDebt',
-    'priceToBook': 'priceToBook',
-    'enterpriseValue': 'enterpriseValue',
-    'enterpriseToRevenue': 'enterpriseToRevenue',
-    'enterpriseToEbitda': 'enterpriseToEbitda',
-    'forwardEps': 'forwardEps',
-    'trailingEps': 'trailingEps',
-    'priceToSalesTrailing12Months': 'priceToSalesTrailing12Months',
-    'forwardPE': 'forwardPE',
-    'trailingPE': 'trailingPE',
-    'dividendYield': 'dividendYield',
-    'payoutRatio': 'payoutRatio',
-    'trailingAnnualDividendYield': 'trailingAnnualDividendYield',
-    'dividendRate': 'dividendRate',
-    'trailingAnnualDividendRate': 'trailingAnnualDividendRate',
-    'revenueGrowth': 'revenueGrowth',
-    'earningsGrowth': 'earningsGrowth',
-    'earningsQuarterlyGrowth': 'earningsQuarterlyGrowth',
-    'revenueQuarterlyGrowth': 'revenueQuarterlyGrowth',
-    'heldPercentInsiders': 'heldPercentInsiders',
-}
+trace = track_script('fundamentals')  # 시간/메모리/HTTP 기록 (report/trace.jsonl)
+symbols = [s.strip() for s in FUNDAMENTALS_SYMBOLS.split(',') if s.strip()] or [ticker for ticker, _ in nasdaq_top_100]
+if STOCK_SYMBOL not in symbols:
+    symbols.append(STOCK_SYMBOL)
 
-financial_columns_mapper = {
-    'Research Development': 'ResearchDevelopment',
-    'Net Income': 'NetIncome',
-    'Gross Profit': 'GrossProfit',
-    'Operating Income': 'OperatingIncome',
-    'Total Revenue': 'TotalRevenue',
-    'Cost Of Revenue': 'CostOfRevenue',
-}
-
-balance_sheet_columns_mapper = {
-    'Total Liab': 'TotalLiab',
-    'Total Stockholder Equity': 'TotalStockholderEquity',
-    'Total Assets': 'TotalAssets',
-}
-
-raw_info = ticker.info
-info_dict = {}
-
-# info 정보 추가
-for info_column, english_name in info_columns_mapper.items():
-    info_dict[english_name] = raw_info.get(info_column)
-
-# ticker.financials : 직전 4년 매출관련 데이터 추가
-financial_dict = ticker.financials.T.to_dict('list')
-financial_data = {}
-for financial_column, english_name in financial_columns_mapper.items():
-    financial_data["list_financial_" + english_name] = list(reversed(financial_dict.get(financial_column, [])))
-info_dict.update(financial_data)
-
-# ticker.balance_sheet : 직전 4년 재무상태 데이터 추가
-balance_sheet_dict = ticker.balance_sheet.T.to_dict('list')
-balance_sheet_data = {}
-for balance_sheet_column, english_name in balance_sheet_columns_mapper.items():
-    balance_sheet_data["list_balancesheet_" + english_name] = list(reversed(balance_sheet_dict.get(balance_sheet_column, [])))
-info_dict.update(balance_sheet_data)
-
-# JSON으로 저장
+# info(시세성 값)는 FUNDAMENTALS_INFO_TTL_HOURS, 재무제표는 FUNDAMENTALS_STATEMENTS_TTL_DAYS 가 지난 것만 다시 요청 (--force: 전체)
 folder_name = "report"
 folder_path = os.path.join(os.getcwd(), folder_name)
-if not os.path.exists(folder_path):
-    os.makedirs(folder_path)
-    print(f"'{folder_name}' 폴더 생성 완료")
-with open(folder_path + '/' + STOCK_SYMBOL + "_info.json", "w", encoding="utf-8") as f:
-    json.dump(info_dict, f, indent=4)
-
-print(STOCK_SYMBOL + " 데이터가 GOOGL_info.json 파일로 저장되었습니다.")
\ No newline at end of file
+cache = FundamentalsCache(os.path.join(folder_path, "cache", "fundamentals"))
+results = refresh_all(cache, symbols, max_workers=FUNDAMENTALS_MAX_WORKERS, force='--force' in sys.argv)
+
+fetched = [r for r in results if r.groups]
+failed = [r for r in results if r.status == 'failed']
+trace.output(rows=len(fetched))  # 갱신된 종목 수
+print(f"{len(symbols)}개 종목 기업 정보: 갱신 {len(fetched)}개 (요청 {sum(len(r.groups) for r in results)}회), "
+      f"캐시 사용 {sum(r.status == 'fresh' for r in results)}개, 실패 {len(failed)}개")
+for r in failed:
+    print(f"  {r.symbol} 실패: {r.error}")
+
+# JSON으로 저장 (기본 분석 종목은 기존 형식으로도 저장)
+info_dict = cache.get(STOCK_SYMBOL)
+if info_dict is None:
+    print(f"{STOCK_SYMBOL} 데이터를 가져오지 못했습니다.")
+else:
+    with open(folder_path + '/' + STOCK_SYMBOL + "_info.json", "w", encoding="utf-8") as f:
+        json.dump(info_dict, f, indent=4)
+    print(STOCK_SYMBOL + f" 데이터가 {STOCK_SYMBOL}_info.json 파일로 저장되었습니다.")
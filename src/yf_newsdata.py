@@ -1,44 +1,43 @@
-import yfinance as yf
 import json
 import os
+from datetime import datetime, timedelta, timezone
+
+from news_store import NewsStore, fetch_all
+from tracing import track_script
+from universe import nasdaq_top_100
 
 # 설정 값
-STOCK_SYMBOL = "GOOGL"
+STOCK_SYMBOL = "GOOGL"  # {STOCK_SYMBOL}_news.json 으로도 저장할 종목 (stock_analyzer.py 기본 실행용)
 NEWS_COUNT = 20  # 원하는 뉴스 개수 설정
-
-def get_news_summary(content_item):
-    return content_item.get('summary', '콘텐츠 없음')
-
-# JSON 데이터 구조 생성
-news_data = []
-
-# 뉴스 데이터 가져오기
-dat = yf.Ticker(STOCK_SYMBOL)
-news_items = dat.get_news(count=NEWS_COUNT)  # count 파라미터 추가
-
-for item in news_items:
-    content = item['content']
-    news_entry = {
-        "stock": STOCK_SYMBOL,
-        "date": content['pubDate'],
-        "title": content['title'],
-        "provider": content['provider'].get('displayName', '알 수 없음'),
-        "summary": get_news_summary(content)
-    }
-    news_data.append(news_entry)
-
-    # 콘솔 출력
-    print(f"[{news_entry['date']}] {news_entry['title']}")
-    print(f"출처: {news_entry['provider']}")
-    print(f"내용: {news_entry['summary'][:100]}...\n{'-'*50}")
-
-# JSON 파일 저장
+# 뉴스 수집 설정 (수집할 종목, 이미 저장된 종목의 요청 개수, 동시 요청 수, 최근 며칠 이내 뉴스만 내보낼지)
+NEWS_SYMBOLS = os.getenv('NEWS_SYMBOLS', '')  # 쉼표로 구분한 티커, 비어 있으면 나스닥 100 상위 종목 전체
+NEWS_REFRESH_COUNT = int(os.getenv('NEWS_REFRESH_COUNT', '10'))
+NEWS_MAX_WORKERS = int(os.getenv('NEWS_MAX_WORKERS', '8'))
+NEWS_WINDOW_DAYS = int(os.getenv('NEWS_WINDOW_DAYS', '0'))  # 0 이면 기간 제한 없음
+
+trace = track_script('news')  # 시간/메모리/HTTP 기록 (report/trace.jsonl)
+symbols = [s.strip() for s in NEWS_SYMBOLS.split(',') if s.strip()] or [ticker for ticker, _ in nasdaq_top_100]
+if STOCK_SYMBOL not in symbols:
+    symbols.append(STOCK_SYMBOL)
+
+# 뉴스 데이터 가져오기 (종목별 새 기사만 report/news/ 에 추가)
 folder_name = "report"
 folder_path = os.path.join(os.getcwd(), folder_name)
-if not os.path.exists(folder_path):
-    os.makedirs(folder_path)
-    print(f"'{folder_name}' 폴더 생성 완료")
+store = NewsStore(os.path.join(folder_path, "news"))
+results = fetch_all(store, symbols, count=NEWS_COUNT, refresh_count=NEWS_REFRESH_COUNT,
+                    max_workers=NEWS_MAX_WORKERS)
+
+failed = [r for r in results if r.status != 'ok']
+trace.output(rows=sum(r.new for r in results))  # 새로 저장된 기사 수
+print(f"{len(symbols)}개 종목 뉴스 수집: 새 기사 {sum(r.new for r in results)}개, "
+      f"요청 {sum(r.requests for r in results)}회, 실패 {len(failed)}개")
+for r in failed:
+    print(f"  {r.symbol} 실패: {r.error}")
+
+# 기본 분석 종목은 기존 형식(최신 NEWS_COUNT 개)으로도 저장
+since = datetime.now(timezone.utc) - timedelta(days=NEWS_WINDOW_DAYS) if NEWS_WINDOW_DAYS else None
+news_data = [{k: v for k, v in item.items() if k != 'id'} for item in store.latest(STOCK_SYMBOL, NEWS_COUNT, since)]
 with open(folder_path + f'/{STOCK_SYMBOL}_news.json', 'w', encoding='utf-8') as f:
     json.dump(news_data, f, ensure_ascii=False, indent=2)
 
-print(f"{STOCK_SYMBOL} 관련 최신 {NEWS_COUNT}개 뉴스가 저장되었습니다.")
\ No newline at end of file
+print(f"{STOCK_SYMBOL} 관련 최신 {len(news_data)}개 뉴스가 저장되었습니다.")